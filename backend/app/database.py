@@ -1,15 +1,138 @@
 from sqlmodel import create_engine, SQLModel, Session
+from sqlalchemy import event, inspect, text
+from app.models import MarketDataHistory, TickerIndex, TICKER_FTS_DDL, HISTORY_INDICATORS
 import os
+import sqlite3
 
 # Database file location
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATABASE_URL = f"sqlite:///{os.path.join(BASE_DIR, 'tradingview.db')}"
 
-engine = create_engine(DATABASE_URL, echo=True)
+# Per-connection settings of the SQLite file. WAL lets the API and history
+# readers run while the collector, indexer or purger writes; writers wait on
+# each other for up to busy_timeout ms instead of failing with "database is
+# locked". synchronous=NORMAL is durable across application crashes in WAL
+# mode (a power loss may drop the last commits only).
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 5000,
+    "cache_size": -64000,  # KiB, per connection
+    "mmap_size": 256 * 1024 * 1024,
+    "temp_store": "MEMORY",
+}
+# Keeps IN (...) lists well under SQLite's bound parameter limit
+SQL_IN_CHUNK = 10000
+
+def _env_flag(name: str) -> bool:
+    return os.environ.get(name, "").strip().lower() in ("1", "true", "yes", "on")
+
+def make_engine(url: str = DATABASE_URL, echo: bool = None, pool_size: int = None, max_overflow: int = None):
+    """
+    The SQLite engine profile shared by the app and its services: the pragmas
+    above on every new connection and a connection pool sized for the
+    collector, indexer and purger threads plus the screener worker pool
+    and request handlers. SQL echo is off unless DB_ECHO is set.
+    """
+    if echo is None:
+        echo = _env_flag("DB_ECHO")
+    if pool_size is None:
+        pool_size = int(os.environ.get("DB_POOL_SIZE", 20))
+    if max_overflow is None:
+        max_overflow = int(os.environ.get("DB_MAX_OVERFLOW", 40))
+    new_engine = create_engine(
+        url,
+        echo=echo,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=30,
+        # Pooled connections move between threads; each is used by one at a time
+        connect_args={"check_same_thread": False, "timeout": SQLITE_PRAGMAS["busy_timeout"] / 1000},
+    )
+    event.listen(new_engine, "connect", _apply_pragmas)
+    return new_engine
+
+def _apply_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+engine = make_engine()
 
 def init_db():
+    # Upgrade existing files first; create_all skips indexes on tables that already exist
+    with engine.begin() as connection:
+        migrate_market_data_history(connection)
+        migrate_history_indicators(connection)
+        migrate_ticker_fts(connection)
     SQLModel.metadata.create_all(engine)
 
+def migrate_market_data_history(connection):
+    """
+    Adds the (symbol, interval, timestamp) unique index to databases created
+    before it existed, keeping only the most recently written row of each
+    duplicated candle.
+    """
+    table = MarketDataHistory.__table__
+    inspector = inspect(connection)
+    if table.name not in inspector.get_table_names():
+        return
+    existing = {ix["name"] for ix in inspector.get_indexes(table.name)}
+    missing = [ix for ix in table.indexes if ix.unique and ix.name not in existing]
+    if not missing:
+        return
+
+    result = connection.execute(text(
+        f"DELETE FROM {table.name} WHERE id NOT IN ("
+        f"SELECT MAX(id) FROM {table.name} GROUP BY symbol, interval, timestamp)"
+    ))
+    print(f"Database: Removed {result.rowcount} duplicate {table.name} rows.")
+    for index in missing:
+        index.create(connection)
+
+def migrate_history_indicators(connection):
+    """
+    Moves indicators out of the indicators_json blob of older databases into
+    the typed columns of market_data_history, then drops the blob.
+    """
+    table = MarketDataHistory.__tablename__
+    inspector = inspect(connection)
+    if table not in inspector.get_table_names():
+        return
+    columns = {column["name"] for column in inspector.get_columns(table)}
+    for column in HISTORY_INDICATORS.values():
+        if column not in columns:
+            connection.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} FLOAT"))
+    if "indicators_json" not in columns:
+        return
+
+    assignments = ", ".join(
+        f"{column} = json_extract(indicators_json, '$.{name}')" for name, column in HISTORY_INDICATORS.items()
+    )
+    result = connection.execute(text(
+        f"UPDATE {table} SET {assignments} WHERE indicators_json IS NOT NULL AND json_valid(indicators_json)"
+    ))
+    if sqlite3.sqlite_version_info >= (3, 35, 0):
+        connection.execute(text(f"ALTER TABLE {table} DROP COLUMN indicators_json"))
+    else:
+        connection.execute(text(f"UPDATE {table} SET indicators_json = NULL"))
+    print(f"Database: Moved indicators of {result.rowcount} {table} rows into columns.")
+
+def migrate_ticker_fts(connection):
+    """
+    Creates and populates the ticker_index_fts mirror for databases whose
+    ticker_index predates it.
+    """
+    table_names = inspect(connection).get_table_names()
+    if TickerIndex.__tablename__ not in table_names or "ticker_index_fts" in table_names:
+        return
+    for statement in TICKER_FTS_DDL:
+        connection.execute(text(statement))
+    print("Database: Built ticker_index_fts.")
+
 def get_session():
     with Session(engine) as session:
         yield session
@@ -1,115 +1,232 @@
-from fastapi import FastAPI, APIRouter, Query, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, APIRouter, Query, WebSocket, WebSocketDisconnect, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from app.services.screener import ScreenerService
-from typing import List
+from app.services.async_screener import AsyncScreenerService
+from app.services.market_delta import DeltaStream, PROTOCOL_VERSION
+from app.services.channels import DEFAULT_CHANNEL, ChannelData, parse_channel
+from app.services.fanout import ClientChannel, encode_message
+from typing import Dict, List, Optional, Set
 import asyncio
+import json
 from contextlib import asynccontextmanager
 
 class ConnectionManager:
-    def __init__(self):
+    """
+    Tracks WebSocket clients and fans messages out to them. Each message is
+    encoded once and handed to every client's bounded send queue, so sends run
+    concurrently and a slow or dead client cannot hold up the others; clients
+    whose sends fail or time out are pruned.
+    """
+
+    def __init__(self, queue_size: int = 32, send_timeout: float = 5.0, slow_client_policy: str = "drop_oldest"):
         self.active_connections: List[WebSocket] = []
+        self.channels: Dict[WebSocket, ClientChannel] = {}
+        self.queue_size = queue_size
+        self.send_timeout = send_timeout
+        self.slow_client_policy = slow_client_policy
+        # Clients speaking the versioned snapshot/delta protocol; everyone else
+        # gets the full market_update payload of DEFAULT_CHANNEL on every tick.
+        self.delta_clients: Set[WebSocket] = set()
+        # One sequenced stream per channel name, and who subscribed to it
+        self.streams: Dict[str, DeltaStream] = {}
+        self.subscribers: Dict[str, Set[WebSocket]] = {}
 
     async def connect(self, websocket: WebSocket):
         await websocket.accept()
         self.active_connections.append(websocket)
+        self.channels[websocket] = ClientChannel(
+            websocket, self.queue_size, self.send_timeout, self.slow_client_policy, on_close=self.disconnect
+        )
 
     def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
+        # Also called when a send fails, so the socket may already be gone
+        if websocket in self.active_connections:
+            self.active_connections.remove(websocket)
+        self.delta_clients.discard(websocket)
+        for channel in list(self.subscribers):
+            self.unsubscribe(websocket, channel)
+        channel = self.channels.pop(websocket, None)
+        if channel is not None:
+            channel.close()
 
-    async def broadcast(self, message: dict):
-        for connection in self.active_connections:
-            try:
-                await connection.send_json(message)
-            except Exception:
-                # Handle stale connections
-                pass
+    async def send(self, websocket: WebSocket, message: dict):
+        """Queues a message for one client behind anything already pending for it."""
+        channel = self.channels.get(websocket)
+        if channel is not None:
+            channel.offer(encode_message(message))
+
+    async def broadcast(self, message: dict, connections: Optional[List[WebSocket]] = None):
+        text = encode_message(message)
+        for connection in (self.active_connections if connections is None else connections):
+            channel = self.channels.get(connection)
+            if channel is not None:
+                channel.offer(text)
+
+    def active_channels(self) -> List[str]:
+        """Channels somebody listens to; only these are fetched each tick."""
+        channels = [name for name, subscribers in self.subscribers.items() if subscribers]
+        if DEFAULT_CHANNEL not in channels and any(c not in self.delta_clients for c in self.active_connections):
+            channels.append(DEFAULT_CHANNEL)
+        return channels
+
+    async def publish(self, channel: str, rows: list):
+        """
+        Pushes a new snapshot of a channel (rows, or ChannelData with
+        metadata): subscribers get what changed since the previous one,
+        legacy clients get DEFAULT_CHANNEL in full.
+        """
+        rows, meta = rows if isinstance(rows, ChannelData) else (rows, None)
+        if channel == DEFAULT_CHANNEL:
+            legacy = [c for c in self.active_connections if c not in self.delta_clients]
+            if legacy:
+                await self.broadcast({"type": "market_update", "data": rows}, legacy)
+        stream = self.streams.setdefault(channel, DeltaStream(channel))
+        delta = stream.update(rows, meta)
+        subscribers = self.subscribers.get(channel)
+        if delta is not None and subscribers:
+            await self.broadcast(delta, list(subscribers))
+
+    async def subscribe(self, websocket: WebSocket, channel: str, rows: Optional[list] = None):
+        """
+        Publishes `rows` (if given) to the channel's current subscribers, then
+        (re)subscribes the client from a snapshot at the current sequence number.
+        """
+        self.delta_clients.add(websocket)
+        if rows is not None:
+            await self.publish(channel, rows)
+        stream = self.streams.setdefault(channel, DeltaStream(channel))
+        await self.send(websocket, stream.snapshot())
+        self.subscribers.setdefault(channel, set()).add(websocket)
+
+    def unsubscribe(self, websocket: WebSocket, channel: str):
+        subscribers = self.subscribers.get(channel)
+        if subscribers is None:
+            return
+        subscribers.discard(websocket)
+        if not subscribers:
+            # Nobody listens any more: stop fetching it and forget its state
+            del self.subscribers[channel]
+            self.streams.pop(channel, None)
 
 manager = ConnectionManager()
 screener_service = ScreenerService()
+# All request-path screener calls go through the async facade so a slow
+# TradingView response never blocks the event loop.
+async_screener = AsyncScreenerService(screener_service)
 
-async def broadcast_updates():
+async def load_channel(name: str) -> list:
     """
-    Background task to periodically fetch and broadcast market updates.
+    Computes the current rows of a subscription channel (ChannelData for
+    channels that publish metadata too). Upstream failures raise instead of
+    being answered with fallback rows, so they are never published.
     """
-    while True:
-        if manager.active_connections:
-            try:
-                # Increased limit to 50 to match initial load
-                updates = screener_service.get_top_movers(limit=50)
-                await manager.broadcast({
-                    "type": "market_update",
-                    "data": updates
-                })
-            except Exception as e:
-                print(f"Error in broadcast task: {e}")
-        await asyncio.sleep(10) # Update every 10 seconds
+    channel = parse_channel(name, screener_service.interval_map)
+    if channel.kind == "favorites":
+        favorites = await asyncio.to_thread(favorites_service.get_favorites)
+        return await async_screener.get_assets_by_symbols(
+            [f.symbol for f in favorites], channel.interval, strict=True
+        )
+    if channel.kind == "divergence":
+        scan = await async_screener.get_divergences(interval=channel.interval, limit=50)
+        rows = scan.pop("divergences")
+        # Fill level of the window, so "no signals" and "not enough bars yet" look different
+        return ChannelData(rows, scan)
+    # Increased limit to 50 to match initial load
+    return await async_screener.get_top_movers(
+        limit=50, interval=channel.interval, sort_descending=channel.descending, strict=True
+    )
+
+async def load_channels(names: List[str]) -> Dict[str, object]:
+    """
+    Computes several channels at once: every movers channel is ranked from a
+    single batched upstream request, favorites channels load individually.
+    Maps each name to its rows, or to the exception that prevented loading it.
+    """
+    parsed = {name: parse_channel(name, screener_service.interval_map) for name in names}
+    movers = [name for name in names if parsed[name].kind == "movers"]
+    results: Dict[str, object] = {}
+    if len(movers) > 1:
+        intervals = sorted({parsed[name].interval for name in movers})
+        try:
+            batch = await async_screener.get_movers_batch(intervals, limit=50, strict=True)
+            for name in movers:
+                results[name] = batch[parsed[name].interval]["desc" if parsed[name].descending else "asc"]
+        except Exception as e:
+            results.update((name, e) for name in movers)
+    pending = [name for name in names if name not in results]
+    loaded = await asyncio.gather(*(load_channel(name) for name in pending), return_exceptions=True)
+    results.update(zip(pending, loaded))
+    return results
+
+async def publish_active_channels():
+    """
+    Computes every channel with at least one listener once and pushes it to
+    its subscribers. Channels nobody listens to are not fetched. Raises when
+    every channel failed, so the scheduler backs off from a dead upstream.
+    """
+    channels = manager.active_channels()
+    if not channels:
+        return
+    errors = []
+    for name, rows in (await load_channels(channels)).items():
+        if isinstance(rows, Exception):
+            print(f"Error in broadcast task ({name}): {rows}")
+            errors.append(rows)
+        else:
+            await manager.publish(name, rows)
+    if errors and len(errors) == len(channels):
+        raise errors[0]
 
 from app.database import init_db, engine
 from app.services.indexer import IndexerService
 from app.services.collector import CollectorService
 from sqlmodel import Session
 
-async def run_ticker_indexer():
-    """
-    Background task to periodically sync the ticker index.
-    Runs every 24 hours.
-    """
-    while True:
-        try:
-            # Run blocking indexing in a thread
-            await asyncio.to_thread(_sync_tickers_blocking)
-        except Exception as e:
-            print(f"Error in ticker indexer task: {e}")
-        await asyncio.sleep(24 * 3600) # Run every 24 hours
+from app.services.scheduler import Scheduler
+
+# Background job cadences, in seconds
+BROADCAST_INTERVAL = 10
+COLLECT_INTERVAL = 5 * 60
+# Collect just before each 5m candle closes so its row holds near-final values
+COLLECT_OFFSET = -5
+INDEX_INTERVAL = 24 * 3600
+PURGE_INTERVAL = 24 * 3600
 
 def _sync_tickers_blocking():
     with Session(engine) as session:
         indexer = IndexerService(session)
         indexer.sync_tickers()
 
-async def run_data_collector():
-    """
-    Background task to collect data for favorite tickers.
-    Runs every 5 minutes.
-    """
-    collector = CollectorService()
-    while True:
-        try:
-            # Run blocking collection in a thread
-            await asyncio.to_thread(collector.collect_all)
-        except Exception as e:
-            print(f"Error in data collector task: {e}")
-        await asyncio.sleep(5 * 60) # Run every 5 minutes
+collector_service = CollectorService()
 
-async def run_data_purger():
-    """
-    Background task to purge old market data history.
-    Runs every 24 hours.
-    """
-    collector = CollectorService()
-    while True:
-        try:
-            # Run blocking purge in a thread
-            await asyncio.to_thread(collector.purge_old_data)
-        except Exception as e:
-            print(f"Error in data purger task: {e}")
-        await asyncio.sleep(24 * 3600) # Run every 24 hours
+async def sync_ticker_index():
+    await asyncio.to_thread(_sync_tickers_blocking)
+
+async def collect_favorites():
+    await asyncio.to_thread(collector_service.collect_all)
+
+async def purge_history():
+    await asyncio.to_thread(collector_service.purge_old_data)
+
+scheduler = Scheduler()
+scheduler.add("broadcast", publish_active_channels, BROADCAST_INTERVAL, jitter=0.5, max_backoff=60)
+scheduler.add("ticker_indexer", sync_ticker_index, INDEX_INTERVAL, run_immediately=True, jitter=60,
+              max_backoff=INDEX_INTERVAL)
+# The collector raises when the screener is down; skip up to three cycles rather than hammer it
+scheduler.add("data_collector", collect_favorites, COLLECT_INTERVAL, align=True, offset=COLLECT_OFFSET,
+              jitter=2, max_backoff=4 * COLLECT_INTERVAL)
+scheduler.add("data_purger", purge_history, PURGE_INTERVAL, align=True, offset=3 * 3600, jitter=300)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup: Initialize the database
     init_db()
-    # Start the background tasks
-    task = asyncio.create_task(broadcast_updates())
-    index_task = asyncio.create_task(run_ticker_indexer())
-    collect_task = asyncio.create_task(run_data_collector())
-    purge_task = asyncio.create_task(run_data_purger())
+    # Start the background jobs
+    scheduler.start()
     yield
-    # Shutdown: Cancel the tasks
-    task.cancel()
-    index_task.cancel()
-    collect_task.cancel()
-    purge_task.cancel()
+    # Shutdown: Cancel the jobs
+    await scheduler.stop()
+    async_screener.shutdown()
 
 app = FastAPI(title="TradingView Screener API", lifespan=lifespan)
 
@@ -123,27 +240,75 @@ app.add_middleware(
 
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
+    # /ws?protocol=2 opts into snapshot + sequenced market_delta messages
+    use_deltas = websocket.query_params.get("protocol") == str(PROTOCOL_VERSION)
     await manager.connect(websocket)
     try:
-        await websocket.send_json({"type": "welcome", "message": "Connected to TradingView Screener WebSocket"})
+        await manager.send(websocket, {"type": "welcome", "message": "Connected to TradingView Screener WebSocket"})
         
         # Trigger immediate data fetch for the new client
         try:
-            initial_data = screener_service.get_top_movers(limit=50)
-            await websocket.send_json({
-                "type": "market_update",
-                "data": initial_data
-            })
+            initial_data = await async_screener.get_top_movers(limit=50)
+            if use_deltas:
+                await manager.subscribe(websocket, DEFAULT_CHANNEL, initial_data)
+            else:
+                await manager.send(websocket, {
+                    "type": "market_update",
+                    "data": initial_data
+                })
             print(f"Sent initial update: {len(initial_data)} assets")
         except Exception as e:
             print(f"Error sending initial update: {e}")
+            if use_deltas:
+                await manager.subscribe(websocket, DEFAULT_CHANNEL)
 
         while True:
-            # Keep connection open
-            await websocket.receive_text()
+            # Keep connection open; answer application-level pings so clients
+            # can measure server responsiveness.
+            message = await websocket.receive_text()
+            if message == "ping":
+                await manager.send(websocket, {"type": "pong"})
+                continue
+            try:
+                request = json.loads(message)
+            except ValueError:
+                continue
+            if use_deltas and isinstance(request, dict):
+                await handle_client_request(websocket, request)
     except WebSocketDisconnect:
+        pass
+    finally:
         manager.disconnect(websocket)
 
+async def handle_client_request(websocket: WebSocket, request: dict):
+    """
+    Protocol 2 client messages:
+    {"type": "subscribe" | "unsubscribe", "channel": "movers:15:desc"} and
+    {"type": "resync", "channel": ...} after a sequence gap.
+    """
+    kind = request.get("type")
+    name = request.get("channel", DEFAULT_CHANNEL)
+    if kind not in ("subscribe", "unsubscribe", "resync"):
+        return
+    try:
+        parse_channel(name, screener_service.interval_map)
+    except ValueError as e:
+        await manager.send(websocket, {"type": "error", "message": str(e)})
+        return
+
+    if kind == "unsubscribe":
+        manager.unsubscribe(websocket, name)
+    elif name in manager.streams:
+        # Already live: the last published snapshot is current
+        await manager.subscribe(websocket, name)
+    else:
+        try:
+            rows = await load_channel(name)
+        except Exception as e:
+            print(f"Error loading channel {name}: {e}")
+            rows = None
+        await manager.subscribe(websocket, name, rows)
+
 from app.services.favorites import FavoritesService
 from pydantic import BaseModel
 
@@ -155,15 +320,81 @@ favorites_service = FavoritesService()
 api_router = APIRouter(prefix="/api/v1")
 screener_router = APIRouter(prefix="/screener")
 favorites_router = APIRouter(prefix="/favorites")
+system_router = APIRouter(prefix="/system")
 
 @screener_router.get("/top-movers")
-async def get_top_movers(limit: int = 50, interval: str = "1D", sort: str = "desc"):
+async def get_top_movers(limit: int = Query(50, ge=1, le=screener_service.max_movers),
+                         interval: str = "1D", sort: str = "desc",
+                         min_volume: Optional[float] = None, rsi_min: Optional[float] = None,
+                         rsi_max: Optional[float] = None, exchanges: Optional[str] = None):
+    """
+    Gainers or losers of an interval. Filters: min_volume (24h volume in
+    USD), rsi_min/rsi_max and exchanges (comma separated). `limit` is capped at
+    the rows the shared movers snapshot holds; larger values are rejected.
+    """
     sort_descending = sort.lower() != "asc"
-    return screener_service.get_top_movers(limit=limit, interval=interval, sort_descending=sort_descending)
+    try:
+        if min_volume is None and rsi_min is None and rsi_max is None and not exchanges:
+            return await async_screener.get_top_movers(limit=limit, interval=interval, sort_descending=sort_descending)
+        # Filtered queries are answered from the local universe snapshot
+        return await async_screener.query_movers(
+            limit=limit, interval=interval, sort_descending=sort_descending,
+            min_volume=min_volume, rsi_min=rsi_min, rsi_max=rsi_max,
+            exchanges=[e.strip() for e in exchanges.split(",") if e.strip()] if exchanges else None,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except TimeoutError:
+        raise HTTPException(status_code=504, detail="Screener upstream timed out")
+
+@screener_router.get("/top-movers/batch")
+async def get_top_movers_batch(intervals: str = "1D", limit: int = 50):
+    """Gainers ("desc") and losers ("asc") per interval, e.g. ?intervals=5,15,60,1D."""
+    requested = [i.strip() for i in intervals.split(",") if i.strip()]
+    try:
+        return await async_screener.get_movers_batch(requested, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except TimeoutError:
+        raise HTTPException(status_code=504, detail="Screener upstream timed out")
+
+@screener_router.get("/divergences")
+async def get_divergences(interval: str = "60", kind: Optional[str] = None, limit: int = 50):
+    """
+    RSI divergences across the liquid universe, e.g. ?interval=60&kind=bullish,
+    with the window's fill level: {"interval", "bars", "window", "divergences"}.
+    Only intervals 1, 5, 15 and 60 are scanned.
+    """
+    try:
+        return await async_screener.get_divergences(interval=interval, kind=kind, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except TimeoutError:
+        raise HTTPException(status_code=504, detail="Screener upstream timed out")
+
+@screener_router.get("/screen")
+async def run_screen(where: Optional[str] = None, sort: Optional[str] = None, order: str = "desc",
+                     interval: str = "1D", limit: int = 50):
+    """
+    Ad-hoc screens over the liquid universe, e.g.
+    ?where=rsi < 30 and change > 0 and volume_usd > 1e6&sort=macd - macd_signal
+    ("volume" is the interval's volume in base units, "volume_usd" the 24h volume in USD)
+    """
+    try:
+        return await async_screener.screen(
+            where=where, sort=sort, interval=interval, sort_descending=order.lower() != "asc", limit=limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except TimeoutError:
+        raise HTTPException(status_code=504, detail="Screener upstream timed out")
 
 @screener_router.get("/search")
 async def search_ticker(q: str = Query(..., min_length=1)):
-    return screener_service.search_ticker(q)
+    try:
+        return await async_screener.search_ticker(q)
+    except TimeoutError:
+        raise HTTPException(status_code=504, detail="Ticker search timed out")
 
 @favorites_router.get("")
 async def get_favorites():
@@ -173,22 +404,32 @@ async def get_favorites():
 async def get_favorites_live(interval: str = "1D"):
     favorites = favorites_service.get_favorites()
     symbols = [f.symbol for f in favorites]
-    return screener_service.get_assets_by_symbols(symbols, interval)
+    try:
+        return await async_screener.get_assets_by_symbols(symbols, interval)
+    except TimeoutError:
+        raise HTTPException(status_code=504, detail="Screener upstream timed out")
 
 @favorites_router.post("", status_code=201)
 async def add_favorite(favorite: FavoriteCreate):
-    return favorites_service.add_favorite(favorite.symbol)
+    # Adding a favorite triggers an immediate upstream collection, run it off the loop
+    return await asyncio.to_thread(favorites_service.add_favorite, favorite.symbol)
 
 @favorites_router.delete("/{symbol}", status_code=204)
 async def remove_favorite(symbol: str):
     favorites_service.remove_favorite(symbol)
     return None
 
+@system_router.get("/jobs")
+async def get_jobs():
+    """Per-job run statistics of the background scheduler."""
+    return scheduler.status()
+
 from app.services.favorites_history import router as fav_history_router
 
 api_router.include_router(screener_router)
 api_router.include_router(favorites_router)
 api_router.include_router(fav_history_router)
+api_router.include_router(system_router)
 app.include_router(api_router)
 
 @app.get("/")
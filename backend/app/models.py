@@ -1,4 +1,5 @@
 from sqlmodel import SQLModel, Field
+from sqlalchemy import Index, DDL, event
 from typing import Optional
 from datetime import datetime, timezone
 
@@ -12,6 +13,34 @@ class TickerIndex(SQLModel, table=True):
     description: Optional[str] = None
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
+# Full-text mirror of ticker_index for token/prefix search ("btc perp", "eth okx").
+# It is an external-content FTS5 table kept in sync by triggers, so every insert,
+# update and prune the indexer issues against ticker_index is reflected in the
+# same transaction.
+TICKER_FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS ticker_index_fts USING fts5("
+    "symbol, name, description, exchange, content='ticker_index', content_rowid='id', prefix='2 3')",
+    "CREATE TRIGGER IF NOT EXISTS ticker_index_fts_ai AFTER INSERT ON ticker_index BEGIN "
+    "INSERT INTO ticker_index_fts(rowid, symbol, name, description, exchange) "
+    "VALUES (new.id, new.symbol, new.name, new.description, new.exchange); END",
+    "CREATE TRIGGER IF NOT EXISTS ticker_index_fts_ad AFTER DELETE ON ticker_index BEGIN "
+    "INSERT INTO ticker_index_fts(ticker_index_fts, rowid, symbol, name, description, exchange) "
+    "VALUES ('delete', old.id, old.symbol, old.name, old.description, old.exchange); END",
+    "CREATE TRIGGER IF NOT EXISTS ticker_index_fts_au AFTER UPDATE ON ticker_index BEGIN "
+    "INSERT INTO ticker_index_fts(ticker_index_fts, rowid, symbol, name, description, exchange) "
+    "VALUES ('delete', old.id, old.symbol, old.name, old.description, old.exchange); "
+    "INSERT INTO ticker_index_fts(rowid, symbol, name, description, exchange) "
+    "VALUES (new.id, new.symbol, new.name, new.description, new.exchange); END",
+    "INSERT INTO ticker_index_fts(ticker_index_fts) VALUES ('rebuild')",
+]
+
+for statement in TICKER_FTS_DDL:
+    event.listen(TickerIndex.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+event.listen(
+    TickerIndex.__table__, "before_drop",
+    DDL("DROP TABLE IF EXISTS ticker_index_fts").execute_if(dialect="sqlite")
+)
+
 class Favorite(SQLModel, table=True):
     __tablename__ = "favorites"
     
@@ -21,6 +50,10 @@ class Favorite(SQLModel, table=True):
 
 class MarketDataHistory(SQLModel, table=True):
     __tablename__ = "market_data_history"
+    # One row per candle; the collector upserts against this index
+    __table_args__ = (
+        Index("ix_market_data_history_symbol_interval_timestamp", "symbol", "interval", "timestamp", unique=True),
+    )
     
     id: Optional[int] = Field(default=None, primary_key=True)
     symbol: str = Field(index=True)
@@ -31,8 +64,21 @@ class MarketDataHistory(SQLModel, table=True):
     low: Optional[float] = None
     close: Optional[float] = None
     volume: Optional[float] = None
-    # We could also store indicators as JSON or separate columns
-    indicators_json: Optional[str] = None # JSON string of all indicators
-    
-    class Config:
-        unique_together = ("symbol", "timestamp", "interval")
+    # Indicators as typed columns, see HISTORY_INDICATORS
+    rsi: Optional[float] = None
+    macd: Optional[float] = None
+    macd_signal: Optional[float] = None
+    sma20: Optional[float] = None
+    sma50: Optional[float] = None
+    sma200: Optional[float] = None
+
+# Indicator names as the collector and the history API report them -> MarketDataHistory columns.
+# Databases written before these columns existed held them in an indicators_json blob.
+HISTORY_INDICATORS = {
+    "RSI": "rsi",
+    "MACD": "macd",
+    "MACD_Signal": "macd_signal",
+    "SMA20": "sma20",
+    "SMA50": "sma50",
+    "SMA200": "sma200",
+}
@@ -0,0 +1,71 @@
+from app.services.screener import ScreenerService
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+import asyncio
+import functools
+
+
+class AsyncScreenerService:
+    """
+    Async facade over ScreenerService.
+
+    tvscreener performs blocking HTTP calls, so every screener call is offloaded
+    to a bounded worker pool and awaited with a per-call timeout. The event loop
+    keeps serving REST and WebSocket traffic while TradingView is slow. When a
+    caller times out or is cancelled, work still queued in the pool is cancelled;
+    a request already in flight finishes in its worker and, for top movers, still
+    warms the shared snapshot cache for the next caller.
+    """
+
+    def __init__(self, service: ScreenerService, max_workers: int = 8, timeout: float = 15.0):
+        self.service = service
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Created lazily so the facade can be reused after an application restart
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="screener")
+        return self._executor
+
+    async def _run(self, func, *args, timeout: Optional[float] = None, **kwargs):
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._get_executor(), functools.partial(func, *args, **kwargs))
+        try:
+            return await asyncio.wait_for(future, timeout if timeout is not None else self.timeout)
+        except asyncio.TimeoutError:
+            name = getattr(func, "__name__", "call")
+            raise TimeoutError(f"Screener {name} timed out") from None
+
+    async def get_top_movers(self, limit: int = 50, interval: str = "1D", sort_descending: bool = True,
+                             strict: bool = False, timeout: Optional[float] = None):
+        return await self._run(
+            self.service.get_top_movers,
+            limit=limit, interval=interval, sort_descending=sort_descending, strict=strict, timeout=timeout
+        )
+
+    async def get_movers_batch(self, intervals: list[str], limit: int = 50, strict: bool = False,
+                               timeout: Optional[float] = None):
+        return await self._run(self.service.get_movers_batch, intervals, limit=limit, strict=strict, timeout=timeout)
+
+    async def query_movers(self, timeout: Optional[float] = None, **query):
+        return await self._run(self.service.query_movers, timeout=timeout, **query)
+
+    async def screen(self, timeout: Optional[float] = None, **query):
+        return await self._run(self.service.screen, timeout=timeout, **query)
+
+    async def get_divergences(self, timeout: Optional[float] = None, **query):
+        return await self._run(self.service.get_divergences, timeout=timeout, **query)
+
+    async def get_assets_by_symbols(self, symbols: list[str], interval: str = "1D", strict: bool = False,
+                                    timeout: Optional[float] = None):
+        return await self._run(self.service.get_assets_by_symbols, symbols, interval, strict=strict, timeout=timeout)
+
+    async def search_ticker(self, query: str, timeout: Optional[float] = None):
+        return await self._run(self.service.search_ticker, query, timeout=timeout)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,34 @@
+from typing import Iterable, NamedTuple, Optional
+
+from app.services.divergence import INTERVALS as DIVERGENCE_INTERVALS
+
+# What every client sees without subscribing; also the only feed of plain /ws clients
+DEFAULT_CHANNEL = "movers:1D:desc"
+
+
+class Channel(NamedTuple):
+    kind: str  # "movers", "favorites" or "divergence"
+    interval: str
+    descending: bool = True
+
+
+class ChannelData(NamedTuple):
+    """Rows of a channel plus the metadata published along with them."""
+    rows: list
+    meta: Optional[dict] = None
+
+
+def parse_channel(name: str, intervals: Iterable[str]) -> Channel:
+    """
+    Parses "movers:<interval>:<asc|desc>", "favorites:<interval>" and
+    "divergence:<interval>" (divergence windows exist for a few intervals only).
+    Raises ValueError for anything else.
+    """
+    parts = name.split(":") if isinstance(name, str) else []
+    if len(parts) == 3 and parts[0] == "movers" and parts[1] in intervals and parts[2] in ("asc", "desc"):
+        return Channel("movers", parts[1], parts[2] == "desc")
+    if len(parts) == 2 and parts[0] == "favorites" and parts[1] in intervals:
+        return Channel("favorites", parts[1])
+    if len(parts) == 2 and parts[0] == "divergence" and parts[1] in intervals and parts[1] in DIVERGENCE_INTERVALS:
+        return Channel("divergence", parts[1])
+    raise ValueError(f"Unknown channel: {name}")
@@ -1,12 +1,20 @@
 from tvscreener import CryptoScreener, CryptoField
 from tvscreener.field import FieldWithInterval, FieldWithHistory
-from sqlmodel import Session, select
-from app.models import Favorite, MarketDataHistory
+from tvscreener.exceptions import MalformedRequestException
+from sqlmodel import Session, select, delete
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app.models import Favorite, MarketDataHistory, HISTORY_INDICATORS
 from app.database import engine
+from app.services.indicators import indicator_engine
 from datetime import datetime, timezone, timedelta
-import json
-import asyncio
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 import pandas as pd
+import numpy as np
+import requests
+from typing import Optional
 
 # Monkeypatch tvscreener bug
 def has_recommendation(self):
@@ -14,6 +22,31 @@ def has_recommendation(self):
 FieldWithInterval.has_recommendation = has_recommendation
 FieldWithHistory.has_recommendation = has_recommendation
 
+# HTTP statuses worth retrying: timeouts, rate limiting and server errors.
+# tvscreener reports network errors as status 0 and timeouts as 408.
+TRANSIENT_STATUSES = {0, 408, 425, 429}
+_STATUS = re.compile(r"^Error: (\d+):")
+
+def is_transient(error: Exception) -> bool:
+    """Whether a screener failure is about the transport rather than the request's content."""
+    if isinstance(error, (requests.RequestException, TimeoutError, ConnectionError)):
+        return True
+    if isinstance(error, MalformedRequestException):
+        match = _STATUS.match(str(error))
+        if match:
+            status = int(match.group(1))
+            return status in TRANSIENT_STATUSES or status >= 500
+    return False
+
+
+class CollectorUpstreamError(RuntimeError):
+    """A collection cycle was abandoned because the screener upstream is failing."""
+
+    def __init__(self, message: str, report: dict):
+        super().__init__(message)
+        self.report = report
+
+
 class CollectorService:
     def __init__(self):
         # Only use intervals that are reliably supported by the Screener API
@@ -26,6 +59,19 @@ class CollectorService:
             "SMA50": CryptoField.SIMPLE_MOVING_AVERAGE_50,
             "SMA200": CryptoField.SIMPLE_MOVING_AVERAGE_200
         }
+        # History retention: 6 months (approx) + 1 day unless an interval overrides it,
+        # e.g. {"5": timedelta(days=14), "1D": timedelta(days=5 * 365)}
+        self.default_retention = timedelta(days=181)
+        self.retention = {}
+        self.purge_batch_size = 5000
+        # Upstream requests carry at most batch_size symbols (each row has ~80
+        # interval fields); up to batch_concurrency batches are in flight at once.
+        self.batch_size = 50
+        self.batch_concurrency = 4
+        # Per-batch retries, waiting retry_backoff * 2**attempt seconds between them
+        self.batch_retries = 2
+        self.retry_backoff = 1.0
+        self._fields = None
 
     def _round_timestamp(self, dt: datetime, interval: str) -> datetime:
         """
@@ -69,139 +115,280 @@ class CollectorService:
         except (ValueError, TypeError):
             return None
 
-    def collect_symbols(self, symbols: list):
+    def collect_symbols(self, symbols: list) -> dict:
         """
         Collects data for a specific list of symbols across all intervals.
+
+        Symbols are fetched in batches of at most batch_size, batch_concurrency
+        at a time. A batch rejected for its content (a bad symbol, an oversized
+        payload) is split in halves until the offending symbols are isolated,
+        so they only lose themselves; that happens only while some other batch
+        gets through. Transport failures (network, timeouts, 429, 5xx) are
+        retried with backoff, never split. Everything fetched is merged and
+        stored in one upsert.
+
+        Returns the per-batch latencies and the symbols that could not be
+        fetched. Raises CollectorUpstreamError (after storing what was
+        fetched) when the upstream is unreachable or rejects every batch, so
+        the scheduler backs off instead of retrying at full rate.
         """
+        report = {"symbols": len(symbols), "stored": 0, "failed": [], "batches": [], "seconds": 0.0}
         if not symbols:
-            return
+            return report
 
         print(f"Collector: Fetching data for {len(symbols)} symbols...")
-        with Session(engine) as session:
-            # We'll fetch in batches if there are many symbols, but for now just all
-            cs = CryptoScreener()
-            # Directly target specific tickers
-            cs.symbols = {"tickers": symbols}
-            
-            # To get all intervals in one request for many tickers, the payload grows.
-            fields = [CryptoField.NAME, CryptoField.PRICE, CryptoField.EXCHANGE]
-            
-            for interval in self.intervals:
-                # 1D is handled as base fields in tvscreener usually, 
-                # but we'll try to explicitly request it with interval if it's not the base.
-                # Actually, for 1D, we can just use the base fields.
-                if interval == "1D":
-                    fields.append(CryptoField.OPEN)
-                    fields.append(CryptoField.HIGH)
-                    fields.append(CryptoField.LOW)
-                    fields.append(CryptoField.VOLUME)
-                    for name, ind in self.indicators.items():
-                        fields.append(ind)
-                    continue
-
-                # Minutes/Weeks/Months
-                f_open = CryptoField.OPEN.with_interval(interval)
-                f_open.historical = False
-                fields.append(f_open)
-                
-                f_high = CryptoField.HIGH.with_interval(interval)
-                f_high.highstorical = False
-                fields.append(f_high)
-                
-                f_low = CryptoField.LOW.with_interval(interval)
-                f_low.historical = False
-                fields.append(f_low)
-                
-                f_vol = CryptoField.VOLUME.with_interval(interval)
-                f_vol.historical = False
-                fields.append(f_vol)
-
-                # For Price (Close)
-                f_close = CryptoField.PRICE.with_interval(interval)
-                f_close.historical = False
-                fields.append(f_close)
-
-                for name, ind in self.indicators.items():
-                    f_ind = ind.with_interval(interval)
-                    f_ind.historical = False
-                    fields.append(f_ind)
-
-            cs.select(*fields)
-            cs.set_range(0, 1000)
-            
+        started = time.perf_counter()
+        # The candle the values belong to is the one open when the cycle starts;
+        # a slow fetch must not push them into the next candle's row
+        now = datetime.now(timezone.utc)
+        frames = []
+        batches = [symbols[i:i + self.batch_size] for i in range(0, len(symbols), self.batch_size)]
+        workers = max(1, min(self.batch_concurrency, len(batches)))
+        abort = None
+        any_ok = False
+        # Rejected top-level batches wait here until some batch succeeds; with a
+        # single batch there is nothing to wait for
+        deferred = []
+        # Set by the first batch that gives up on the transport; queued batches then skip their request
+        upstream_down = threading.Event()
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="collector") as pool:
+            pending = {pool.submit(self._fetch_batch, batch, upstream_down): batch for batch in batches}
+
+            def bisect(batch):
+                middle = len(batch) // 2
+                for half in (batch[:middle], batch[middle:]):
+                    pending[pool.submit(self._fetch_batch, half, upstream_down)] = half
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    batch = pending.pop(future)
+                    df, stats = (None, None) if future.cancelled() else future.result()
+                    if stats is None:
+                        # Never sent: the upstream was already down
+                        report["failed"].extend(batch)
+                        continue
+                    report["batches"].append(stats)
+                    if df is not None:
+                        frames.append(df)
+                        any_ok = True
+                    elif stats["transient"] or abort:
+                        if abort is None:
+                            abort = f"upstream unavailable: {stats['error']}"
+                            # Queued batches would hit the same wall
+                            for other in pending:
+                                other.cancel()
+                        report["failed"].extend(batch)
+                    elif len(batch) > 1 and (any_ok or len(batches) == 1):
+                        bisect(batch)
+                    elif len(batch) > 1:
+                        deferred.append(batch)
+                    else:
+                        report["failed"].extend(batch)
+                if deferred and any_ok and abort is None:
+                    for batch in deferred:
+                        bisect(batch)
+                    deferred = []
+        if deferred:
+            report["failed"].extend(symbol for batch in deferred for symbol in batch)
+            abort = abort or f"every batch was rejected: {report['batches'][-1]['error']}"
+
+        latencies = [b["seconds"] for b in report["batches"]]
+        if latencies:
+            print(
+                f"Collector: {len(report['batches'])} batches, "
+                f"latency avg {sum(latencies) / len(latencies):.2f}s max {max(latencies):.2f}s"
+                + (f", failed symbols: {report['failed']}" if report["failed"] else "")
+            )
+
+        if frames:
+            with Session(engine) as session:
+                try:
+                    records = self._build_history_records(pd.concat(frames, ignore_index=True), symbols, now)
+                    self._upsert_history(session, records)
+                    session.commit()
+                    # Keep the locally computed indicator series of cached symbols current
+                    indicator_engine.observe(records)
+                    report["stored"] = len(records)
+                    print(f"Collector: Sync complete for {len(symbols) - len(report['failed'])} symbols.")
+                except Exception as e:
+                    print(f"Collector Error: {e}")
+        report["seconds"] = time.perf_counter() - started
+        if abort is not None:
+            raise CollectorUpstreamError(abort, report)
+        return report
+
+    def _fetch_batch(self, batch: list, upstream_down: Optional[threading.Event] = None) -> tuple:
+        """
+        Fetches one batch. Transport failures are retried with exponential
+        backoff; a rejected request is not, since it would fail the same way.
+        Giving up on the transport sets `upstream_down`, and a batch finding
+        it set sends nothing more. Never raises: returns (frame restricted to
+        the batch's symbols or None, stats), stats["transient"] telling the
+        two failures apart, or (None, None) when nothing was sent.
+        """
+        started = time.perf_counter()
+        error = None
+        attempts = 0
+        for attempt in range(self.batch_retries + 1):
+            if upstream_down is not None and upstream_down.is_set():
+                if attempts == 0:
+                    return None, None
+                break
+            attempts = attempt + 1
             try:
+                cs = CryptoScreener()
+                # Directly target specific tickers
+                cs.symbols = {"tickers": batch}
+                cs.select(*self._request_fields())
+                cs.set_range(0, len(batch))
                 df = cs.get()
-                now = datetime.now(timezone.utc)
-                
-                for _, row in df.iterrows():
-                    symbol = row.get('Symbol')
-                    if symbol not in symbols:
-                        continue
-                    
-                    for interval in self.intervals:
-                        rounded_ts = self._round_timestamp(now, interval)
-                        
-                        # Labels are different for 1D vs others
-                        indicators_data = {}
-                        if interval == "1D":
-                            for name, ind in self.indicators.items():
-                                indicators_data[name] = self._sanitize_val(row.get(ind.label))
-                            
-                            o = row.get("Open")
-                            h = row.get("High")
-                            l = row.get("Low")
-                            c = row.get("Price")
-                            v = row.get("Volume")
-                        else:
-                            for name, ind in self.indicators.items():
-                                label = f"{ind.label} ({interval})"
-                                indicators_data[name] = self._sanitize_val(row.get(label))
-                            
-                            o = row.get(f"Open ({interval})")
-                            h = row.get(f"High ({interval})")
-                            l = row.get(f"Low ({interval})")
-                            c = row.get(f"Price ({interval})")
-                            v = row.get(f"Volume ({interval})")
-
-                        # Check if record exists
-                        statement = select(MarketDataHistory).where(
-                            MarketDataHistory.symbol == symbol,
-                            MarketDataHistory.interval == interval,
-                            MarketDataHistory.timestamp == rounded_ts
-                        )
-                        record = session.exec(statement).first()
-                        
-                        if not record:
-                            record = MarketDataHistory(
-                                symbol=symbol,
-                                interval=interval,
-                                timestamp=rounded_ts
-                            )
-                            session.add(record)
-                        
-                        # Update OHLCV
-                        record.open = self._sanitize_val(o)
-                        record.high = self._sanitize_val(h)
-                        record.low = self._sanitize_val(l)
-                        record.close = self._sanitize_val(c)
-                        record.volume = self._sanitize_val(v)
-                        record.indicators_json = json.dumps(indicators_data)
-                
-                session.commit()
-                print(f"Collector: Sync complete for {len(symbols)} symbols.")
+                if "Symbol" in df.columns:
+                    df = df[df["Symbol"].isin(batch)]
+                stats = {"symbols": len(batch), "attempts": attempts, "ok": True,
+                         "seconds": time.perf_counter() - started}
+                return df, stats
             except Exception as e:
-                print(f"Collector Error: {e}")
+                error = e
+                if not is_transient(e) or attempt == self.batch_retries:
+                    break
+                delay = self.retry_backoff * (2 ** attempt)
+                print(f"Collector: batch of {len(batch)} failed ({e}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+        print(f"Collector Error: batch {batch[0]}..{batch[-1]} ({len(batch)} symbols) failed: {error}")
+        if upstream_down is not None and is_transient(error):
+            upstream_down.set()
+        stats = {"symbols": len(batch), "attempts": attempts, "ok": False, "transient": is_transient(error),
+                 "seconds": time.perf_counter() - started, "error": str(error)}
+        return None, stats
+
+    def _request_fields(self) -> list:
+        """
+        Every interval's OHLCV and indicator fields; built once and shared by
+        all batches.
+        """
+        if self._fields is not None:
+            return self._fields
+        fields = [CryptoField.NAME, CryptoField.PRICE, CryptoField.EXCHANGE]
+        for interval in self.intervals:
+            # 1D is handled as base fields in tvscreener
+            if interval == "1D":
+                fields.extend([CryptoField.OPEN, CryptoField.HIGH, CryptoField.LOW, CryptoField.VOLUME])
+                fields.extend(self.indicators.values())
+                continue
+
+            # Minutes/Weeks/Months; Price is the interval's close
+            for base in [CryptoField.OPEN, CryptoField.HIGH, CryptoField.LOW, CryptoField.VOLUME,
+                         CryptoField.PRICE, *self.indicators.values()]:
+                field = base.with_interval(interval)
+                field.historical = False
+                fields.append(field)
+        self._fields = fields
+        return fields
+
+    def _interval_columns(self, interval: str) -> dict:
+        """
+        Maps MarketDataHistory columns (and indicator names) to the screener
+        DataFrame labels holding their values for one interval.
+        """
+        # Labels are different for 1D vs others
+        if interval == "1D":
+            columns = {"open": "Open", "high": "High", "low": "Low", "close": "Price", "volume": "Volume"}
+            columns.update({name: ind.label for name, ind in self.indicators.items()})
+        else:
+            columns = {
+                "open": f"Open ({interval})", "high": f"High ({interval})", "low": f"Low ({interval})",
+                "close": f"Price ({interval})", "volume": f"Volume ({interval})"
+            }
+            columns.update({name: f"{ind.label} ({interval})" for name, ind in self.indicators.items()})
+        return columns
 
-    def purge_old_data(self):
+    def _build_history_records(self, df: pd.DataFrame, symbols: list, now: datetime) -> list[dict]:
         """
-        Deletes data older than 6 months + 1 day.
+        Reshapes the wide screener frame (one row per symbol, one column per
+        interval field) into long (symbol, interval, timestamp) rows ready for
+        a bulk upsert.
+        """
+        if df.empty or "Symbol" not in df.columns:
+            return []
+        df = df[df["Symbol"].isin(symbols)]
+        if df.empty:
+            return []
+
+        parts = []
+        for interval in self.intervals:
+            # Missing or non-numeric values become NaN, mirroring _sanitize_val
+            part = pd.DataFrame({
+                column: pd.to_numeric(df[label], errors="coerce").to_numpy(dtype=float)
+                if label in df.columns else np.full(len(df), np.nan)
+                for column, label in self._interval_columns(interval).items()
+            })
+            part.insert(0, "symbol", df["Symbol"].to_numpy())
+            part.insert(1, "interval", interval)
+            part.insert(2, "timestamp", np.full(len(df), self._round_timestamp(now, interval), dtype=object))
+            parts.append(part)
+
+        long_df = pd.concat(parts, ignore_index=True)
+        long_df = long_df.astype(object).where(long_df.notna(), None)
+
+        return long_df.rename(columns=HISTORY_INDICATORS).to_dict(orient="records")
+
+    def _upsert_history(self, session: Session, records: list[dict]):
         """
-        cutoff = datetime.now(timezone.utc) - timedelta(days=181) # 6 months (approx) + 1 day
-        print(f"Collector: Purging data older than {cutoff}")
+        Writes all rows of a cycle as one INSERT ... ON CONFLICT DO UPDATE batch
+        against the (symbol, interval, timestamp) unique index.
+        """
+        if not records:
+            return
+        stmt = sqlite_insert(MarketDataHistory)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["symbol", "interval", "timestamp"],
+            set_={
+                column: stmt.excluded[column]
+                for column in ("open", "high", "low", "close", "volume", *HISTORY_INDICATORS.values())
+            }
+        )
+        session.execute(stmt, records)
+
+    def purge_old_data(self, retention: dict = None, batch_size: int = None) -> dict:
+        """
+        Deletes expired history in bounded batches, committing after each one
+        so the write lock is only held briefly.
+
+        Intervals listed in `retention` (interval -> timedelta) keep their own
+        window; everything else keeps the default 6 months + 1 day.
+        Returns deleted row counts per policy and the elapsed time.
+        """
+        retention = self.retention if retention is None else retention
+        batch_size = batch_size or self.purge_batch_size
+        now = datetime.now(timezone.utc)
+
+        policies = [
+            (interval, MarketDataHistory.interval == interval, now - keep)
+            for interval, keep in retention.items()
+        ]
+        policies.append(("default", MarketDataHistory.interval.not_in(list(retention)), now - self.default_retention))
+
+        started = time.perf_counter()
+        counts = {}
         with Session(engine) as session:
-            statement = select(MarketDataHistory).where(MarketDataHistory.timestamp < cutoff)
-            results = session.exec(statement).all()
-            for r in results:
-                session.delete(r)
-            session.commit()
-            print(f"Collector: Purged {len(results)} records.")
+            for name, interval_clause, cutoff in policies:
+                print(f"Collector: Purging {name} data older than {cutoff}")
+                expired = select(MarketDataHistory.id).where(
+                    interval_clause,
+                    MarketDataHistory.timestamp < cutoff
+                ).limit(batch_size)
+                statement = delete(MarketDataHistory).where(MarketDataHistory.id.in_(expired))
+
+                counts[name] = 0
+                while True:
+                    deleted = session.exec(statement).rowcount
+                    session.commit()
+                    counts[name] += deleted
+                    if deleted < batch_size:
+                        break
+
+        elapsed = time.perf_counter() - started
+        total = sum(counts.values())
+        print(f"Collector: Purged {total} records in {elapsed:.2f}s ({counts}).")
+        return {"deleted": total, "by_interval": counts, "seconds": elapsed}
@@ -0,0 +1,176 @@
+import threading
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.services.ohlcv import BUCKET_SECONDS, bucket_numbers
+
+KINDS = ("bullish", "bearish")
+WINDOW_BARS = 30
+# Windows fill from live universe snapshots only, one bar per interval (there
+# is no stored history for the whole universe), so only intervals whose full
+# window fills within this many seconds are scanned
+MAX_FILL_SECONDS = 2 * 86400
+INTERVALS = tuple(i for i, width in BUCKET_SECONDS.items() if width * WINDOW_BARS <= MAX_FILL_SECONDS)
+
+
+def detect(close: np.ndarray, rsi: np.ndarray, recent: int = 3, min_gap: float = 2.0) -> Dict[str, np.ndarray]:
+    """
+    Price-vs-RSI divergences of many symbols at once. `close` and `rsi` are
+    (symbols, bars) matrices, oldest bar first, NaN where a bar is missing.
+
+    The newest `recent` bars are compared with the bars before them: a
+    bullish divergence is a lower low in price with an RSI low at least
+    `min_gap` points higher, a bearish one a higher high with an RSI high at
+    least `min_gap` points lower. The earlier extreme must be a swing, i.e.
+    price moved back above (below) it before the recent bars. Returns
+    per-symbol arrays: "kind" (0 none, 1 bullish, 2 bearish), "strength"
+    (RSI gap), the price and RSI of both extremes and the bars between them.
+    """
+    close = np.asarray(close, dtype=float)
+    rsi = np.asarray(rsi, dtype=float)
+    n, bars = close.shape
+    split = bars - recent
+    rows = np.arange(n)
+    valid = ~np.isnan(close) & ~np.isnan(rsi)
+
+    def extremes(sign):
+        # sign=+1 finds lows, -1 highs, as minima of sign * close
+        value = np.where(valid, sign * close, np.inf)
+        prior = np.argmin(value[:, :split], axis=1)
+        latest = split + np.argmin(value[:, split:], axis=1)
+        found = np.isfinite(value[rows, prior]) & np.isfinite(value[rows, latest])
+        # Best value strictly after each prior bar, up to the recent bars (a swing leaves the extreme)
+        swing_value = np.where(valid[:, :split], sign * close[:, :split], -np.inf)
+        after = np.maximum.accumulate(swing_value[:, ::-1], axis=1)[:, ::-1]
+        after = np.concatenate([after[:, 1:], np.full((n, 1), -np.inf)], axis=1)
+        swing = after[rows, prior] > value[rows, prior]
+        return prior, latest, found & swing
+
+    with np.errstate(invalid="ignore"):
+        low_prior, low_latest, low_ok = extremes(1.0)
+        high_prior, high_latest, high_ok = extremes(-1.0)
+        bull_gap = rsi[rows, low_latest] - rsi[rows, low_prior]
+        bear_gap = rsi[rows, high_prior] - rsi[rows, high_latest]
+        bullish = low_ok & (close[rows, low_latest] < close[rows, low_prior]) & (bull_gap >= min_gap)
+        bearish = high_ok & (close[rows, high_latest] > close[rows, high_prior]) & (bear_gap >= min_gap)
+
+    # A symbol diverging both ways keeps the stronger signal
+    pick_bear = bearish & (~bullish | (bear_gap > bull_gap))
+    kind = np.where(pick_bear, 2, np.where(bullish, 1, 0))
+    prior = np.where(pick_bear, high_prior, low_prior)
+    latest = np.where(pick_bear, high_latest, low_latest)
+    return {
+        "kind": kind,
+        "strength": np.where(pick_bear, bear_gap, bull_gap),
+        "prior_price": close[rows, prior],
+        "prior_rsi": rsi[rows, prior],
+        "pivot_price": close[rows, latest],
+        "pivot_rsi": rsi[rows, latest],
+        "bars_apart": latest - prior,
+    }
+
+
+class DivergenceWindow:
+    """
+    Rolling (symbols x bars) matrices of close and RSI for one interval,
+    filled from successive universe snapshots. Every snapshot overwrites the
+    newest column while its bar is forming; a snapshot in a later bar shifts
+    the window (missed bars stay NaN). Symbols with no data left in the
+    window are dropped when it shifts. Scans run on the whole matrix at once.
+    """
+
+    def __init__(self, interval: str, bars: int = WINDOW_BARS, recent: int = 3, min_gap: float = 2.0):
+        self.interval = interval
+        self.bars = bars
+        self.recent = recent
+        self.min_gap = min_gap
+        self.bar: Optional[int] = None
+        self.fed_at: Optional[float] = None
+        self._index: Dict[str, int] = {}
+        self._symbols: List[str] = []
+        self._records: List[dict] = []
+        self.close = np.full((0, bars), np.nan)
+        self.rsi = np.full((0, bars), np.nan)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._symbols)
+
+    @property
+    def filled(self) -> int:
+        """Bars of the window holding any data; scans need more than `recent` to find anything."""
+        with self._lock:
+            return int(np.count_nonzero(~np.all(np.isnan(self.close), axis=0))) if self._symbols else 0
+
+    def observe(self, symbols: Sequence[str], close: np.ndarray, rsi: np.ndarray,
+                records: Sequence[dict], now: float):
+        """Writes one snapshot (aligned arrays of the universe) taken at epoch time `now`."""
+        bar = int(bucket_numbers([int(now)], self.interval)[0])
+        with self._lock:
+            if self.bar is not None and bar < self.bar:
+                return
+            if self.bar is not None and bar > self.bar:
+                self._shift(bar - self.bar)
+            self.bar = bar
+            self.fed_at = now
+
+            added = [s for s in dict.fromkeys(symbols) if s not in self._index]
+            if added:
+                for symbol in added:
+                    self._index[symbol] = len(self._symbols)
+                    self._symbols.append(symbol)
+                    self._records.append({})
+                padding = np.full((len(added), self.bars), np.nan)
+                self.close = np.vstack([self.close, padding])
+                self.rsi = np.vstack([self.rsi, padding])
+
+            rows = np.fromiter((self._index[s] for s in symbols), dtype=np.int64, count=len(symbols))
+            self.close[rows, -1] = close
+            self.rsi[rows, -1] = rsi
+            for row, record in zip(rows.tolist(), records):
+                self._records[row] = record
+
+    def _shift(self, elapsed: int):
+        elapsed = min(elapsed, self.bars)
+        for name in ("close", "rsi"):
+            matrix = getattr(self, name)
+            shifted = np.full_like(matrix, np.nan)
+            shifted[:, :self.bars - elapsed] = matrix[:, elapsed:]
+            setattr(self, name, shifted)
+        keep = np.flatnonzero(~np.all(np.isnan(self.close), axis=1))
+        if len(keep) < len(self._symbols):
+            self.close, self.rsi = self.close[keep], self.rsi[keep]
+            self._symbols = [self._symbols[i] for i in keep.tolist()]
+            self._records = [self._records[i] for i in keep.tolist()]
+            self._index = {symbol: i for i, symbol in enumerate(self._symbols)}
+
+    def scan(self, kind: Optional[str] = None, limit: int = 50) -> List[dict]:
+        """
+        Current divergences, strongest first, as the symbols' latest rows
+        plus "Divergence" (bullish/bearish), "Divergence Strength" (RSI
+        gap), the prior and pivot price/RSI and "Bars Apart".
+        """
+        if kind is not None and kind not in KINDS:
+            raise ValueError(f"Unknown divergence kind: {kind}")
+        with self._lock:
+            if not self._symbols or limit <= 0:
+                return []
+            found = detect(self.close, self.rsi, self.recent, self.min_gap)
+            records = self._records
+        wanted = found["kind"] > 0 if kind is None else found["kind"] == KINDS.index(kind) + 1
+        rows = np.flatnonzero(wanted)
+        rows = rows[np.argsort(-found["strength"][rows], kind="stable")][:limit]
+        return [
+            {
+                **records[i],
+                "Divergence": KINDS[found["kind"][i] - 1],
+                "Divergence Strength": float(found["strength"][i]),
+                "Prior Price": float(found["prior_price"][i]),
+                "Prior RSI": float(found["prior_rsi"][i]),
+                "Pivot Price": float(found["pivot_price"][i]),
+                "Pivot RSI": float(found["pivot_rsi"][i]),
+                "Bars Apart": int(found["bars_apart"][i]),
+            }
+            for i in rows.tolist()
+        ]
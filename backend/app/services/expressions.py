@@ -0,0 +1,192 @@
+import ast
+import operator
+from functools import lru_cache, reduce
+from typing import Callable, FrozenSet, Mapping
+
+import numpy as np
+
+from app.services.fields import VOLUME_USD_COLUMN
+
+# Expression variables and the display columns they read. "volume" is the
+# interval's volume in base-asset units, "volume_usd" the 24h volume in USD.
+NUMERIC_VARIABLES = {
+    "price": "Price",
+    "change": "Change %",
+    "volume": "Volume",
+    "volume_usd": VOLUME_USD_COLUMN,
+    "rsi": "Relative Strength Index (14)",
+    "macd": "MACD Level (12, 26)",
+    "macd_signal": "MACD Signal (12, 26)",
+    "sma20": "Simple Moving Average (20)",
+    "sma50": "Simple Moving Average (50)",
+    "sma200": "Simple Moving Average (200)",
+}
+# Compared case-insensitively: columns and literals are upper-cased
+TEXT_VARIABLES = {
+    "exchange": "Exchange",
+    "symbol": "Symbol",
+}
+MAX_EXPRESSION_LENGTH = 500
+
+_ARITHMETIC = {ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul, ast.Div: operator.truediv}
+_ORDERING = {ast.Lt: operator.lt, ast.LtE: operator.le, ast.Gt: operator.gt, ast.GtE: operator.ge}
+_EQUALITY = {ast.Eq: operator.eq, ast.NotEq: operator.ne}
+
+
+class ExpressionError(ValueError):
+    """An expression that does not parse or uses something outside the grammar."""
+
+
+class Expression:
+    """
+    A compiled screener expression: a tree of NumPy operations over a dict of
+    column arrays. `kind` is "bool" for filters and "number" for sort keys.
+    """
+
+    def __init__(self, text: str, func: Callable[[Mapping[str, np.ndarray]], object], kind: str,
+                 variables: FrozenSet[str]):
+        self.text = text
+        self.kind = kind
+        self.variables = variables
+        self._func = func
+
+    def evaluate(self, columns: Mapping[str, np.ndarray], size: int) -> np.ndarray:
+        """Evaluates over `size` rows; constant expressions are broadcast."""
+        with np.errstate(all="ignore"):
+            result = np.asarray(self._func(columns))
+        return np.broadcast_to(result, (size,)) if result.ndim == 0 else result
+
+    def __repr__(self):
+        return f"Expression({self.text!r}, kind={self.kind!r})"
+
+
+@lru_cache(maxsize=256)
+def compile_expression(text: str) -> Expression:
+    """
+    Compiles e.g. "rsi < 30 and change > 0 and volume > 1e6" or
+    "macd - macd_signal". Supported: numbers, string literals, the variables
+    above, + - * /, comparisons (chained too), ==/!= and in/not in against
+    literal lists, and/or/not, parentheses. Compiled once per distinct text.
+    """
+    if not isinstance(text, str) or not text.strip():
+        raise ExpressionError("Expression is empty")
+    if len(text) > MAX_EXPRESSION_LENGTH:
+        raise ExpressionError(f"Expression is longer than {MAX_EXPRESSION_LENGTH} characters")
+    try:
+        tree = ast.parse(text.strip(), mode="eval")
+    except SyntaxError as e:
+        raise ExpressionError(f"Invalid expression: {e.msg}") from None
+    variables = set()
+    func, kind = _compile(tree.body, variables)
+    return Expression(text, func, kind, frozenset(variables))
+
+
+def compile_filter(text: str) -> Expression:
+    expression = compile_expression(text)
+    if expression.kind != "bool":
+        raise ExpressionError(f"Filter must be a condition: {text}")
+    return expression
+
+
+def compile_sort(text: str) -> Expression:
+    expression = compile_expression(text)
+    if expression.kind != "number":
+        raise ExpressionError(f"Sort must be a numeric expression: {text}")
+    return expression
+
+
+def _expect(kind: str, expected: str, node: ast.AST):
+    if kind != expected:
+        raise ExpressionError(f"Expected a {expected} at column {node.col_offset + 1}, got a {kind}")
+
+
+def _compile(node: ast.AST, variables: set):
+    if isinstance(node, ast.Constant):
+        value = node.value
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return (lambda columns: value), "number"
+        if isinstance(value, str):
+            text = value.upper()
+            return (lambda columns: text), "text"
+
+    elif isinstance(node, ast.Name):
+        name = node.id
+        if name in NUMERIC_VARIABLES or name in TEXT_VARIABLES:
+            variables.add(name)
+            return (lambda columns: columns[name]), "number" if name in NUMERIC_VARIABLES else "text"
+        known = ", ".join(sorted({**NUMERIC_VARIABLES, **TEXT_VARIABLES}))
+        raise ExpressionError(f"Unknown variable '{name}' (known: {known})")
+
+    elif isinstance(node, ast.UnaryOp):
+        operand, kind = _compile(node.operand, variables)
+        if isinstance(node.op, ast.Not):
+            _expect(kind, "bool", node.operand)
+            return (lambda columns: np.logical_not(operand(columns))), "bool"
+        if isinstance(node.op, (ast.USub, ast.UAdd)):
+            _expect(kind, "number", node.operand)
+            if isinstance(node.op, ast.USub):
+                return (lambda columns: -operand(columns)), "number"
+            return operand, "number"
+
+    elif isinstance(node, ast.BinOp) and type(node.op) in _ARITHMETIC:
+        op = _ARITHMETIC[type(node.op)]
+        left, left_kind = _compile(node.left, variables)
+        right, right_kind = _compile(node.right, variables)
+        _expect(left_kind, "number", node.left)
+        _expect(right_kind, "number", node.right)
+        return (lambda columns: op(np.asarray(left(columns), dtype=float), right(columns))), "number"
+
+    elif isinstance(node, ast.BoolOp):
+        parts = []
+        for value in node.values:
+            func, kind = _compile(value, variables)
+            _expect(kind, "bool", value)
+            parts.append(func)
+        combine = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+        # Pairwise, so constant (0-d) parts broadcast against column arrays
+        return (lambda columns: reduce(combine, (part(columns) for part in parts))), "bool"
+
+    elif isinstance(node, ast.Compare):
+        checks = []
+        left_node = node.left
+        left, left_kind = _compile(left_node, variables)
+        for op, right_node in zip(node.ops, node.comparators):
+            if isinstance(op, (ast.In, ast.NotIn)):
+                checks.append(_compile_membership(left, left_kind, op, right_node))
+                # Membership ends a chain; nothing compares against a list
+                left, left_kind = None, "list"
+                continue
+            right, right_kind = _compile(right_node, variables)
+            if type(op) in _ORDERING:
+                _expect(left_kind, "number", left_node)
+                _expect(right_kind, "number", right_node)
+                checks.append(_binary(_ORDERING[type(op)], left, right))
+            elif type(op) in _EQUALITY and left_kind == right_kind and left_kind in ("number", "text"):
+                checks.append(_binary(_EQUALITY[type(op)], left, right))
+            else:
+                raise ExpressionError(f"Cannot compare {left_kind} with {right_kind} at column {node.col_offset + 1}")
+            left_node, left, left_kind = right_node, right, right_kind
+        if len(checks) == 1:
+            return checks[0], "bool"
+        return (lambda columns: reduce(np.logical_and, (check(columns) for check in checks))), "bool"
+
+    raise ExpressionError(f"Unsupported syntax: {type(node).__name__}")
+
+
+def _binary(op, left, right):
+    return lambda columns: op(left(columns), right(columns))
+
+
+def _compile_membership(left, left_kind, op, node):
+    if left_kind not in ("number", "text"):
+        raise ExpressionError(f"Cannot test a {left_kind} for membership")
+    if not isinstance(node, (ast.List, ast.Tuple, ast.Set)):
+        raise ExpressionError("'in' needs a literal list, e.g. exchange in ('OKX', 'BYBIT')")
+    values = []
+    for element in node.elts:
+        func, kind = _compile(element, set())
+        if not isinstance(element, ast.Constant) or kind != left_kind:
+            raise ExpressionError(f"'in' list must hold {left_kind} literals")
+        values.append(func({}))
+    invert = isinstance(op, ast.NotIn)
+    return lambda columns: np.isin(left(columns), values, invert=invert)
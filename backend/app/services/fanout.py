@@ -0,0 +1,89 @@
+import asyncio
+import json
+from typing import Callable, Optional
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+
+def encode_message(message: dict) -> str:
+    """Serializes a WebSocket message once so it can be fanned out as text."""
+    if orjson is not None:
+        return orjson.dumps(message, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+
+class ClientChannel:
+    """
+    Bounded outbound queue plus writer task for one WebSocket.
+
+    Producers only enqueue pre-encoded text, so a slow client never delays the
+    others. When the queue is full the `policy` decides: "drop_oldest" discards
+    the stalest pending message (delta clients then detect the sequence gap
+    and resync), "disconnect" closes the client. A send that fails or exceeds
+    `send_timeout` closes the client as well; `on_close` is called once so the
+    owner can forget the connection.
+    """
+
+    def __init__(self, websocket, maxsize: int = 32, send_timeout: float = 5.0,
+                 policy: str = "drop_oldest", on_close: Optional[Callable] = None):
+        if policy not in ("drop_oldest", "disconnect"):
+            raise ValueError(f"Unknown slow client policy: {policy}")
+        self.websocket = websocket
+        self.send_timeout = send_timeout
+        self.policy = policy
+        self.on_close = on_close
+        self.dropped = 0
+        self.closed = False
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.task = self.loop.create_task(self._writer())
+
+    def offer(self, text: str):
+        """Queues text for delivery; must be called on the connection's event loop."""
+        if self.closed:
+            return
+        if self.queue.full():
+            if self.policy == "disconnect":
+                self._fail("send queue full")
+                return
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(text)
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self.task.cancel()
+
+    async def _writer(self):
+        try:
+            while True:
+                text = await self.queue.get()
+                await asyncio.wait_for(self.websocket.send_text(text), self.send_timeout)
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            self._fail("send timed out")
+        except Exception as e:
+            self._fail(f"send failed: {e}")
+
+    def _fail(self, reason: str):
+        if self.closed:
+            return
+        print(f"WebSocket: dropping client ({reason})")
+        self.closed = True
+        if self.on_close is not None:
+            self.on_close(self.websocket)
+        self.loop.create_task(self._close_socket())
+        if asyncio.current_task() is not self.task:
+            self.task.cancel()
+
+    async def _close_socket(self):
+        try:
+            await self.websocket.close(code=1008)
+        except Exception:
+            pass
@@ -26,6 +26,8 @@ class FavoritesService:
             try:
                 from app.services.collector import CollectorService
                 collector = CollectorService()
+                # Don't hold the request on retries; the next scheduled cycle picks it up
+                collector.batch_retries = 0
                 # Run sync collection
                 collector.collect_symbols([symbol])
             except Exception as e:
@@ -1,39 +1,245 @@
-from sqlmodel import Session, select
-from app.models import Favorite, MarketDataHistory
+from sqlmodel import Session, select, func
+from sqlalchemy import Integer, cast, union_all
+from fastapi.responses import JSONResponse
+from app.models import Favorite, MarketDataHistory, HISTORY_INDICATORS
 from app.database import engine
+from app.services.indicators import indicator_engine
+from app.services.ohlcv import check_resample, ceil_time, floor_time, shift_time, resample, to_seconds, from_seconds
 from fastapi import APIRouter, Query, HTTPException
-from typing import List, Optional
-import json
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from itertools import groupby
+import numpy as np
 
 router = APIRouter(prefix="/favorites")
 
 @router.get("/history")
-async def get_favorite_history(
+def get_favorite_history(
     symbol: str = Query(...),
     interval: str = Query(...),
-    limit: int = Query(100)
+    limit: int = Query(100, ge=1, le=5000),
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    before: Optional[datetime] = Query(None),
+    resample_to: Optional[str] = Query(None, alias="resample")
 ):
     """
-    Returns historical OHLCV data for a specific favorite ticker and interval.
+    Returns historical OHLCV data for a specific favorite ticker and interval,
+    newest first. `from`/`to` bound the candle timestamps (inclusive); for the
+    next page pass the timestamp of the last candle received as `before`.
+    With `resample` (e.g. "60" or "240" over stored "5" candles) the candles
+    are aggregated server side and `limit` counts aggregated candles.
     """
+    start, end, before = _utc(start), _utc(end), _utc(before)
     with Session(engine) as session:
         # Verify it's a favorite
         fav_stmt = select(Favorite).where(Favorite.symbol == symbol)
         if not session.exec(fav_stmt).first():
             raise HTTPException(status_code=404, detail="Asset not in favorites")
 
-        statement = select(MarketDataHistory).where(
+        if resample_to and resample_to != interval:
+            try:
+                return read_resampled(session, symbol, interval, resample_to, limit, start, end, before)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+        return read_history(session, symbol, interval, limit, start, end, before)
+
+@router.get("/history/batch")
+def get_favorites_history_batch(
+    symbols: Optional[str] = Query(None),
+    intervals: str = Query("5"),
+    limit: int = Query(500, ge=1, le=5000),
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to")
+):
+    """
+    History of many favorites in one request, e.g.
+    ?symbols=BINANCE:BTCUSDT,BINANCE:ETHUSDT&intervals=5,60 (all favorites
+    when symbols is omitted), as columns: {"fields": [...], "series":
+    {symbol: {interval: {field: [...]}}}, "missing": [...]}. Each series
+    holds its newest `limit` candles, oldest first, timestamps in epoch seconds.
+    """
+    requested = [s.strip() for s in symbols.split(",") if s.strip()] if symbols else None
+    interval_list = [i.strip() for i in intervals.split(",") if i.strip()]
+    with Session(engine) as session:
+        favorites = select(Favorite.symbol)
+        if requested is not None:
+            favorites = favorites.where(Favorite.symbol.in_(requested))
+        known = set(session.exec(favorites).all())
+        found = [s for s in requested if s in known] if requested is not None else sorted(known)
+        series = read_history_batch(session, found, interval_list, limit, _utc(start), _utc(end))
+    missing = [s for s in requested if s not in known] if requested is not None else []
+    # The payload is plain lists of numbers already; skip jsonable_encoder's per-value walk
+    return JSONResponse({"fields": BATCH_FIELDS, "series": series, "missing": missing})
+
+@router.get("/indicators")
+def get_favorite_indicators(
+    symbol: str = Query(...),
+    interval: str = Query(...),
+    bars: int = Query(100, ge=1, le=5000)
+):
+    """
+    RSI, MACD and SMA series of a favorite computed locally from its stored
+    closes, as columns oldest first: {"timestamp": [...], "RSI": [...], ...}.
+    Unlike the indicators stored with each candle, any number of past bars is
+    available without extra upstream fields.
+    """
+    with Session(engine) as session:
+        fav_stmt = select(Favorite).where(Favorite.symbol == symbol)
+        if not session.exec(fav_stmt).first():
+            raise HTTPException(status_code=404, detail="Asset not in favorites")
+        series = indicator_engine.series(session, symbol, interval, bars)
+    return JSONResponse(series)
+
+# Candle fields returned as they are; indicators are nested under "indicators"
+HISTORY_FIELDS = ["id", "symbol", "timestamp", "interval", "open", "high", "low", "close", "volume"]
+OHLCV_FIELDS = ["open", "high", "low", "close", "volume"]
+
+def _utc(dt: Optional[datetime]) -> Optional[datetime]:
+    # Query parameters without an offset are taken as UTC, like every stored timestamp
+    if dt is not None and dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt
+
+def _in_range(statement, start: Optional[datetime], end: Optional[datetime], before: Optional[datetime]):
+    if start is not None:
+        statement = statement.where(MarketDataHistory.timestamp >= start)
+    if end is not None:
+        statement = statement.where(MarketDataHistory.timestamp <= end)
+    if before is not None:
+        statement = statement.where(MarketDataHistory.timestamp < before)
+    return statement
+
+def read_history(session: Session, symbol: str, interval: str, limit: int,
+                 start: Optional[datetime] = None, end: Optional[datetime] = None,
+                 before: Optional[datetime] = None) -> List[dict]:
+    """
+    The newest `limit` candles of a symbol and interval within the range,
+    newest first, selected as plain column tuples (no ORM objects or JSON
+    decoding). `before` is an exclusive keyset cursor on the timestamp, which
+    the (symbol, interval, timestamp) index serves without an OFFSET scan.
+    """
+    indicator_names = list(HISTORY_INDICATORS)
+    columns = [getattr(MarketDataHistory, name) for name in HISTORY_FIELDS]
+    columns += [getattr(MarketDataHistory, column) for column in HISTORY_INDICATORS.values()]
+    statement = select(*columns).where(
+        MarketDataHistory.symbol == symbol,
+        MarketDataHistory.interval == interval
+    )
+    statement = _in_range(statement, start, end, before)
+    statement = statement.order_by(MarketDataHistory.timestamp.desc()).limit(limit)
+
+    split = len(HISTORY_FIELDS)
+    history = []
+    for row in session.exec(statement):
+        data = dict(zip(HISTORY_FIELDS, row[:split]))
+        data["indicators"] = dict(zip(indicator_names, row[split:]))
+        history.append(data)
+    return history
+
+def read_resampled(session: Session, symbol: str, interval: str, target: str, limit: int,
+                   start: Optional[datetime] = None, end: Optional[datetime] = None,
+                   before: Optional[datetime] = None) -> List[dict]:
+    """
+    The newest `limit` `target` candles aggregated from the stored `interval`
+    candles, newest first. The range bounds apply to the aggregated candles'
+    start times, so the first and last buckets are always whole. Each candle
+    reports how many stored candles it was built from; indicators are not
+    carried over since they do not aggregate.
+    """
+    check_resample(interval, target)
+
+    # Exclusive upper bound on stored timestamps, at a target candle boundary
+    upper = None
+    if before is not None:
+        upper = ceil_time(before, target)
+    if end is not None:
+        after_end = shift_time(floor_time(end, target), target, 1)
+        upper = after_end if upper is None else min(upper, after_end)
+
+    newest_stmt = select(func.max(MarketDataHistory.timestamp)).where(
+        MarketDataHistory.symbol == symbol,
+        MarketDataHistory.interval == interval
+    )
+    if upper is not None:
+        newest_stmt = newest_stmt.where(MarketDataHistory.timestamp < upper)
+    newest = session.exec(newest_stmt).one()
+    if newest is None:
+        return []
+
+    # Only the stored candles of the `limit` newest target candles are read
+    lower = shift_time(floor_time(_utc(newest), target), target, -(limit - 1))
+    if start is not None:
+        lower = max(lower, ceil_time(start, target))
+
+    statement = select(MarketDataHistory.timestamp, *[getattr(MarketDataHistory, f) for f in OHLCV_FIELDS]).where(
+        MarketDataHistory.symbol == symbol,
+        MarketDataHistory.interval == interval,
+        MarketDataHistory.timestamp >= lower
+    )
+    if upper is not None:
+        statement = statement.where(MarketDataHistory.timestamp < upper)
+    rows = session.exec(statement.order_by(MarketDataHistory.timestamp)).all()
+    if not rows:
+        return []
+
+    timestamps, *values = zip(*rows)
+    seconds = np.fromiter((to_seconds(_utc(t)) for t in timestamps), dtype=np.int64, count=len(rows))
+    candles = resample(seconds, *(np.array(column, dtype=float) for column in values), target)
+
+    history = []
+    columns = [candles[field].tolist() for field in OHLCV_FIELDS]
+    counts = candles["candles"].tolist()
+    for i, bucket in enumerate(candles["timestamp"].tolist()):
+        data = {"symbol": symbol, "timestamp": from_seconds(bucket), "interval": target}
+        for field, column in zip(OHLCV_FIELDS, columns):
+            value = column[i]
+            data[field] = None if value != value else value
+        data["candles"] = counts[i]
+        history.append(data)
+    history.reverse()
+    return history[:limit]
+
+# Columns of a batch series, indicators under the names the single-symbol endpoint nests them by
+BATCH_FIELDS = ["timestamp", *OHLCV_FIELDS, *HISTORY_INDICATORS]
+# (symbol, interval) pairs per UNION ALL statement, under SQLite's 500 compound terms
+BATCH_PAIRS = 200
+
+def read_history_batch(session: Session, symbols: List[str], intervals: List[str], limit: int,
+                       start: Optional[datetime] = None, end: Optional[datetime] = None) -> Dict[str, Dict[str, dict]]:
+    """
+    The newest `limit` candles of every (symbol, interval) pair, as
+    {symbol: {interval: {field: [values, oldest first]}}}. Each pair is an
+    `ORDER BY timestamp DESC LIMIT` walk of the (symbol, interval, timestamp)
+    index, so the cost follows `limit` rather than the stored history; the
+    pairs are combined with UNION ALL into a few statements. Timestamps are
+    epoch seconds computed by SQLite; pairs without candles are left out.
+    """
+    if not symbols or not intervals:
+        return {}
+    seconds = cast(func.strftime("%s", MarketDataHistory.timestamp), Integer).label("seconds")
+    value_columns = [getattr(MarketDataHistory, f) for f in OHLCV_FIELDS]
+    value_columns += [getattr(MarketDataHistory, column) for column in HISTORY_INDICATORS.values()]
+
+    def latest(symbol, interval):
+        statement = select(
+            MarketDataHistory.symbol, MarketDataHistory.interval, MarketDataHistory.timestamp, seconds, *value_columns
+        ).where(
             MarketDataHistory.symbol == symbol,
             MarketDataHistory.interval == interval
-        ).order_by(MarketDataHistory.timestamp.desc()).limit(limit)
-        
-        results = session.exec(statement).all()
-        
-        history = []
-        for r in results:
-            data = r.model_dump()
-            if r.indicators_json:
-                data['indicators'] = json.loads(r.indicators_json)
-            history.append(data)
-            
-        return history
+        )
+        statement = _in_range(statement, start, end, None)
+        # A subquery, since SQLite only accepts ORDER BY/LIMIT on a whole compound
+        return select(statement.order_by(MarketDataHistory.timestamp.desc()).limit(limit).subquery())
+
+    pairs = [(symbol, interval) for symbol in symbols for interval in intervals]
+    series: Dict[str, Dict[str, dict]] = {}
+    for i in range(0, len(pairs), BATCH_PAIRS):
+        compound = union_all(*(latest(symbol, interval) for symbol, interval in pairs[i:i + BATCH_PAIRS]))
+        columns = compound.selected_columns
+        compound = compound.order_by(columns.symbol, columns.interval, columns.timestamp)
+        for (symbol, interval), group in groupby(session.exec(compound).all(), key=lambda row: (row[0], row[1])):
+            # Drop symbol, interval and the stored timestamp; keep epoch seconds and the values
+            values = list(zip(*group))[3:]
+            series.setdefault(symbol, {})[interval] = dict(zip(BATCH_FIELDS, map(list, values)))
+    return series
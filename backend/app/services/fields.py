@@ -0,0 +1,100 @@
+from importlib import metadata
+from types import MappingProxyType
+from typing import FrozenSet, Mapping, NamedTuple, Tuple
+
+from tvscreener import CryptoField
+
+# Frontend intervals and the TradingView suffix of their fields ("close|15");
+# the daily fields carry no suffix ("close").
+INTERVALS = MappingProxyType({
+    "1": "1", "5": "5", "15": "15", "60": "60", "120": "120", "240": "240",
+    "1D": "", "1W": "1W", "1M": "1M",
+})
+
+# Field roles of a bundle, in request order, and their TradingView columns
+ROLE_COLUMNS = MappingProxyType({
+    "price": "close",
+    "rsi": "RSI",
+    "change": "change",
+    "macd": "MACD.macd",
+    "macd_sig": "MACD.signal",
+    "sma20": "SMA20",
+    "sma50": "SMA50",
+    "sma200": "SMA200",
+    "volume": "volume",
+})
+
+IDENTITY_FIELDS = (CryptoField.NAME, CryptoField.EXCHANGE, CryptoField.DESCRIPTION)
+# Interval-independent fields only the universe snapshot requests, for filtering.
+# "volume" of a bundle is the interval's volume in base units; liquidity is
+# judged by the 24h volume in USD like the universe's own threshold.
+UNIVERSE_FIELDS = (CryptoField.VOLUME_24H_IN_USD,)
+VOLUME_USD_COLUMN = CryptoField.VOLUME_24H_IN_USD.label
+
+
+class FieldRegistryError(RuntimeError):
+    """The installed tvscreener lacks a field the screener relies on."""
+
+
+class IntervalFields(NamedTuple):
+    interval: str
+    # role -> CryptoField, read-only
+    fields: Mapping[str, CryptoField]
+    # Everything a single-interval screener request selects
+    request: Tuple[CryptoField, ...]
+    # Lower-cased field names and labels, as columns of an upstream frame
+    column_keys: FrozenSet[str]
+
+
+def _column(base: str, suffix: str) -> str:
+    return f"{base}|{suffix}" if suffix else base
+
+
+def build_field_registry(intervals: Mapping[str, str] = INTERVALS) -> Mapping[str, IntervalFields]:
+    """
+    Resolves every (interval, role) to the CryptoField whose TradingView
+    column is exactly e.g. "RSI|5" and freezes the bundles. Raises
+    FieldRegistryError listing everything the installed tvscreener lacks.
+
+    Resolving by column rather than by enum member name matters: names are
+    not systematic ("RSI_1" is the previous-bar daily RSI "RSI[1]" and
+    "CHANGE_1W" the absolute weekly change "change_abs.1W").
+    """
+    by_column = {}
+    for field in CryptoField:
+        by_column.setdefault(field.field_name, field)
+
+    registry, missing = {}, []
+    for interval, suffix in intervals.items():
+        fields = {}
+        for role, base in ROLE_COLUMNS.items():
+            field = by_column.get(_column(base, suffix))
+            if field is None:
+                missing.append(f"{interval}/{role} ({_column(base, suffix)})")
+            fields[role] = field
+        request = tuple(dict.fromkeys(IDENTITY_FIELDS + tuple(fields.values())))
+        keys = frozenset(k for f in fields.values() if f is not None for k in (f.field_name.lower(), f.label.lower()))
+        registry[interval] = IntervalFields(interval, MappingProxyType(fields), request, keys)
+
+    if missing:
+        try:
+            version = metadata.version("tvscreener")
+        except metadata.PackageNotFoundError:
+            version = "unknown"
+        raise FieldRegistryError(f"tvscreener {version} has no CryptoField for: {', '.join(missing)}")
+
+    # tvscreener adds a "[1]" lookback column for every field flagged historical.
+    # We never read those, so the flag is cleared here, once, before any worker
+    # thread builds a request, rather than on the shared enum members per call.
+    for bundle in registry.values():
+        for field in bundle.request:
+            field.historical = False
+    return MappingProxyType(registry)
+
+
+FIELD_REGISTRY = build_field_registry()
+# Fields of every interval at once, for the universe snapshot request
+UNIVERSE_REQUEST = tuple(dict.fromkeys(
+    [f for bundle in FIELD_REGISTRY.values() for f in bundle.request] + list(UNIVERSE_FIELDS)
+))
+ALL_COLUMN_KEYS = frozenset().union(*(bundle.column_keys for bundle in FIELD_REGISTRY.values()))
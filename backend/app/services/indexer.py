@@ -1,7 +1,12 @@
 from tvscreener import CryptoScreener, CryptoField
-from sqlmodel import Session, select
-from app.models import TickerIndex
+from sqlmodel import Session, select, delete, insert, update
+from app.models import TickerIndex, Favorite, MarketDataHistory
+from app.database import SQL_IN_CHUNK
+from app.services.search_index import ticker_search
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime, timezone
+from typing import Optional
+import time
 import pandas as pd
 import numpy as np
 
@@ -9,107 +14,200 @@ class IndexerService:
     def __init__(self, session: Session):
         self.session = session
         self.supported_exchanges = ["BINANCE", "BYBIT", "BITGET", "OKX"]
+        # Catalog paging: rows per request, concurrent requests overall and
+        # speculative pages in flight per exchange
+        self.chunk_size = 1000
+        self.fetch_concurrency = 8
+        self.pages_ahead = 2
+        # Per-chunk retries, waiting retry_backoff * 2**attempt seconds between them
+        self.fetch_retries = 3
+        self.retry_backoff = 1.0
 
     def sync_tickers(self):
         """
-        Fetches ALL tickers from BINANCE, BYBIT, and BITGET and syncs them to the local database.
+        Fetches ALL tickers from BINANCE, BYBIT, BITGET and OKX and syncs them to the local database.
         This ensures maximum robustness and that every available pair can be searched.
+
+        Pages are fetched concurrently and the database is only written once
+        every page is in, in one short transaction, so the SQLite write lock is
+        never held across network requests or retry backoffs. Exchanges with a
+        page that still failed after retries are only upserted, never pruned,
+        so a flaky request cannot delist their tickers.
         """
         print(f"Indexer: Starting full sync for {self.supported_exchanges}...")
-        
-        all_ticker_data = []
-        for exchange in self.supported_exchanges:
-            print(f"Indexer: Fetching all tickers for {exchange}...")
-            cs = CryptoScreener()
-            cs.where(CryptoField.EXCHANGE == exchange)
-            
-            # Fetch in chunks to be safe, though 5000 is manageable
-            chunk_size = 1000
-            start = 0
-            while True:
-                cs.set_range(start, start + chunk_size)
-                try:
-                    df = cs.get()
-                    if df.empty:
-                        break
-                    all_ticker_data.append(df)
-                    if len(df) < chunk_size:
-                        break
-                    start += chunk_size
-                except Exception as e:
-                    print(f"Error fetching {exchange} chunk: {e}")
-                    break
-
-        if not all_ticker_data:
+        failed = set()
+        pages = [page for _, page in self._iter_catalog_pages(failed)]
+        if not pages:
+            print("Indexer: No tickers found from any exchange.")
+            return 0
+        prunable = [e for e in self.supported_exchanges if e not in failed]
+        # The same symbol can show up on two pages when rankings shift mid-sync;
+        # _normalize_catalog keeps the first
+        return self.apply_catalog(pd.concat(pages, ignore_index=True), prunable)
+
+    def apply_catalog(self, catalog: pd.DataFrame, exchanges: Optional[list] = None) -> int:
+        """
+        Diffs a complete fetched catalog against a single read of the current
+        index and applies inserts, updates and deletes as bulk statements in
+        one transaction. Tickers of `exchanges` (all supported ones by
+        default) missing from the catalog are pruned, along with favorites
+        (and their history) for symbols that are no longer indexed. Returns
+        the number of indexed tickers.
+        """
+        if exchanges is None:
+            exchanges = self.supported_exchanges
+        fetched = self._normalize_catalog(catalog)
+        if fetched.empty:
+            # Never prune the whole index on an empty answer
             print("Indexer: No tickers found from any exchange.")
             return 0
+        existing = self._read_index()
+        new, changed = self._upsert_tickers(fetched, existing)
+        removed = self._prune(set(fetched["symbol"]), existing, exchanges)
+        self.session.commit()
+        ticker_search.refresh(self.session, new + changed, removed)
+        print(
+            f"Indexer: Finished! Total prioritized tickers indexed: {len(fetched)} "
+            f"({len(new)} new, {len(changed)} updated, {len(removed)} removed)"
+        )
+        return len(fetched)
+
+    def _iter_catalog_pages(self, failed: set):
+        """
+        Yields (exchange, page) as pages complete. Every exchange keeps
+        pages_ahead requests in flight; a full page schedules the next one and
+        a short or empty page ends the exchange. Exchanges with a page that
+        failed after all retries are added to `failed`.
+        """
+        next_start = {}
+        finished = set()
+        pending = {}
+
+        with ThreadPoolExecutor(max_workers=self.fetch_concurrency, thread_name_prefix="indexer") as pool:
+            def submit(exchange):
+                start = next_start[exchange]
+                next_start[exchange] += self.chunk_size
+                pending[pool.submit(self._fetch_page, exchange, start)] = exchange
+
+            for exchange in self.supported_exchanges:
+                print(f"Indexer: Fetching all tickers for {exchange}...")
+                next_start[exchange] = 0
+                for _ in range(self.pages_ahead):
+                    submit(exchange)
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    exchange = pending.pop(future)
+                    try:
+                        df = future.result()
+                    except Exception as e:
+                        print(f"Error fetching {exchange} chunk: {e}")
+                        failed.add(exchange)
+                        finished.add(exchange)
+                        continue
+                    if df.empty or len(df) < self.chunk_size:
+                        finished.add(exchange)
+                    elif exchange not in finished:
+                        submit(exchange)
+                    if not df.empty:
+                        yield exchange, df
+
+    def _fetch_page(self, exchange: str, start: int) -> pd.DataFrame:
+        """
+        Fetches one page of an exchange's catalog, retrying with exponential backoff.
+        """
+        for attempt in range(self.fetch_retries + 1):
+            try:
+                cs = CryptoScreener()
+                cs.where(CryptoField.EXCHANGE == exchange)
+                cs.set_range(start, start + self.chunk_size)
+                return cs.get()
+            except Exception as e:
+                if attempt == self.fetch_retries:
+                    raise
+                delay = self.retry_backoff * (2 ** attempt)
+                print(f"Indexer: {exchange} chunk at {start} failed ({e}), retrying in {delay:.1f}s")
+                time.sleep(delay)
 
-        df_final = pd.concat(all_ticker_data).drop_duplicates(subset=['Symbol'])
-        valid_symbols = set(df_final['Symbol'].tolist())
-        
-        total_indexed = 0
-        for _, row in df_final.iterrows():
-            symbol = row.get('Symbol')
-            if not symbol:
-                continue
-                
-            # Double check exchange filter just in case
-            exchange = row.get('Exchange', 'UNKNOWN')
-            if exchange not in self.supported_exchanges:
-                continue
-
-            # Check if ticker already exists
-            statement = select(TickerIndex).where(TickerIndex.symbol == symbol)
-            ticker = self.session.exec(statement).first()
-            
-            if not ticker:
-                ticker = TickerIndex(
-                    symbol=symbol,
-                    exchange=exchange,
-                    name=row.get('Name'),
-                    description=row.get('Description')
-                )
-                self.session.add(ticker)
-            else:
-                # Update only if changed
-                changed = False
-                new_name = row.get('Name')
-                new_desc = row.get('Description')
-                if ticker.name != new_name:
-                    ticker.name = new_name
-                    changed = True
-                if ticker.description != new_desc:
-                    ticker.description = new_desc
-                    changed = True
-                
-                if changed:
-                    ticker.updated_at = datetime.now(timezone.utc)
-            
-            total_indexed += 1
-        
-        # 5. Pruning Logic
+    def _read_index(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            self.session.exec(select(
+                TickerIndex.id, TickerIndex.symbol, TickerIndex.exchange, TickerIndex.name, TickerIndex.description
+            )).all(),
+            columns=["id", "symbol", "exchange", "name", "description"]
+        )
+
+    def _upsert_tickers(self, fetched: pd.DataFrame, existing: pd.DataFrame) -> tuple[list, list]:
+        """
+        Bulk inserts unknown symbols and bulk updates those whose name or
+        description changed. Returns the (inserted, updated) symbols.
+        """
+        merged = fetched.merge(
+            existing[["id", "symbol", "name", "description"]],
+            on="symbol", how="left", suffixes=("", "_old"), indicator=True
+        )
+        now = datetime.now(timezone.utc)
+
+        new_rows = merged[merged["_merge"] == "left_only"]
+        if not new_rows.empty:
+            records = new_rows[["symbol", "exchange", "name", "description"]].to_dict(orient="records")
+            for record in records:
+                record["updated_at"] = now
+            self.session.exec(insert(TickerIndex), params=records)
+
+        # Update only if changed
+        both = merged[merged["_merge"] == "both"]
+        changed = both[self._differs(both["name"], both["name_old"]) | self._differs(both["description"], both["description_old"])]
+        if not changed.empty:
+            records = changed[["id", "name", "description"]].to_dict(orient="records")
+            for record in records:
+                record["id"] = int(record["id"])
+                record["updated_at"] = now
+            self.session.exec(update(TickerIndex), params=records)
+
+        return new_rows["symbol"].tolist(), changed["symbol"].tolist()
+
+    def _prune(self, valid_symbols: set, existing: pd.DataFrame, exchanges: list) -> list:
+        """
+        Deletes indexed tickers of `exchanges` (or of no supported exchange)
+        missing from `valid_symbols`, plus favorites and history of any symbol
+        that is no longer indexed. Returns the removed ticker symbols.
+        """
         print("Indexer: Pruning stale tickers and favorites...")
-        from app.models import Favorite, MarketDataHistory
-        
-        # Remove tickers not in the new valid set
-        all_indexed_tickers = self.session.exec(select(TickerIndex)).all()
-        for t in all_indexed_tickers:
-            if t.symbol not in valid_symbols:
-                self.session.delete(t)
-        
+        skipped = [e for e in self.supported_exchanges if e not in exchanges]
+        stale = existing[~existing["symbol"].isin(valid_symbols) & ~existing["exchange"].isin(skipped)]
+        stale_tickers = stale["symbol"].tolist()
+        self._delete_symbols(TickerIndex, stale_tickers)
+
         # Remove favorites that are no longer indexed (Unsupported Exchanges)
-        all_favorites = self.session.exec(select(Favorite)).all()
-        for f in all_favorites:
-            if f.symbol not in valid_symbols:
-                print(f"Indexer: Removing favorite {f.symbol} (no longer in prioritized set)")
-                # Delete its history first
-                history_stmt = select(MarketDataHistory).where(MarketDataHistory.symbol == f.symbol)
-                history_items = self.session.exec(history_stmt).all()
-                for h in history_items:
-                    self.session.delete(h)
-                # Delete the favorite
-                self.session.delete(f)
+        kept = valid_symbols | set(existing.loc[existing["exchange"].isin(skipped), "symbol"])
+        favorites = self.session.exec(select(Favorite.symbol)).all()
+        stale_favorites = [symbol for symbol in favorites if symbol not in kept]
+        for symbol in stale_favorites:
+            print(f"Indexer: Removing favorite {symbol} (no longer in prioritized set)")
+        # Delete their history first
+        self._delete_symbols(MarketDataHistory, stale_favorites)
+        self._delete_symbols(Favorite, stale_favorites)
+        return stale_tickers
 
-        self.session.commit()
-        print(f"Indexer: Finished! Total prioritized tickers indexed: {total_indexed}")
-        return total_indexed
\ No newline at end of file
+    def _normalize_catalog(self, catalog: pd.DataFrame) -> pd.DataFrame:
+        """
+        Reduces a raw screener frame to one row per supported, non-empty symbol.
+        """
+        columns = {"Symbol": "symbol", "Exchange": "exchange", "Name": "name", "Description": "description"}
+        df = catalog.reindex(columns=list(columns)).rename(columns=columns)
+        df = df[df["symbol"].notna() & (df["symbol"] != "")]
+        # Double check exchange filter just in case
+        df = df[df["exchange"].isin(self.supported_exchanges)]
+        df = df.drop_duplicates(subset=["symbol"])
+        return df.astype(object).where(df.notna(), None).reset_index(drop=True)
+
+    @staticmethod
+    def _differs(new: pd.Series, old: pd.Series) -> pd.Series:
+        return (new != old) & ~(new.isna() & old.isna())
+
+    def _delete_symbols(self, model, symbols: list):
+        for i in range(0, len(symbols), SQL_IN_CHUNK):
+            chunk = symbols[i:i + SQL_IN_CHUNK]
+            self.session.exec(delete(model).where(model.symbol.in_(chunk)))
@@ -0,0 +1,325 @@
+import math
+import threading
+from collections import OrderedDict, deque
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+from sqlmodel import Session, select
+
+from app.models import MarketDataHistory
+from app.services.ohlcv import to_seconds
+
+RSI_PERIOD = 14
+MACD_FAST, MACD_SLOW, MACD_SIGNAL = 12, 26, 9
+SMA_PERIODS = (20, 50, 200)
+# Output names, as the collector and the history API report indicators
+NAMES = ("RSI", "MACD", "MACD_Signal", "SMA20", "SMA50", "SMA200")
+# Block length of the vectorized recursions; keeps decay**-k well inside float precision
+_BLOCK = 32
+
+
+def _ewm(x: np.ndarray, alpha: float, initial: float) -> np.ndarray:
+    """
+    y[t] = alpha * x[t] + (1 - alpha) * y[t - 1] with y[-1] = initial, for
+    every t. The recursion is unrolled in blocks: inside one, each y is the
+    decayed start value plus a cumulative sum of rescaled inputs.
+    """
+    n = len(x)
+    y = np.empty(n)
+    decay = 1.0 - alpha
+    powers = decay ** np.arange(_BLOCK + 1)
+    rescale = 1.0 / powers[:-1]
+    previous = initial
+    for start in range(0, n, _BLOCK):
+        block = x[start:start + _BLOCK]
+        k = len(block)
+        y[start:start + k] = powers[1:k + 1] * previous + alpha * powers[:k] * np.cumsum(block * rescale[:k])
+        previous = y[start + k - 1]
+    return y
+
+
+def ema(close: np.ndarray, period: int) -> np.ndarray:
+    """Exponential moving average seeded with the first value, like Pine's ta.ema."""
+    if len(close) == 0:
+        return np.empty(0)
+    return _ewm(close, 2.0 / (period + 1), close[0])
+
+
+def sma(close: np.ndarray, period: int) -> np.ndarray:
+    out = np.full(len(close), np.nan)
+    if len(close) >= period:
+        sums = np.cumsum(np.r_[0.0, close])
+        out[period - 1:] = (sums[period:] - sums[:-period]) / period
+    return out
+
+
+def _rsi_from_averages(gain, loss):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = 100.0 - 100.0 / (1.0 + gain / loss)
+    return np.where(loss == 0, 100.0, np.where(gain == 0, 0.0, rsi))
+
+
+def _wilder_averages(close: np.ndarray, period: int):
+    """Wilder-smoothed gains and losses, defined from close index `period` on (NaN before)."""
+    n = len(close)
+    gain, loss = np.full(n, np.nan), np.full(n, np.nan)
+    if n > period:
+        change = np.diff(close)
+        gains, losses = np.maximum(change, 0.0), np.maximum(-change, 0.0)
+        first_gain, first_loss = gains[:period].mean(), losses[:period].mean()
+        gain[period] = first_gain
+        loss[period] = first_loss
+        gain[period + 1:] = _ewm(gains[period:], 1.0 / period, first_gain)
+        loss[period + 1:] = _ewm(losses[period:], 1.0 / period, first_loss)
+    return gain, loss
+
+
+def rsi(close: np.ndarray, period: int = RSI_PERIOD) -> np.ndarray:
+    """Wilder's RSI (Pine's ta.rsi); NaN for the first `period` closes."""
+    return _rsi_from_averages(*_wilder_averages(close, period))
+
+
+def compute_indicators(close: np.ndarray) -> Dict[str, np.ndarray]:
+    """Every indicator of NAMES over a whole close series at once."""
+    close = np.asarray(close, dtype=float)
+    macd = ema(close, MACD_FAST) - ema(close, MACD_SLOW)
+    out = {"RSI": rsi(close), "MACD": macd, "MACD_Signal": ema(macd, MACD_SIGNAL)}
+    for period in SMA_PERIODS:
+        out[f"SMA{period}"] = sma(close, period)
+    return out
+
+
+class IndicatorState:
+    """
+    Indicator state after a number of closed bars. `preview(close)` gives the
+    indicators of the next bar for a tentative close without changing the
+    state, so the still-forming candle can be revised as often as it is
+    collected; `commit(close)` closes that bar. Both are O(1).
+    """
+    __slots__ = ("bars", "last_close", "gain", "loss", "ema_fast", "ema_slow", "signal", "window", "sums")
+
+    def __init__(self):
+        self.bars = 0
+        self.last_close = math.nan
+        # Sums of gains and losses while warming up, Wilder averages afterwards
+        self.gain = 0.0
+        self.loss = 0.0
+        self.ema_fast = self.ema_slow = self.signal = math.nan
+        self.window = deque(maxlen=max(SMA_PERIODS))
+        # Sum of the last `period` closes, per SMA period
+        self.sums = dict.fromkeys(SMA_PERIODS, 0.0)
+
+    @classmethod
+    def from_closes(cls, close: np.ndarray) -> "IndicatorState":
+        """The state after every close of a series, from its vectorized indicators."""
+        close = np.asarray(close, dtype=float)
+        state = cls()
+        n = state.bars = len(close)
+        if n == 0:
+            return state
+        state.last_close = float(close[-1])
+        if n > RSI_PERIOD:
+            gain, loss = _wilder_averages(close, RSI_PERIOD)
+            state.gain, state.loss = float(gain[-1]), float(loss[-1])
+        else:
+            change = np.diff(close)
+            state.gain = float(np.maximum(change, 0.0).sum())
+            state.loss = float(np.maximum(-change, 0.0).sum())
+        fast, slow = ema(close, MACD_FAST), ema(close, MACD_SLOW)
+        state.ema_fast, state.ema_slow = float(fast[-1]), float(slow[-1])
+        state.signal = float(ema(fast - slow, MACD_SIGNAL)[-1])
+        state.window.extend(close[-state.window.maxlen:].tolist())
+        for period in SMA_PERIODS:
+            state.sums[period] = float(close[-period:].sum())
+        return state
+
+    def _next(self, close: float):
+        bars = self.bars
+        if bars == 0:
+            return 0.0, 0.0, close, close, 0.0
+        change = close - self.last_close
+        up, down = max(change, 0.0), max(-change, 0.0)
+        changes = bars  # including this one
+        if changes < RSI_PERIOD:
+            gain, loss = self.gain + up, self.loss + down
+        elif changes == RSI_PERIOD:
+            gain, loss = (self.gain + up) / RSI_PERIOD, (self.loss + down) / RSI_PERIOD
+        else:
+            alpha = 1.0 / RSI_PERIOD
+            gain = alpha * up + (1.0 - alpha) * self.gain
+            loss = alpha * down + (1.0 - alpha) * self.loss
+        fast_alpha, slow_alpha, signal_alpha = 2.0 / (MACD_FAST + 1), 2.0 / (MACD_SLOW + 1), 2.0 / (MACD_SIGNAL + 1)
+        ema_fast = fast_alpha * close + (1.0 - fast_alpha) * self.ema_fast
+        ema_slow = slow_alpha * close + (1.0 - slow_alpha) * self.ema_slow
+        signal = signal_alpha * (ema_fast - ema_slow) + (1.0 - signal_alpha) * self.signal
+        return gain, loss, ema_fast, ema_slow, signal
+
+    def _dropped(self, period: int) -> float:
+        # The close leaving a full window of `period` when the next bar enters
+        return self.window[-period] if len(self.window) >= period else 0.0
+
+    def preview(self, close: float) -> Tuple[float, ...]:
+        """Indicators (in NAMES order) of the bar after the committed ones, closing at `close`."""
+        gain, loss, ema_fast, ema_slow, signal = self._next(close)
+        if self.bars >= RSI_PERIOD:
+            value = 100.0 if loss == 0 else 0.0 if gain == 0 else 100.0 - 100.0 / (1.0 + gain / loss)
+        else:
+            value = math.nan
+        smas = tuple(
+            (self.sums[p] - self._dropped(p) + close) / p if self.bars + 1 >= p else math.nan
+            for p in SMA_PERIODS
+        )
+        return (value, ema_fast - ema_slow, signal) + smas
+
+    def commit(self, close: float):
+        self.gain, self.loss, self.ema_fast, self.ema_slow, self.signal = self._next(close)
+        for period in SMA_PERIODS:
+            self.sums[period] += close - self._dropped(period)
+        self.window.append(close)
+        self.last_close = close
+        self.bars += 1
+
+
+class _Series:
+    """Cached indicators of one (symbol, interval): committed state, recent values and the forming bar."""
+    __slots__ = ("state", "recent", "pending", "complete")
+
+    def __init__(self, state: IndicatorState, recent: deque, pending, complete: bool):
+        self.state = state
+        # (timestamp, values) of the newest committed bars
+        self.recent = recent
+        # (timestamp, close, values) of the newest bar, revised until a newer one arrives
+        self.pending = pending
+        # Whether `recent` holds every stored bar
+        self.complete = complete
+
+    def update(self, timestamp: int, close: float) -> bool:
+        """Applies a collected candle. False if it is older than the series (needs a reload)."""
+        if self.pending is not None:
+            pending_timestamp, pending_close, pending_values = self.pending
+            if timestamp < pending_timestamp:
+                return False
+            if timestamp > pending_timestamp:
+                self.state.commit(pending_close)
+                if len(self.recent) == self.recent.maxlen:
+                    self.complete = False
+                self.recent.append((pending_timestamp, pending_values))
+        self.pending = (timestamp, close, self.state.preview(close))
+        return True
+
+    def tail(self, bars: int) -> List[Tuple[int, tuple]]:
+        rows = list(self.recent)
+        if self.pending is not None:
+            rows.append((self.pending[0], self.pending[2]))
+        return rows[-bars:]
+
+
+class IndicatorEngine:
+    """
+    RSI, MACD and SMA series computed locally from the closes stored in
+    MarketDataHistory, cached per (symbol, interval).
+
+    A series is backfilled with vectorized NumPy on first use; afterwards the
+    collector feeds every candle it stores through `observe`, which costs O(1)
+    per candle, so reading the last `lookback` bars of a cached series never
+    touches the database or the screener. Candles observed while a series is
+    being loaded are buffered and re-applied to it before it is cached.
+    """
+
+    def __init__(self, lookback: int = 500, max_series: int = 512):
+        self.lookback = lookback
+        self.max_series = max_series
+        self._series: "OrderedDict[Tuple[str, str], _Series]" = OrderedDict()
+        # (timestamp, close) buffers of the loads in flight per key
+        self._loading: Dict[Tuple[str, str], List[list]] = {}
+        self._lock = threading.Lock()
+
+    def series(self, session: Session, symbol: str, interval: str, bars: int = 100) -> Dict[str, list]:
+        """
+        The newest `bars` bars as columns: {"timestamp": [...], "RSI": [...], ...},
+        oldest first, timestamps in epoch seconds, None where an indicator is
+        still warming up.
+        """
+        key = (symbol, interval)
+        with self._lock:
+            cached = self._series.get(key)
+            if cached is not None and (bars <= len(cached.recent) + 1 or cached.complete):
+                self._series.move_to_end(key)
+                return self._columns(cached.tail(bars))
+            # Candles the collector stores from now on may be missing from the load
+            raced = []
+            self._loading.setdefault(key, []).append(raced)
+
+        try:
+            timestamps, close = self._load(session, symbol, interval)
+            indicators = compute_indicators(close)
+            values = list(zip(*(indicators[name].tolist() for name in NAMES)))
+            series = self._build(timestamps, close, values)
+        finally:
+            with self._lock:
+                loads = [buffer for buffer in self._loading.pop(key) if buffer is not raced]
+                if loads:
+                    self._loading[key] = loads
+        rows = list(zip(timestamps, values))
+
+        with self._lock:
+            # Either the load already holds a raced candle (same bar, revised in
+            # place) or it is applied on top; an older one means the load is stale
+            if all(series.update(timestamp, value) for timestamp, value in raced):
+                self._series[key] = series
+                self._series.move_to_end(key)
+                while len(self._series) > self.max_series:
+                    self._series.popitem(last=False)
+                if raced:
+                    tail = series.tail(len(series.recent) + 1)
+                    rows = [row for row in rows if row[0] < tail[0][0]] + tail
+        return self._columns(rows[-bars:])
+
+    def observe(self, records: Iterable[dict]):
+        """Feeds stored candles (collector records) into the series already cached."""
+        with self._lock:
+            if not self._series and not self._loading:
+                return
+            for record in records:
+                key = (record["symbol"], record["interval"])
+                if record.get("close") is None:
+                    continue
+                for buffer in self._loading.get(key, ()):
+                    buffer.append((to_seconds(record["timestamp"]), float(record["close"])))
+                cached = self._series.get(key)
+                if cached is None:
+                    continue
+                if not cached.update(to_seconds(record["timestamp"]), float(record["close"])):
+                    del self._series[key]
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def _load(self, session: Session, symbol: str, interval: str):
+        statement = select(MarketDataHistory.timestamp, MarketDataHistory.close).where(
+            MarketDataHistory.symbol == symbol,
+            MarketDataHistory.interval == interval,
+            MarketDataHistory.close.is_not(None)
+        ).order_by(MarketDataHistory.timestamp)
+        rows = session.exec(statement).all()
+        timestamps = [to_seconds(timestamp) for timestamp, _ in rows]
+        return timestamps, np.array([close for _, close in rows], dtype=float)
+
+    def _build(self, timestamps: List[int], close: np.ndarray, values: List[tuple]) -> _Series:
+        recent = deque(zip(timestamps[:-1], values[:-1]), maxlen=self.lookback)
+        if not timestamps:
+            return _Series(IndicatorState(), recent, None, True)
+        state = IndicatorState.from_closes(close[:-1])
+        pending = (timestamps[-1], float(close[-1]), values[-1])
+        return _Series(state, recent, pending, len(timestamps) - 1 <= self.lookback)
+
+    @staticmethod
+    def _columns(rows: List[Tuple[int, tuple]]) -> Dict[str, list]:
+        columns = {"timestamp": [timestamp for timestamp, _ in rows]}
+        for i, name in enumerate(NAMES):
+            columns[name] = [None if values[i] != values[i] else values[i] for _, values in rows]
+        return columns
+
+
+indicator_engine = IndicatorEngine()
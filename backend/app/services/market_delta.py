@@ -0,0 +1,96 @@
+from typing import List, Optional
+
+# Version of the /ws?protocol=2 message format produced here
+PROTOCOL_VERSION = 2
+KEY = "Symbol"
+
+
+def diff_rows(previous: List[dict], current: List[dict]) -> Optional[dict]:
+    """
+    Describes how to turn `previous` into `current`, rows keyed by Symbol:
+    `upsert` holds new rows in full and only the changed fields of existing
+    ones, `remove` the symbols that left, and `ranks` the new position of
+    every symbol whose position changed. Returns None when nothing changed.
+    """
+    old_rows = {row[KEY]: row for row in previous}
+    old_ranks = {row[KEY]: i for i, row in enumerate(previous)}
+
+    upsert = []
+    ranks = {}
+    for i, row in enumerate(current):
+        symbol = row[KEY]
+        old = old_rows.get(symbol)
+        if old is None:
+            upsert.append(row)
+        else:
+            changed = {k: v for k, v in row.items() if k not in old or old[k] != v}
+            # Fields that disappeared are cleared rather than left stale
+            changed.update({k: None for k in old if k not in row})
+            if changed:
+                changed[KEY] = symbol
+                upsert.append(changed)
+        if old_ranks.get(symbol) != i:
+            ranks[symbol] = i
+
+    current_symbols = {row[KEY] for row in current}
+    remove = [symbol for symbol in old_rows if symbol not in current_symbols]
+
+    if not (upsert or remove or ranks):
+        return None
+    return {"upsert": upsert, "remove": remove, "ranks": ranks}
+
+
+def apply_delta(rows: List[dict], delta: dict) -> List[dict]:
+    """
+    Reference client-side reconstruction of a delta produced by diff_rows.
+    """
+    removed = set(delta["remove"])
+    by_symbol = {row[KEY]: dict(row) for row in rows if row[KEY] not in removed}
+    ranks = {row[KEY]: i for i, row in enumerate(rows)}
+    ranks.update(delta["ranks"])
+
+    for change in delta["upsert"]:
+        by_symbol.setdefault(change[KEY], {}).update(change)
+
+    return sorted(by_symbol.values(), key=lambda row: ranks[row[KEY]])
+
+
+class DeltaStream:
+    """
+    Sequenced snapshot/delta feed for one dataset (the live top movers).
+
+    Every change bumps `seq`; a delta carries the sequence it applies on top
+    of (`base`) so clients can detect a gap and ask for a snapshot again.
+    Channels with metadata about the rows (e.g. how full the divergence
+    window is) send it in full as "meta" with every message.
+    """
+
+    def __init__(self, channel: str = "movers"):
+        self.channel = channel
+        self.seq = 0
+        self.rows: List[dict] = []
+        self.meta: Optional[dict] = None
+
+    def update(self, rows: List[dict], meta: Optional[dict] = None) -> Optional[dict]:
+        """Stores the latest rows and returns the delta message, or None if unchanged."""
+        delta = diff_rows(self.rows, rows)
+        if delta is None:
+            if meta == self.meta:
+                return None
+            delta = {"upsert": [], "remove": [], "ranks": {}}
+        self.rows = rows
+        self.meta = meta
+        self.seq += 1
+        return {
+            "type": "market_delta", "v": PROTOCOL_VERSION, "channel": self.channel,
+            "seq": self.seq, "base": self.seq - 1, **delta, **self._meta()
+        }
+
+    def snapshot(self) -> dict:
+        return {
+            "type": "market_snapshot", "v": PROTOCOL_VERSION, "channel": self.channel,
+            "seq": self.seq, "data": self.rows, **self._meta()
+        }
+
+    def _meta(self) -> dict:
+        return {} if self.meta is None else {"meta": self.meta}
@@ -0,0 +1,120 @@
+from datetime import datetime, timedelta, timezone
+from typing import Dict
+
+import numpy as np
+
+# Candle widths in seconds; "1M" buckets are calendar months
+BUCKET_SECONDS = {
+    "1": 60, "5": 300, "15": 900, "60": 3600, "120": 7200, "240": 14400,
+    "1D": 86400, "1W": 7 * 86400,
+}
+# 1970-01-01 was a Thursday; weekly candles start on Monday like the collector's
+WEEK_OFFSET = 4 * 86400
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def check_resample(source: str, target: str):
+    """Raises ValueError unless every `source` candle falls in exactly one `target` candle."""
+    known = set(BUCKET_SECONDS) | {"1M"}
+    if source not in known or target not in known:
+        raise ValueError(f"Cannot resample {source} candles to {target}")
+    if target == "1M":
+        ok = source != "1W"
+    else:
+        ok = source != "1M" and BUCKET_SECONDS[target] > BUCKET_SECONDS[source] \
+            and BUCKET_SECONDS[target] % BUCKET_SECONDS[source] == 0
+    if not ok:
+        raise ValueError(f"Cannot resample {source} candles to {target}")
+
+
+def bucket_starts(seconds: np.ndarray, interval: str) -> np.ndarray:
+    """Start (epoch seconds) of the `interval` candle holding each epoch-second timestamp."""
+    seconds = np.asarray(seconds, dtype=np.int64)
+    if interval == "1M":
+        months = seconds.astype("datetime64[s]").astype("datetime64[M]")
+        return months.astype("datetime64[s]").astype(np.int64)
+    width = BUCKET_SECONDS[interval]
+    offset = WEEK_OFFSET if interval == "1W" else 0
+    return (seconds - offset) // width * width + offset
+
+
+def bucket_numbers(seconds: np.ndarray, interval: str) -> np.ndarray:
+    """Consecutive integers numbering the `interval` candles holding each timestamp."""
+    seconds = np.asarray(seconds, dtype=np.int64)
+    if interval == "1M":
+        return seconds.astype("datetime64[s]").astype("datetime64[M]").astype(np.int64)
+    offset = WEEK_OFFSET if interval == "1W" else 0
+    return (seconds - offset) // BUCKET_SECONDS[interval]
+
+
+def floor_time(dt: datetime, interval: str) -> datetime:
+    return from_seconds(bucket_starts([to_seconds(dt)], interval)[0])
+
+
+def shift_time(start: datetime, interval: str, buckets: int) -> datetime:
+    """The start of the candle `buckets` candles after (or before, if negative) `start`."""
+    if interval == "1M":
+        month = np.datetime64(to_seconds(start), "s").astype("datetime64[M]") + buckets
+        return from_seconds(month.astype("datetime64[s]").astype(np.int64))
+    return start + timedelta(seconds=BUCKET_SECONDS[interval] * buckets)
+
+
+def ceil_time(dt: datetime, interval: str) -> datetime:
+    """The first candle start at or after `dt`."""
+    start = floor_time(dt, interval)
+    return start if start == dt else shift_time(start, interval, 1)
+
+
+def resample(seconds: np.ndarray, open_: np.ndarray, high: np.ndarray, low: np.ndarray,
+             close: np.ndarray, volume: np.ndarray, interval: str) -> Dict[str, np.ndarray]:
+    """
+    Aggregates candles sorted by time (NaN for missing values) into
+    `interval` candles: first open, max high, min low, last close and summed
+    volume, each over the values present in the bucket (NaN if none are).
+    Returns arrays keyed like the inputs plus "timestamp" (bucket start, epoch
+    seconds) and "candles" (source candles per bucket).
+    """
+    starts = bucket_starts(seconds, interval)
+    n = len(starts)
+    if n == 0:
+        empty = np.empty(0)
+        return {"timestamp": np.empty(0, dtype=np.int64), "open": empty, "high": empty,
+                "low": empty, "close": empty, "volume": empty, "candles": np.empty(0, dtype=np.int64)}
+
+    first = np.flatnonzero(np.r_[True, starts[1:] != starts[:-1]])
+    index = np.arange(n)
+
+    def first_valid(values):
+        valid = ~np.isnan(values)
+        position = np.minimum.reduceat(np.where(valid, index, n), first)
+        return np.where(position < n, values[np.minimum(position, n - 1)], np.nan)
+
+    def last_valid(values):
+        valid = ~np.isnan(values)
+        position = np.maximum.reduceat(np.where(valid, index, -1), first)
+        return np.where(position >= 0, values[np.maximum(position, 0)], np.nan)
+
+    volume_present = np.add.reduceat((~np.isnan(volume)).astype(np.int64), first)
+    volume_sum = np.add.reduceat(np.nan_to_num(volume), first)
+    with np.errstate(invalid="ignore"):
+        # fmax/fmin skip NaN unless the whole bucket is NaN
+        high_max = np.fmax.reduceat(high, first)
+        low_min = np.fmin.reduceat(low, first)
+
+    return {
+        "timestamp": starts[first],
+        "open": first_valid(open_),
+        "high": high_max,
+        "low": low_min,
+        "close": last_valid(close),
+        "volume": np.where(volume_present > 0, volume_sum, np.nan),
+        "candles": np.diff(np.r_[first, n]),
+    }
+
+
+def to_seconds(dt: datetime) -> int:
+    return int((dt - EPOCH).total_seconds())
+
+
+def from_seconds(seconds) -> datetime:
+    return EPOCH + timedelta(seconds=int(seconds))
@@ -0,0 +1,45 @@
+import math
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+
+def _native(value):
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+def to_records(df: pd.DataFrame) -> List[dict]:
+    """
+    JSON-ready rows of a frame: same output as
+    `df.replace({np.nan: None}).to_dict(orient="records")` (NaN becomes None,
+    NumPy scalars become Python ones) but built column by column from the
+    underlying arrays instead of through a replaced copy of the frame.
+    """
+    columns = list(df.columns)
+    if not columns:
+        return [{} for _ in range(len(df))]
+    values = []
+    for _, series in df.items():
+        if isinstance(series.dtype, pd.StringDtype):
+            values.append(series.to_numpy(dtype=object, na_value=None).tolist())
+            continue
+        array = series.to_numpy()
+        kind = array.dtype.kind
+        if kind == "f":
+            column = array.tolist()
+            for i in np.flatnonzero(np.isnan(array)).tolist():
+                column[i] = None
+            values.append(column)
+        elif kind in "iub":
+            values.append(array.tolist())
+        elif kind == "O":
+            values.append([_native(v) for v in array.tolist()])
+        else:
+            # Datetimes and other exotic dtypes keep pandas' own conversion
+            return df.replace({np.nan: None}).to_dict(orient="records")
+    return [dict(zip(columns, row)) for row in zip(*values)]
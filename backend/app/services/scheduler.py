@@ -0,0 +1,154 @@
+import asyncio
+import math
+import random
+import time
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List, Optional
+
+
+def next_run_time(now: float, interval: float, previous: Optional[float] = None,
+                  align: bool = False, offset: float = 0.0) -> float:
+    """
+    Returns the next wall-clock slot strictly after `now`.
+
+    Aligned jobs run on multiples of `interval` since the epoch, shifted by
+    `offset` (a 300s job with offset -5 runs at hh:04:55, hh:09:55, ...).
+    Unaligned jobs step from their `previous` slot, so run time never
+    accumulates as drift. Slots missed while a run overran are skipped.
+    """
+    if align:
+        return math.floor((now - offset) / interval + 1) * interval + offset
+    if previous is None:
+        return now + interval
+    slots = max(1, math.floor((now - previous) / interval) + 1)
+    return previous + slots * interval
+
+
+class Job:
+    """One recurring job and its run statistics."""
+
+    def __init__(self, name: str, func: Callable[[], Awaitable], interval: float, align: bool = False,
+                 offset: float = 0.0, jitter: float = 0.0, run_immediately: bool = False,
+                 max_backoff: Optional[float] = None):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.align = align
+        self.offset = offset
+        self.jitter = jitter
+        self.run_immediately = run_immediately
+        # Consecutive failures stretch the cadence up to this many seconds
+        self.max_backoff = max(interval, max_backoff or interval)
+
+        self.running = False
+        self.runs = 0
+        self.failures = 0
+        self.overruns = 0
+        self.last_started: Optional[float] = None
+        self.last_duration: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.next_run: Optional[float] = None
+
+    def delay_after_failure(self) -> float:
+        return min(self.interval * 2 ** self.failures, self.max_backoff)
+
+    def status(self) -> dict:
+        def iso(ts):
+            return datetime.fromtimestamp(ts, timezone.utc).isoformat() if ts is not None else None
+        return {
+            "name": self.name,
+            "interval": self.interval,
+            "running": self.running,
+            "runs": self.runs,
+            "failures": self.failures,
+            "overruns": self.overruns,
+            "last_started": iso(self.last_started),
+            "last_duration": self.last_duration,
+            "last_error": self.last_error,
+            "next_run": iso(self.next_run),
+        }
+
+
+class Scheduler:
+    """
+    Owns the background jobs of the API process.
+
+    Every job runs in its own task on a drift-free wall-clock schedule (see
+    next_run_time) with optional random jitter. A job never overlaps itself:
+    slots that pass while it is still running are counted as overruns and
+    skipped. After a failure the next run is pushed out exponentially, up to
+    the job's max_backoff, and the cadence resets on the next success.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.time, sleep: Callable[[float], Awaitable] = asyncio.sleep):
+        self.clock = clock
+        self.sleep = sleep
+        self.jobs: Dict[str, Job] = {}
+        self._tasks: List[asyncio.Task] = []
+
+    def add(self, name: str, func: Callable[[], Awaitable], interval: float, **options) -> Job:
+        job = Job(name, func, interval, **options)
+        self.jobs[name] = job
+        return job
+
+    def start(self):
+        self._tasks = [asyncio.create_task(self._loop(job)) for job in self.jobs.values()]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def status(self) -> List[dict]:
+        return [job.status() for job in self.jobs.values()]
+
+    async def run_once(self, job: Job) -> bool:
+        """Runs the job now; returns False if it raised."""
+        job.running = True
+        job.last_started = self.clock()
+        try:
+            await job.func()
+        except Exception as e:
+            job.failures += 1
+            job.last_error = f"{type(e).__name__}: {e}"
+            print(f"Scheduler: {job.name} failed ({job.last_error}), attempt {job.failures}")
+            return False
+        else:
+            job.failures = 0
+            job.last_error = None
+            return True
+        finally:
+            job.runs += 1
+            job.running = False
+            job.last_duration = self.clock() - job.last_started
+
+    async def _loop(self, job: Job):
+        slot = None
+        if job.run_immediately:
+            slot = self.clock()
+            job.next_run = slot
+        else:
+            slot = next_run_time(self.clock(), job.interval, align=job.align, offset=job.offset)
+            job.next_run = slot
+            await self._sleep_until(slot + random.uniform(0, job.jitter))
+
+        while True:
+            ok = await self.run_once(job)
+            now = self.clock()
+            if ok:
+                following = next_run_time(now, job.interval, slot, align=job.align, offset=job.offset)
+                expected = next_run_time(slot, job.interval, slot, align=job.align, offset=job.offset)
+                if following > expected:
+                    job.overruns += round((following - expected) / job.interval)
+                    print(f"Scheduler: {job.name} overran its {job.interval:.0f}s slot ({job.last_duration:.1f}s)")
+                slot = following
+            else:
+                slot = now + job.delay_after_failure()
+            job.next_run = slot
+            await self._sleep_until(slot + random.uniform(0, job.jitter))
+
+    async def _sleep_until(self, when: float):
+        delay = when - self.clock()
+        if delay > 0:
+            await self.sleep(delay)
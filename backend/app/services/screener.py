@@ -1,145 +1,322 @@
 from tvscreener import CryptoScreener, CryptoField
 import pandas as pd
-import numpy as np
-from sqlmodel import Session, select
-from app.models import TickerIndex, Favorite, MarketDataHistory
+from sqlmodel import Session
 from app.database import engine
+from app.services.cache import SnapshotCache
+from app.services.search_index import ticker_search, fts_search
+from app.services.universe import UniverseSnapshot
+from app.services.divergence import KINDS as DIVERGENCE_KINDS, INTERVALS as DIVERGENCE_INTERVALS, DivergenceWindow
+from app.services.records import to_records
+from app.services.expressions import compile_filter, compile_sort
+from app.services.fields import ALL_COLUMN_KEYS, FIELD_REGISTRY, INTERVALS, UNIVERSE_REQUEST, IntervalFields
+from typing import Optional
 import time
 import json
 
 class ScreenerService:
-    def __init__(self):
-        # Maps frontend intervals to TradingView field suffixes and indicator/change fields
-        # Note: API uses '|' for change fields (e.g., change|15), while indicators use '|' or '.' 
-        # based on library version. tvscreener specifically uses '|' for rolling changes.
-        self.interval_map = {
-            "1": {"suffix": "_1", "change": "CHANGE_1", "close": "CLOSE_1"},
-            "5": {"suffix": "_5", "change": "CHANGE_5", "close": "CLOSE_5"},
-            "15": {"suffix": "_15", "change": "CHANGE_15", "close": "CLOSE_15"},
-            "60": {"suffix": "_60", "change": "CHANGE_60", "close": "CLOSE_60"},
-            "120": {"suffix": "_120", "change": "CHANGE_120", "close": "CLOSE_120"},
-            "240": {"suffix": "_240", "change": "CHANGE_240", "close": "CLOSE_240"},
-            "1D": {"suffix": "", "change": "CHANGE_PERCENT", "close": "PRICE"},
-            "1W": {"suffix": "_1W", "change": "CHANGE_1W", "close": "CLOSE_1W"},
-            "1M": {"suffix": "_1M", "change": "CHANGE_1M", "close": "CLOSE_1M"}
-        }
+    def __init__(self, cache_ttl: float = 5.0, universe_ttl: float = 10.0):
+        # Shared snapshot of top-mover results keyed by (interval, direction), fetched
+        # at max_movers rows and sliced per request so the keys stay bounded. The
+        # broadcaster, every WebSocket client and the REST endpoint read the same
+        # entry, and concurrent misses are coalesced into a single upstream query.
+        self.movers_cache = SnapshotCache(ttl=cache_ttl)
+        self.max_movers = 200
+        # _process_dataframe plans keyed by (field set, column signature)
+        self._rename_plans = {}
+        # Local snapshot of the whole liquid universe (most liquid symbols first), fetched
+        # in pages of universe_page rows and refreshed at most once per universe_ttl;
+        # batched and filtered movers are ranked from it.
+        self.universe_page = 3000
+        self.universe_max_pages = 10
+        self.universe_cache = SnapshotCache(ttl=universe_ttl)
+        # Rolling close/RSI windows of the divergence scanner, fed by every universe
+        # snapshot from startup on
+        self.divergence_windows = {i: DivergenceWindow(i) for i in DIVERGENCE_INTERVALS}
+
+        # Frontend intervals; their field bundles live in FIELD_REGISTRY
+        self.interval_map = INTERVALS
+
+    def _bundle(self, interval: str) -> IntervalFields:
+        return FIELD_REGISTRY.get(interval, FIELD_REGISTRY["1D"])
 
     def _get_common_fields(self, interval: str):
-        conf = self.interval_map.get(interval, self.interval_map["1D"])
-        suffix = conf["suffix"]
-        
-        # Base technical fields
-        price_f = getattr(CryptoField, conf["close"], CryptoField.PRICE)
-        rsi_f = getattr(CryptoField, f"RSI{suffix}" if interval != "1D" else "RELATIVE_STRENGTH_INDEX_14")
-        change_f = getattr(CryptoField, conf["change"], CryptoField.CHANGE_PERCENT)
-        
-        # Standard indicators
-        macd_f = getattr(CryptoField, f"MACD_MACD{suffix}" if interval != "1D" else "MACD_LEVEL_12_26")
-        macd_sig_f = getattr(CryptoField, f"MACD_SIGNAL{suffix}" if interval != "1D" else "MACD_SIGNAL_12_26")
-        sma20_f = getattr(CryptoField, f"SMA20{suffix}" if interval != "1D" else "SIMPLE_MOVING_AVERAGE_20")
-        sma50_f = getattr(CryptoField, f"SMA50{suffix}" if interval != "1D" else "SIMPLE_MOVING_AVERAGE_50")
-        sma200_f = getattr(CryptoField, f"SMA200{suffix}" if interval != "1D" else "SIMPLE_MOVING_AVERAGE_200")
-        vol_f = getattr(CryptoField, f"VOLUME{suffix}" if interval != "1D" else "VOLUME")
+        return self._bundle(interval).fields
 
-        return {
-            "price": price_f, "rsi": rsi_f, "change": change_f, 
-            "macd": macd_f, "macd_sig": macd_sig_f, "sma20": sma20_f,
-            "sma50": sma50_f, "sma200": sma200_f, "volume": vol_f
-        }
+    # Display names the processed frames expose, in the order fields are renamed
+    DISPLAY_NAMES = {
+        "price": "Price",
+        "rsi": "Relative Strength Index (14)",
+        "change": "Change %",
+        "macd": "MACD Level (12, 26)",
+        "macd_sig": "MACD Signal (12, 26)",
+        "sma20": "Simple Moving Average (20)",
+        "sma50": "Simple Moving Average (50)",
+        "sma200": "Simple Moving Average (200)",
+        "volume": "Volume",
+    }
 
     def _process_dataframe(self, df, fields_map):
         if df.empty: return df
-        
+        drop, rename = self._rename_plan(fields_map, tuple(df.columns))
+        if drop:
+            df = df.drop(columns=list(drop))
+        return df.rename(columns=rename)
+
+    def _rename_plan(self, fields_map, columns: tuple):
+        """
+        The (columns to drop, rename map) for a field set and a column
+        signature. Upstream frames of one interval always have the same
+        columns, so each plan is computed once and reused.
+        """
+        key = (tuple(fields_map.items()), columns)
+        plan = self._rename_plans.get(key)
+        if plan is None:
+            plan = self._build_rename_plan(fields_map, columns)
+            if len(self._rename_plans) >= 256:
+                self._rename_plans.clear()
+            self._rename_plans[key] = plan
+        return plan
+
+    def _build_rename_plan(self, fields_map, columns: tuple):
         # Standardize the dataframe to prevent column name collisions.
         # If the API returns default columns (like 'Change %' for 24h) that conflict 
         # with our interval-specific renames, we drop the defaults first.
-        target_display_names = [
-            "Price", "Change %", "Volume", "Relative Strength Index (14)", 
-            "MACD Level (12, 26)", "MACD Signal (12, 26)",
-            "Simple Moving Average (20)", "Simple Moving Average (50)", "Simple Moving Average (200)"
-        ]
-        
-        source_cols = []
+        target_display_names = set(self.DISPLAY_NAMES.values())
+
+        source_cols = set()
         for f in fields_map.values():
-            if hasattr(f, "field_name"): source_cols.append(f.field_name)
-            if hasattr(f, "label"): source_cols.append(f.label)
-        
+            if hasattr(f, "field_name"): source_cols.add(f.field_name)
+            if hasattr(f, "label"): source_cols.add(f.label)
+
         # Drop existing columns that share a target name but are NOT the intended source
-        cols_to_drop = [c for c in df.columns if c in target_display_names and c not in source_cols]
-        if cols_to_drop:
-            df = df.drop(columns=cols_to_drop)
+        cols_to_drop = tuple(c for c in columns if c in target_display_names and c not in source_cols)
+        remaining = [c for c in columns if c not in cols_to_drop]
 
         rename_map = {"name": "Symbol", "exchange": "Exchange", "description": "Description"}
-        
-        calc_map = {
-            fields_map["price"]: "Price",
-            fields_map["rsi"]: "Relative Strength Index (14)",
-            fields_map["change"]: "Change %",
-            fields_map["macd"]: "MACD Level (12, 26)",
-            fields_map["macd_sig"]: "MACD Signal (12, 26)",
-            fields_map["sma20"]: "Simple Moving Average (20)",
-            fields_map["sma50"]: "Simple Moving Average (50)",
-            fields_map["sma200"]: "Simple Moving Average (200)",
-            fields_map["volume"]: "Volume"
-        }
+
+        calc_map = {fields_map[role]: display_name for role, display_name in self.DISPLAY_NAMES.items()}
+        lowered = [(col, col.lower()) for col in remaining]
 
         for f, display_name in calc_map.items():
             if not f: continue
             target_name = f.field_name.lower() if hasattr(f, "field_name") else str(f).lower()
             target_label = f.label.lower() if hasattr(f, "label") else str(f).lower()
-            
+
             # FIX: Case-insensitive match to handle API returning 'Change|5' vs library 'change|5'
-            actual_col = next((col for col in df.columns if col.lower() == target_name or col.lower() == target_label), None)
+            actual_col = next((col for col, lower in lowered if lower == target_name or lower == target_label), None)
             if actual_col: rename_map[actual_col] = display_name
+
+        return cols_to_drop, rename_map
+
+    def get_top_movers(self, limit: int = 50, interval: str = "1D", sort_descending: bool = True,
+                       strict: bool = False):
+        """
+        The top `limit` (at most max_movers) gainers or losers of an interval.
+        Upstream errors are answered with fallback rows unless `strict`, in
+        which case they propagate and an empty answer stays empty.
+        """
+        # Unknown intervals are served the daily fields, so they share its entry
+        interval = interval if interval in self.interval_map else "1D"
+        key = (interval, sort_descending)
+        try:
+            records = self.movers_cache.get_or_load(
+                key, lambda: self._fetch_top_movers(self.max_movers, interval, sort_descending)
+            )
+        except Exception as e:
+            if strict:
+                raise
+            print(f"DEBUG: Error in get_top_movers: {e}")
+            return self._get_fallback_data(sort_descending)
+        if records is None:
+            return [] if strict else self._get_fallback_data(sort_descending)
+        return records[:max(limit, 0)]
+
+    def _liquid_screener(self):
+        cs = CryptoScreener()
+        # 1. Filter for Big Four Exchanges
+        cs.where(CryptoField.EXCHANGE.isin(["BINANCE", "BYBIT", "BITGET", "OKX"]))
+        
+        # 2. Add Minimum Volume Filter to remove illiquid/junk tickers
+        # 50,000 USD minimum 24h volume ensures we see real market action
+        cs.where(CryptoField.VOLUME_24H_IN_USD > 50000)
+        return cs
+
+    def _fetch_top_movers(self, limit: int, interval: str, sort_descending: bool):
+        """
+        Queries TradingView for the top movers. Returns None when the upstream
+        answers with an empty frame and lets any error propagate to the caller.
+        """
+        cs = self._liquid_screener()
+        cs.set_range(0, limit)
+        f_map = self._get_common_fields(interval)
+        
+        # FIX: Enforce strictly negative change for losers to prevent positive values (flickering bug)
+        if not sort_descending:
+            cs.where(f_map["change"] < 0)
+        
+        # 3. API-Side Sorting: Essential for true top/bottom detection
+        cs.sort_by(f_map["change"], ascending=not sort_descending)
+        
+        # 4. Request Fields
+        cs.select(*self._bundle(interval).request)
+        df = cs.get()
+        if df.empty: return None
+        
+        processed_df = self._process_dataframe(df, f_map)
         
-        df = df.rename(columns=rename_map)
-        return df
+        # Local Safety Filter: Double-check to prevent positive values in Top Losers
+        if not sort_descending:
+            processed_df = processed_df[processed_df['Change %'] < 0]
 
-    def get_top_movers(self, limit: int = 50, interval: str = "1D", sort_descending: bool = True):
+        # Final sort consistency
+        processed_df = processed_df.sort_values(by='Change %', ascending=not sort_descending)
+        return to_records(processed_df.head(limit))
+
+    def get_movers_batch(self, intervals: list[str], limit: int = 50, strict: bool = False):
+        """
+        Top gainers ("desc") and losers ("asc") for several intervals at once:
+        {"15": {"desc": [...], "asc": [...]}, ...}. All intervals are ranked
+        from the local universe snapshot, so any number of intervals and
+        directions costs at most one upstream request per refresh. `strict`
+        works as in get_top_movers.
+        """
+        self._check_intervals(intervals)
         try:
-            cs = CryptoScreener()
-            # 1. Filter for Big Four Exchanges
-            cs.where(CryptoField.EXCHANGE.isin(["BINANCE", "BYBIT", "BITGET", "OKX"]))
-            
-            # 2. Add Minimum Volume Filter to remove illiquid/junk tickers
-            # 50,000 USD minimum 24h volume ensures we see real market action
-            cs.where(CryptoField.VOLUME_24H_IN_USD > 50000)
-            
-            cs.set_range(0, limit)
-            f_map = self._get_common_fields(interval)
-            
-            # FIX: Enforce strictly negative change for losers to prevent positive values (flickering bug)
-            if not sort_descending:
-                cs.where(f_map["change"] < 0)
-            
-            # 3. API-Side Sorting: Essential for true top/bottom detection
-            cs.sort_by(f_map["change"], ascending=not sort_descending)
-            
-            # 4. Request Fields
-            request_fields = [CryptoField.NAME, CryptoField.EXCHANGE, CryptoField.DESCRIPTION]
-            for f in f_map.values():
-                if f and hasattr(f, "field_name"):
-                    if hasattr(f, 'historical'): f.historical = False 
-                    if f not in request_fields: request_fields.append(f)
-
-            cs.select(*request_fields)
-            df = cs.get()
-            if df.empty: return self._get_fallback_data(sort_descending)
-            
-            processed_df = self._process_dataframe(df, f_map)
-            
-            # Local Safety Filter: Double-check to prevent positive values in Top Losers
-            if not sort_descending:
-                processed_df = processed_df[processed_df['Change %'] < 0]
+            universe = self.get_universe()
+        except Exception as e:
+            if strict:
+                raise
+            print(f"DEBUG: Error in get_movers_batch: {e}")
+            universe = None
+        if universe is None and strict:
+            return {i: {"desc": [], "asc": []} for i in intervals}
+        if universe is None:
+            return {i: {"desc": self._get_fallback_data(True), "asc": self._get_fallback_data(False)} for i in intervals}
+        return {
+            i: {"desc": universe.top_movers(i, limit, True), "asc": universe.top_movers(i, limit, False)}
+            for i in intervals
+        }
 
-            # Final sort consistency
-            processed_df = processed_df.sort_values(by='Change %', ascending=not sort_descending)
-            return processed_df.head(limit).replace({np.nan: None}).to_dict(orient='records')
+    def query_movers(self, limit: int = 50, interval: str = "1D", sort_descending: bool = True,
+                     min_volume: Optional[float] = None, rsi_min: Optional[float] = None,
+                     rsi_max: Optional[float] = None, exchanges: Optional[list[str]] = None):
+        """
+        Gainers or losers with user-defined filters, answered locally from the
+        universe snapshot instead of a filtered and sorted upstream query.
+        `min_volume` is a minimum 24h volume in USD.
+        """
+        self._check_intervals([interval])
+        try:
+            universe = self.get_universe()
         except Exception as e:
-            print(f"DEBUG: Error in get_top_movers: {e}")
+            print(f"DEBUG: Error in query_movers: {e}")
+            universe = None
+        if universe is None:
             return self._get_fallback_data(sort_descending)
+        return universe.top_movers(
+            interval, limit, sort_descending,
+            min_volume=min_volume, rsi_min=rsi_min, rsi_max=rsi_max, exchanges=exchanges
+        )
 
-    def get_assets_by_symbols(self, symbols: list[str], interval: str = "1D"):
+    def screen(self, where: Optional[str] = None, sort: Optional[str] = None, interval: str = "1D",
+               sort_descending: bool = True, limit: int = 50):
+        """
+        Runs a user-defined screen over the universe snapshot, e.g.
+        where="rsi < 30 and change > 0 and volume_usd > 1e6", sort="macd - macd_signal". Expressions
+        are compiled (and cached) before anything is fetched, so a bad one
+        raises ExpressionError (a ValueError) without an upstream call.
+        """
+        self._check_intervals([interval])
+        condition = compile_filter(where) if where else None
+        key = compile_sort(sort) if sort else None
+        try:
+            universe = self.get_universe()
+        except Exception as e:
+            print(f"DEBUG: Error in screen: {e}")
+            return []
+        if universe is None:
+            return []
+        return universe.screen(interval, condition, key, sort_descending, limit)
+
+    def get_divergences(self, interval: str = "60", kind: Optional[str] = None, limit: int = 50):
+        """
+        Bullish/bearish price-vs-RSI divergences across the liquid universe,
+        strongest first: {"interval", "bars", "window", "divergences": [...]}.
+        The windows only fill from live snapshots, so "bars" (bars seen out of
+        "window") tells an empty scan from one without enough data yet.
+        """
+        self._check_intervals([interval])
+        if interval not in self.divergence_windows:
+            raise ValueError(f"Divergences are only scanned on intervals {', '.join(DIVERGENCE_INTERVALS)}")
+        if kind is not None and kind not in DIVERGENCE_KINDS:
+            raise ValueError(f"Unknown divergence kind: {kind}")
+        window = self.divergence_windows[interval]
+        try:
+            universe = self.get_universe()
+        except Exception as e:
+            print(f"DEBUG: Error in get_divergences: {e}")
+            universe = None
+        if universe is not None and window.fed_at != universe.built_at:
+            self._feed_divergence(window, universe)
+        return {"interval": interval, "bars": window.filled, "window": window.bars,
+                "divergences": window.scan(kind, limit)}
+
+    def _feed_divergence(self, window: DivergenceWindow, universe: UniverseSnapshot):
+        view = universe.interval_view(window.interval)
+        window.observe(view.columns["symbol"], view.columns["price"], view.rsi, view.records, universe.built_at)
+
+    def get_universe(self):
+        """The current universe snapshot, or None if the upstream answered empty."""
+        return self.universe_cache.get_or_load("universe", self._load_universe)
+
+    def _load_universe(self):
+        df = self._fetch_universe()
+        if df is None:
+            return None
+        universe = UniverseSnapshot(df, self._interval_frame)
+        for window in self.divergence_windows.values():
+            self._feed_divergence(window, universe)
+        return universe
+
+    def _check_intervals(self, intervals):
+        unknown = [i for i in intervals if i not in self.interval_map]
+        if unknown:
+            raise ValueError(f"Unknown intervals: {', '.join(unknown)}")
+
+    def _fetch_universe(self):
+        """
+        The whole liquid universe (the same filter the single-interval movers
+        query ranks) with the fields of every interval, most liquid first.
+        Pages are requested until a short one, so movers never depend on
+        where the snapshot was cut. Returns None for an empty answer.
+        """
+        pages = []
+        for page in range(self.universe_max_pages):
+            cs = self._liquid_screener()
+            start = page * self.universe_page
+            cs.set_range(start, start + self.universe_page)
+            cs.sort_by(CryptoField.VOLUME_24H_IN_USD, ascending=False)
+            cs.select(*UNIVERSE_REQUEST)
+            df = cs.get()
+            pages.append(df)
+            if len(df) < self.universe_page:
+                break
+        else:
+            print(f"DEBUG: Universe truncated at {self.universe_max_pages * self.universe_page} symbols")
+        df = pd.concat(pages, ignore_index=True) if len(pages) > 1 else pages[0]
+        if "Symbol" in df.columns:
+            # Volume ranks can shift between pages and repeat a symbol at the boundary
+            df = df.drop_duplicates("Symbol", ignore_index=True)
+        return None if df.empty else df
+
+    def _interval_frame(self, universe, interval: str):
+        """The universe narrowed to one interval's columns, renamed to display names."""
+        own = self._bundle(interval).column_keys
+        columns = [c for c in universe.columns if c.lower() in own or c.lower() not in ALL_COLUMN_KEYS]
+        return self._process_dataframe(universe[columns], self._get_common_fields(interval))
+
+    def get_assets_by_symbols(self, symbols: list[str], interval: str = "1D", strict: bool = False):
+        """Rows of the given symbols; errors give [] unless `strict`, where they propagate."""
         if not symbols: return []
         try:
             cs = CryptoScreener()
@@ -147,31 +324,30 @@ class ScreenerService:
             cs.set_range(0, 1000)
             f_map = self._get_common_fields(interval)
             
-            request_fields = [CryptoField.NAME, CryptoField.EXCHANGE, CryptoField.DESCRIPTION]
-            for f in f_map.values():
-                if f and hasattr(f, "field_name"):
-                    if hasattr(f, 'historical'): f.historical = False 
-                    if f not in request_fields: request_fields.append(f)
-
-            cs.select(*request_fields)
+            cs.select(*self._bundle(interval).request)
             df = cs.get()
             if df.empty: return []
             
             processed_df = self._process_dataframe(df, f_map)
-            return processed_df.replace({np.nan: None}).to_dict(orient='records')
+            return to_records(processed_df)
         except Exception as e:
+            if strict:
+                raise
             print(f"DEBUG: Error in get_assets_by_symbols: {e}")
             return []
 
     def search_ticker(self, query: str):
-        query = query.strip().upper()
         try:
-            with Session(engine) as session:
-                statement = select(TickerIndex).where(
-                    (TickerIndex.symbol.like(f"%{query}%")) | (TickerIndex.name.like(f"%{query}%"))
-                )
-                results = session.exec(statement.limit(50)).all()
-                return [r.model_dump() for r in results]
+            # Several words ("btc perp", "eth okx") are token queries for the FTS mirror
+            if len(query.split()) > 1:
+                with Session(engine) as session:
+                    return fts_search(session, query, limit=50)
+            # Loaded once from ticker_index, then kept current by the indexer; syncs
+            # from another process are picked up on the periodic check
+            if ticker_search.stale():
+                with Session(engine) as session:
+                    ticker_search.ensure_current(session)
+            return ticker_search.search(query, limit=50)
         except Exception as e:
             print(f"DEBUG: Search error: {e}")
         return []
@@ -0,0 +1,222 @@
+import heapq
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Set
+
+from sqlalchemy import text
+from sqlmodel import Session, select, func
+
+from app.database import SQL_IN_CHUNK
+from app.models import TickerIndex
+
+# Quote currencies stripped from a pair name to find its base asset, longest first
+QUOTE_ASSETS = ["FDUSD", "USDT", "USDC", "BUSD", "TUSD", "USD", "EUR", "TRY", "BTC", "ETH", "BNB"]
+EXCHANGE_PRIORITY = ["BINANCE", "BYBIT", "BITGET", "OKX"]
+# Ranked results kept for repeated queries (short prefixes, exchange names)
+RESULT_CACHE_SIZE = 1024
+# Seconds between checks of ticker_index for changes made by another process
+RECHECK_INTERVAL = 60.0
+# bm25 column weights for ticker_index_fts: symbol, name, description, exchange
+FTS_WEIGHTS = (10.0, 5.0, 1.0, 2.0)
+# ticker_index columns returned by fts_search, in SELECT order
+FTS_COLUMNS = ("id", "symbol", "exchange", "name", "description", "updated_at")
+
+
+def base_asset(name: str) -> str:
+    """BTCUSDT.P -> BTC, ETHBTC -> ETH. Returns the name itself when no quote matches."""
+    pair = name.upper().split(".")[0]
+    for quote in QUOTE_ASSETS:
+        if pair.endswith(quote) and len(pair) > len(quote):
+            return pair[:-len(quote)]
+    return pair
+
+
+class _Entry:
+    __slots__ = ("record", "symbol", "name", "base", "exchange", "key", "order")
+
+    def __init__(self, record: dict):
+        self.record = record
+        self.symbol = record["symbol"].upper()
+        self.name = (record.get("name") or self.symbol.split(":")[-1]).upper()
+        self.base = base_asset(self.name)
+        self.exchange = (record.get("exchange") or "").upper()
+        # Same fields the old LIKE query matched on; the separator never occurs in a query
+        self.key = f"{self.symbol}\x00{(record.get('name') or '').upper()}"
+        rank = EXCHANGE_PRIORITY.index(self.exchange) if self.exchange in EXCHANGE_PRIORITY else len(EXCHANGE_PRIORITY)
+        # Tie-breaker inside a ranking tier: shorter pairs, then preferred exchanges
+        self.order = (len(self.name), rank, self.symbol)
+
+
+class TickerSearchIndex:
+    """
+    In-process n-gram index over TickerIndex for the universal search box.
+
+    Every ticker's symbol and name are split into bigrams and trigrams; a query
+    intersects the posting sets of its own n-grams and confirms the substring
+    match, so results are the same as the old LIKE '%q%' scan. Matches are
+    ranked by exact symbol, prefix, base asset and exchange hits.
+
+    The index is loaded from the database on first use and then kept current by
+    the ticker indexer through `refresh`. A sync run in another process
+    (run_indexer.py) is picked up by `ensure_current`, which reloads the index
+    when the row count or newest updated_at of ticker_index has moved, checking
+    at most once per recheck_interval. Ranked results of recent queries are
+    cached until the next change to the index.
+    """
+
+    def __init__(self, recheck_interval: float = RECHECK_INTERVAL):
+        self._lock = threading.Lock()
+        self._entries: Dict[str, _Entry] = {}
+        self._postings: Dict[str, Set[str]] = {}
+        self._results: OrderedDict = OrderedDict()
+        self.loaded = False
+        self.recheck_interval = recheck_interval
+        # (row count, newest updated_at) of ticker_index as of the last load or refresh
+        self._signature = None
+        self._checked_at = 0.0
+
+    def load(self, session: Session):
+        """Replaces the whole index with the current contents of ticker_index."""
+        # Read before the rows: a write in between only causes one extra reload
+        signature = self._read_signature(session)
+        entries = [_Entry(t.model_dump()) for t in session.exec(select(TickerIndex)).all()]
+        with self._lock:
+            self._entries = {}
+            self._postings = {}
+            self._results.clear()
+            for entry in entries:
+                self._add(entry)
+            self.loaded = True
+            self._signature = signature
+            self._checked_at = time.monotonic()
+
+    def stale(self) -> bool:
+        """True when the index is not loaded or is due for a check against ticker_index."""
+        return not self.loaded or time.monotonic() - self._checked_at >= self.recheck_interval
+
+    def ensure_current(self, session: Session):
+        """Loads the index, or reloads it if ticker_index changed since the last load or refresh."""
+        if not self.loaded or self._read_signature(session) != self._signature:
+            self.load(session)
+        else:
+            self._checked_at = time.monotonic()
+
+    @staticmethod
+    def _read_signature(session: Session) -> tuple:
+        return tuple(session.exec(select(func.count(TickerIndex.id), func.max(TickerIndex.updated_at))).one())
+
+    def refresh(self, session: Session, symbols: Iterable[str], removed: Iterable[str] = ()):
+        """
+        Re-reads the given symbols from ticker_index and drops the removed ones.
+        A no-op until the index has been loaded; the first search loads it whole.
+        """
+        if not self.loaded:
+            return
+        symbols = list(symbols)
+        rows = []
+        for i in range(0, len(symbols), SQL_IN_CHUNK):
+            chunk = symbols[i:i + SQL_IN_CHUNK]
+            rows.extend(session.exec(select(TickerIndex).where(TickerIndex.symbol.in_(chunk))).all())
+        entries = [_Entry(t.model_dump()) for t in rows]
+        signature = self._read_signature(session)
+        with self._lock:
+            self._results.clear()
+            for symbol in removed:
+                self._remove(symbol)
+            for entry in entries:
+                self._remove(entry.record["symbol"])
+                self._add(entry)
+            # Our own sync is applied already; do not reload for it
+            self._signature = signature
+
+    def search(self, query: str, limit: int = 50) -> List[dict]:
+        q = query.strip().upper()
+        if not q:
+            return []
+        with self._lock:
+            ranked = self._results.get((q, limit))
+            if ranked is None:
+                candidates = self._candidates(q)
+                ranked = heapq.nsmallest(limit, candidates, key=lambda e: self._rank(e, q))
+                self._results[(q, limit)] = ranked
+                if len(self._results) > RESULT_CACHE_SIZE:
+                    self._results.popitem(last=False)
+            else:
+                self._results.move_to_end((q, limit))
+            return [dict(e.record) for e in ranked]
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _candidates(self, q: str) -> Iterable[_Entry]:
+        if len(q) < 2:
+            return [e for e in self._entries.values() if q in e.key]
+        grams = _ngrams(q, min(len(q), 3))
+        postings = sorted((self._postings.get(g, set()) for g in grams), key=len)
+        if not postings[0]:
+            return []
+        symbols = set.intersection(*postings) if len(postings) > 1 else postings[0]
+        entries = (self._entries[s] for s in symbols)
+        if len(q) <= 3:
+            return list(entries)
+        # Shared n-grams do not imply the whole query is a substring
+        return [e for e in entries if q in e.key]
+
+    @staticmethod
+    def _rank(entry: _Entry, q: str) -> tuple:
+        return (
+            not (entry.symbol == q or entry.name == q),
+            not (entry.name.startswith(q) or entry.symbol.startswith(q)),
+            entry.base != q,
+            entry.exchange != q,
+            entry.order,
+        )
+
+    def _add(self, entry: _Entry):
+        symbol = entry.record["symbol"]
+        self._entries[symbol] = entry
+        for gram in _ngrams(entry.key, 2) | _ngrams(entry.key, 3):
+            self._postings.setdefault(gram, set()).add(symbol)
+
+    def _remove(self, symbol: str):
+        entry = self._entries.pop(symbol, None)
+        if entry is None:
+            return
+        for gram in _ngrams(entry.key, 2) | _ngrams(entry.key, 3):
+            posting = self._postings.get(gram)
+            if posting is not None:
+                posting.discard(symbol)
+                if not posting:
+                    del self._postings[gram]
+
+
+def fts_search(session: Session, query: str, limit: int = 50) -> List[dict]:
+    """
+    Token/prefix search over the ticker_index_fts mirror, ranked by bm25.
+    Every word of the query must prefix-match a token of the symbol, name,
+    description or exchange, so "btc perp" finds BTCUSDT.P perpetuals and
+    "eth okx" the OKX ETH pairs. Rows are read straight from SQL, without
+    loading ORM objects.
+    """
+    tokens = re.findall(r"[0-9A-Za-z]+", query)
+    if not tokens:
+        return []
+    match = " ".join(f'"{token}"*' for token in tokens)
+    weights = ", ".join(str(w) for w in FTS_WEIGHTS)
+    statement = text(
+        f"SELECT {', '.join('t.' + name for name in FTS_COLUMNS)} "
+        "FROM ticker_index_fts JOIN ticker_index AS t ON t.id = ticker_index_fts.rowid "
+        f"WHERE ticker_index_fts MATCH :match ORDER BY bm25(ticker_index_fts, {weights}) LIMIT :limit"
+    ).columns(*(TickerIndex.__table__.c[name] for name in FTS_COLUMNS))
+    # Typed columns: updated_at comes back as a datetime, as from the in-memory index
+    return [dict(row) for row in session.exec(statement, params={"match": match, "limit": limit}).mappings()]
+
+
+def _ngrams(value: str, n: int) -> Set[str]:
+    return {value[i:i + n] for i in range(len(value) - n + 1)}
+
+
+# Process-wide index shared by ScreenerService and IndexerService
+ticker_search = TickerSearchIndex()
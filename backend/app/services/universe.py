@@ -0,0 +1,118 @@
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.services.expressions import NUMERIC_VARIABLES, Expression
+from app.services.records import to_records
+
+
+class _IntervalView:
+    """Columns of one interval as NumPy arrays, plus the rows they index."""
+
+    def __init__(self, df: pd.DataFrame):
+        def column(name):
+            if name not in df.columns:
+                return np.full(len(df), np.nan)
+            return pd.to_numeric(df[name], errors="coerce").to_numpy(dtype=float)
+
+        self.columns: Dict[str, np.ndarray] = {
+            variable: column(name) for variable, name in NUMERIC_VARIABLES.items()
+        }
+        symbols = df["Symbol"].astype(str).str.upper() if "Symbol" in df.columns else pd.Series([""] * len(df))
+        if "Exchange" in df.columns:
+            exchanges = df["Exchange"].astype(str).str.upper()
+        else:
+            exchanges = symbols.str.split(":").str[0]
+        self.columns["symbol"] = symbols.to_numpy()
+        self.columns["exchange"] = exchanges.to_numpy()
+        self.change = self.columns["change"]
+        self.volume = self.columns["volume"]
+        self.volume_usd = self.columns["volume_usd"]
+        self.rsi = self.columns["rsi"]
+        self.exchange = self.columns["exchange"]
+        self.records = to_records(df)
+
+
+class UniverseSnapshot:
+    """
+    In-memory copy of the liquid universe with the fields of every interval.
+
+    Built from one wide screener frame; `prepare(frame, interval)` narrows it
+    to an interval's display columns. Each interval is converted to NumPy
+    columns on first use, after which gainers/losers queries with any
+    volume/RSI/exchange filter are answered locally by a masked top-k
+    (argpartition) without an upstream call. Returned rows are shared between
+    callers and must be treated as read-only.
+    """
+
+    def __init__(self, frame: pd.DataFrame, prepare: Callable[[pd.DataFrame, str], pd.DataFrame]):
+        self.frame = frame
+        self.prepare = prepare
+        self.built_at = time.time()
+        self._views: Dict[str, _IntervalView] = {}
+
+    def __len__(self):
+        return len(self.frame)
+
+    def _view(self, interval: str) -> _IntervalView:
+        view = self._views.get(interval)
+        if view is None:
+            view = self._views[interval] = _IntervalView(self.prepare(self.frame, interval))
+        return view
+
+    def interval_view(self, interval: str) -> _IntervalView:
+        """NumPy columns and rows of one interval, for scanners outside this class (read-only)."""
+        return self._view(interval)
+
+    def top_movers(self, interval: str, limit: int = 50, descending: bool = True,
+                   min_volume: Optional[float] = None, rsi_min: Optional[float] = None,
+                   rsi_max: Optional[float] = None, exchanges: Optional[Iterable[str]] = None) -> List[dict]:
+        """
+        Gainers (or strict losers) of `interval` by change %. `min_volume` is
+        a minimum 24h volume in USD, whatever the interval.
+        """
+        view = self._view(interval)
+        if limit <= 0:
+            return []
+
+        # NaN compares False, so rows missing a filtered field drop out
+        mask = ~np.isnan(view.change)
+        if not descending:
+            # Losers are strictly negative, as in the upstream-sorted path
+            mask &= view.change < 0
+        if min_volume is not None:
+            mask &= view.volume_usd >= min_volume
+        if rsi_min is not None:
+            mask &= view.rsi >= rsi_min
+        if rsi_max is not None:
+            mask &= view.rsi <= rsi_max
+        if exchanges:
+            mask &= np.isin(view.exchange, [e.upper() for e in exchanges])
+
+        return self._top_k(view, mask, view.change, descending, limit)
+
+    def screen(self, interval: str, where: Optional[Expression] = None, sort: Optional[Expression] = None,
+               descending: bool = True, limit: int = 50) -> List[dict]:
+        """
+        Rows of `interval` matching the compiled filter, ordered by the
+        compiled sort key (change % by default). Rows whose key is NaN are
+        left out.
+        """
+        view = self._view(interval)
+        size = len(view.records)
+        if limit <= 0 or size == 0:
+            return []
+        mask = np.ones(size, dtype=bool) if where is None else where.evaluate(view.columns, size)
+        key = view.change if sort is None else np.asarray(sort.evaluate(view.columns, size), dtype=float)
+        return self._top_k(view, mask & ~np.isnan(key), key, descending, limit)
+
+    @staticmethod
+    def _top_k(view: _IntervalView, mask: np.ndarray, key: np.ndarray, descending: bool, limit: int) -> List[dict]:
+        rows = np.flatnonzero(mask)
+        key = -key[rows] if descending else key[rows]
+        if len(rows) > limit:
+            top = np.argpartition(key, limit - 1)[:limit]
+            rows, key = rows[top], key[top]
+        return [view.records[i] for i in rows[np.argsort(key, kind="stable")]]
@@ -0,0 +1,103 @@
+"""
+Collector write path: per-row select/insert loop vs. one bulk upsert.
+
+Builds synthetic wide screener DataFrames (one row per symbol, every interval
+field as a column) for 100/1,000/10,000 symbols and times how long each path
+takes to persist one collection cycle into a fresh SQLite file. A second
+cycle over the same candles exercises the update branch.
+
+Run from the backend directory:
+    python -m benchmarks.bench_collector_upsert
+"""
+import os
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app.models import MarketDataHistory, HISTORY_INDICATORS
+from app.services.collector import CollectorService
+
+SIZES = [100, 1_000, 10_000]
+# The legacy loop issues symbols x intervals queries; keep it bounded
+LEGACY_MAX_SYMBOLS = 1_000
+
+
+def synthetic_frame(collector, n_symbols, seed=0):
+    rng = np.random.default_rng(seed)
+    data = {"Symbol": [f"BINANCE:SYM{i}USDT" for i in range(n_symbols)]}
+    for interval in collector.intervals:
+        for label in collector._interval_columns(interval).values():
+            data[label] = rng.random(n_symbols) * 100
+    return pd.DataFrame(data)
+
+
+def legacy_store(collector, session, df, symbols, now):
+    """The pre-bulk implementation: one SELECT per (symbol, interval)."""
+    for _, row in df.iterrows():
+        symbol = row.get('Symbol')
+        if symbol not in symbols:
+            continue
+        for interval in collector.intervals:
+            rounded_ts = collector._round_timestamp(now, interval)
+            columns = collector._interval_columns(interval)
+            statement = select(MarketDataHistory).where(
+                MarketDataHistory.symbol == symbol,
+                MarketDataHistory.interval == interval,
+                MarketDataHistory.timestamp == rounded_ts
+            )
+            record = session.exec(statement).first()
+            if not record:
+                record = MarketDataHistory(symbol=symbol, interval=interval, timestamp=rounded_ts)
+                session.add(record)
+            record.open = collector._sanitize_val(row.get(columns["open"]))
+            record.high = collector._sanitize_val(row.get(columns["high"]))
+            record.low = collector._sanitize_val(row.get(columns["low"]))
+            record.close = collector._sanitize_val(row.get(columns["close"]))
+            record.volume = collector._sanitize_val(row.get(columns["volume"]))
+            for name, column in HISTORY_INDICATORS.items():
+                setattr(record, column, collector._sanitize_val(row.get(columns[name])))
+    session.commit()
+
+
+def bulk_store(collector, session, df, symbols, now):
+    records = collector._build_history_records(df, symbols, now)
+    collector._upsert_history(session, records)
+    session.commit()
+
+
+def time_cycles(store, collector, df, symbols):
+    now = datetime(2026, 2, 9, 10, 12, tzinfo=timezone.utc)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        SQLModel.metadata.create_all(engine)
+        timings = []
+        for _ in range(2):  # insert cycle, then update cycle
+            with Session(engine) as session:
+                start = time.perf_counter()
+                store(collector, session, df, symbols, now)
+                timings.append(time.perf_counter() - start)
+        engine.dispose()
+    return timings
+
+
+def main():
+    collector = CollectorService()
+    print(f"{'symbols':>8} {'rows':>7} {'path':>7} {'insert':>10} {'update':>10}")
+    for n in SIZES:
+        df = synthetic_frame(collector, n)
+        symbols = df["Symbol"].tolist()
+        rows = n * len(collector.intervals)
+        paths = [("bulk", bulk_store)]
+        if n <= LEGACY_MAX_SYMBOLS:
+            paths.insert(0, ("legacy", legacy_store))
+        for name, store in paths:
+            insert_s, update_s = time_cycles(store, collector, df, symbols)
+            print(f"{n:>8} {rows:>7} {name:>7} {insert_s * 1000:>8.1f}ms {update_s * 1000:>8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
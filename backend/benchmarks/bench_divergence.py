@@ -0,0 +1,80 @@
+"""
+Divergence scanner: cost of feeding one universe snapshot into the rolling
+window and scanning every symbol, against the broadcast tick.
+
+Fills a 30-bar window for 2,000 symbols with random walks (close and an RSI
+computed from them), then times observe() of a fresh snapshot and a full
+scan() over the matrix, compared with a per-symbol Python loop doing the
+same detection.
+
+Run from the backend directory:
+    python -m benchmarks.bench_divergence
+"""
+import statistics
+import time
+
+import numpy as np
+
+from app.main import BROADCAST_INTERVAL
+from app.services.divergence import DivergenceWindow, detect
+from app.services.indicators import rsi
+
+N_SYMBOLS = 2_000
+BARS = 30
+REPEATS = 50
+HOUR = 3600
+
+
+def random_walks(seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, (N_SYMBOLS, BARS + 50)), axis=1)
+    rsis = np.array([rsi(row) for row in close])
+    return close[:, -BARS:], rsis[:, -BARS:]
+
+
+def filled_window(close, rsis):
+    window = DivergenceWindow("60", bars=BARS)
+    symbols = [f"BINANCE:SYM{i}USDT" for i in range(N_SYMBOLS)]
+    records = [{"Symbol": s} for s in symbols]
+    for bar in range(BARS):
+        window.observe(symbols, close[:, bar], rsis[:, bar], records, (1_000 + bar) * HOUR)
+    return window, symbols, records
+
+
+def per_symbol(close, rsis, recent=3):
+    """The same detection, one symbol at a time."""
+    found = []
+    for row_close, row_rsi in zip(close, rsis):
+        result = detect(row_close[None, :], row_rsi[None, :], recent)
+        found.append(int(result["kind"][0]))
+    return found
+
+
+def timed(func, *args):
+    samples = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        func(*args)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    close, rsis = random_walks()
+    window, symbols, records = filled_window(close, rsis)
+    now = (1_000 + BARS - 1) * HOUR + 60
+
+    observe = timed(window.observe, symbols, close[:, -1], rsis[:, -1], records, now)
+    scan = timed(window.scan, None, 50)
+    loop = timed(per_symbol, window.close, window.rsi)
+    assert per_symbol(window.close, window.rsi) == detect(window.close, window.rsi)["kind"].tolist()
+
+    print(f"{N_SYMBOLS} symbols x {BARS} bars, median of {REPEATS} runs")
+    print(f"observe snapshot: {observe * 1000:8.2f}ms")
+    print(f"scan (batch):     {scan * 1000:8.2f}ms  ({len(window.scan(None, N_SYMBOLS))} divergences)")
+    print(f"scan (per symbol):{loop * 1000:8.2f}ms")
+    print(f"tick budget:      {BROADCAST_INTERVAL * 1000:8.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Event loop latency under a slow upstream.
+
+Measures p50/p99 latency of `GET /` and of `/ws` ping/pong round trips while a
+stream of top-mover requests is stuck on a stubbed TradingView client that
+takes SLOW_UPSTREAM_SECONDS per call. The "blocking" mode reproduces the old
+behaviour of calling the synchronous ScreenerService on the event loop.
+
+Run from the backend directory:
+    python -m benchmarks.bench_event_loop_latency
+"""
+import asyncio
+import json
+import statistics
+import time
+from unittest.mock import patch
+
+import httpx
+import pandas as pd
+
+import app.main as app_main
+from app.services.screener import ScreenerService
+
+SLOW_UPSTREAM_SECONDS = 0.25
+PROBES = 50
+PROBE_SPACING_SECONDS = 0.01
+LOAD_IN_FLIGHT = 2
+
+
+class SlowScreenerStub:
+    """Local stand-in for tvscreener.CryptoScreener with a slow get()."""
+
+    def where(self, *args): return self
+    def set_range(self, *args): return self
+    def sort_by(self, *args, **kwargs): return self
+    def select(self, *args): return self
+
+    def get(self):
+        time.sleep(SLOW_UPSTREAM_SECONDS)
+        return pd.DataFrame({
+            'Symbol': ['BINANCE:BTCUSDT', 'BINANCE:ETHUSDT'],
+            'Price': [98000.0, 3000.0],
+            'Change %': [2.5, 1.5],
+        })
+
+
+class InlineFacade:
+    """Calls the synchronous service directly on the loop (pre-facade behaviour)."""
+
+    def __init__(self, service):
+        self.service = service
+
+    async def get_top_movers(self, limit=50, interval="1D", sort_descending=True, timeout=None):
+        return self.service.get_top_movers(limit=limit, interval=interval, sort_descending=sort_descending)
+
+    def shutdown(self):
+        pass
+
+
+class WebSocketDriver:
+    """Minimal in-process ASGI WebSocket client."""
+
+    def __init__(self, app):
+        self.app = app
+        self.inbox = asyncio.Queue()
+        self.outbox = asyncio.Queue()
+
+    async def connect(self):
+        scope = {
+            "type": "websocket", "path": "/ws", "raw_path": b"/ws", "query_string": b"",
+            "headers": [], "scheme": "ws", "server": ("bench", 80), "client": ("bench", 1),
+            "root_path": "", "subprotocols": [], "asgi": {"version": "3.0"},
+        }
+        await self.inbox.put({"type": "websocket.connect"})
+        self.task = asyncio.create_task(self.app(scope, self.inbox.get, self.outbox.put))
+        accept = await self.outbox.get()
+        assert accept["type"] == "websocket.accept"
+
+    async def receive_json(self):
+        message = await self.outbox.get()
+        return json.loads(message["text"])
+
+    async def send_text(self, text):
+        await self.inbox.put({"type": "websocket.receive", "text": text})
+
+    async def close(self):
+        await self.inbox.put({"type": "websocket.disconnect", "code": 1000})
+        await self.task
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def generate_load(client, stop):
+    # Distinct limits defeat the snapshot cache so every request goes upstream
+    limit = 1
+    pending = set()
+    while not stop.is_set():
+        pending = {t for t in pending if not t.done()}
+        if len(pending) < LOAD_IN_FLIGHT:
+            pending.add(asyncio.create_task(client.get(f"/api/v1/screener/top-movers?limit={limit}")))
+            limit += 1
+        await asyncio.sleep(0.05)
+    await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def measure():
+    transport = httpx.ASGITransport(app=app_main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        ws = WebSocketDriver(app_main.app)
+        await ws.connect()
+        await ws.receive_json()  # welcome
+        await ws.receive_json()  # initial market_update
+
+        stop = asyncio.Event()
+        load = asyncio.create_task(generate_load(client, stop))
+        await asyncio.sleep(0.1)
+
+        # Latency is measured from the time a probe was *scheduled*, so time spent
+        # waiting for a blocked loop to wake up is included.
+        http_samples, ws_samples = [], []
+        origin = time.perf_counter()
+        for i in range(PROBES):
+            target = origin + (2 * i) * PROBE_SPACING_SECONDS
+            await asyncio.sleep(max(0.0, target - time.perf_counter()))
+            await client.get("/")
+            http_samples.append(time.perf_counter() - target)
+
+            target = origin + (2 * i + 1) * PROBE_SPACING_SECONDS
+            await asyncio.sleep(max(0.0, target - time.perf_counter()))
+            await ws.send_text("ping")
+            while (await ws.receive_json()).get("type") != "pong":
+                pass
+            ws_samples.append(time.perf_counter() - target)
+
+        stop.set()
+        await load
+        await ws.close()
+    return http_samples, ws_samples
+
+
+def run(mode):
+    service = ScreenerService()
+    facade = InlineFacade(service) if mode == "blocking" else app_main.AsyncScreenerService(service, max_workers=8)
+    with patch("app.services.screener.CryptoScreener", SlowScreenerStub), \
+            patch.object(app_main, "screener_service", service), \
+            patch.object(app_main, "async_screener", facade):
+        http_samples, ws_samples = asyncio.run(measure())
+    facade.shutdown()
+    for name, samples in (("GET /", http_samples), ("/ws ping", ws_samples)):
+        print(
+            f"{mode:>9} {name:<9} p50={statistics.median(samples) * 1000:8.2f}ms "
+            f"p99={percentile(samples, 99) * 1000:8.2f}ms"
+        )
+
+
+def main():
+    print(f"Slow upstream stub: {SLOW_UPSTREAM_SECONDS}s per call, {PROBES} probes")
+    run("blocking")
+    run("async")
+
+
+if __name__ == "__main__":
+    main()
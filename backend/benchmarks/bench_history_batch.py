@@ -0,0 +1,102 @@
+"""
+Dashboard history load: one /favorites/history call per favorite vs. one
+columnar /favorites/history/batch call.
+
+Stores 20k 5m candles (about ten weeks) for each of 20 favorites in a SQLite
+file and times loading the newest 500 of each the way each endpoint does: the
+per-symbol loop runs a favorite check and a row query per symbol and encodes
+row dicts through jsonable_encoder; the batch path runs one UNION ALL of
+per-pair LIMIT queries and encodes the columns directly. The stored history is
+far deeper than the page on purpose, so a read that scales with the table
+rather than the limit shows up. Payload sizes are reported alongside.
+
+Run from the backend directory:
+    python -m benchmarks.bench_history_batch
+"""
+import json
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from fastapi.encoders import jsonable_encoder
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app.models import Favorite, MarketDataHistory, HISTORY_INDICATORS
+from app.services.favorites_history import BATCH_FIELDS, read_history, read_history_batch
+
+N_FAVORITES = 20
+N_STORED = 20_000
+N_CANDLES = 500
+INTERVAL = "5"
+REPEATS = 10
+
+
+def fill(engine, seed=0):
+    rng = np.random.default_rng(seed)
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    symbols = [f"BINANCE:SYM{i}USDT" for i in range(N_FAVORITES)]
+    SQLModel.metadata.create_all(engine, tables=[Favorite.__table__, MarketDataHistory.__table__])
+    fields = ["open", "high", "low", "close", "volume", *HISTORY_INDICATORS.values()]
+    with engine.begin() as connection:
+        connection.execute(Favorite.__table__.insert(), [{"symbol": s, "added_at": start} for s in symbols])
+        for symbol in symbols:
+            values = rng.uniform(0, 100, (N_STORED, len(fields))).tolist()
+            connection.execute(MarketDataHistory.__table__.insert(), [
+                {"symbol": symbol, "interval": INTERVAL, "timestamp": start + timedelta(minutes=5 * i),
+                 **dict(zip(fields, row))}
+                for i, row in enumerate(values)
+            ])
+    return symbols
+
+
+def per_symbol(engine, symbols):
+    """The dashboard today: one request (favorite check + query) per favorite."""
+    payloads = []
+    for symbol in symbols:
+        with Session(engine) as session:
+            if not session.exec(select(Favorite).where(Favorite.symbol == symbol)).first():
+                continue
+            history = read_history(session, symbol, INTERVAL, N_CANDLES)
+        payloads.append(json.dumps(jsonable_encoder(history)))
+    return payloads
+
+
+def batched(engine, symbols):
+    with Session(engine) as session:
+        known = set(session.exec(select(Favorite.symbol).where(Favorite.symbol.in_(symbols))).all())
+        series = read_history_batch(session, [s for s in symbols if s in known], [INTERVAL], N_CANDLES)
+    return [json.dumps({"fields": BATCH_FIELDS, "series": series, "missing": []})]
+
+
+def timed(func, *args):
+    samples = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        func(*args)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'history.db')}")
+        symbols = fill(engine)
+        loop_payloads, batch_payloads = per_symbol(engine, symbols), batched(engine, symbols)
+        batch_series = json.loads(batch_payloads[0])["series"]
+        assert all(len(batch_series[s][INTERVAL]["close"]) == N_CANDLES for s in symbols)
+
+        loop = timed(per_symbol, engine, symbols)
+        batch = timed(batched, engine, symbols)
+        print(f"{N_FAVORITES} favorites x {N_CANDLES} of {N_STORED} candles, median of {REPEATS} runs")
+        print(f"{'path':>10} {'time':>10} {'bytes':>10}")
+        print(f"{'per-symbol':>10} {loop * 1000:>8.1f}ms {sum(map(len, loop_payloads)):>10}")
+        print(f"{'batch':>10} {batch * 1000:>8.1f}ms {len(batch_payloads[0]):>10}")
+        print(f"speedup: {loop / batch:.1f}x")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Favorites history read path: indicators_json decoded per row vs. typed
+indicator columns selected as plain tuples.
+
+Fills two SQLite files with the same 10,000 candles, one in the legacy
+layout (indicators serialized into an indicators_json text column) and one
+in the current layout, then times building the /favorites/history payload
+and encoding it to JSON the way FastAPI does (jsonable_encoder + json.dumps).
+The legacy read materializes ORM-shaped rows like the old endpoint did.
+
+Run from the backend directory:
+    python -m benchmarks.bench_history_serialization
+"""
+import json
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import text
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.models import MarketDataHistory, HISTORY_INDICATORS
+from app.services.favorites_history import read_history
+
+N_ROWS = 10_000
+REPEATS = 20
+SYMBOL = "BINANCE:BTCUSDT"
+INTERVAL = "5"
+
+LEGACY_DDL = (
+    "CREATE TABLE market_data_history (id INTEGER PRIMARY KEY, symbol VARCHAR NOT NULL, "
+    "timestamp DATETIME NOT NULL, interval VARCHAR NOT NULL, open FLOAT, high FLOAT, low FLOAT, "
+    "close FLOAT, volume FLOAT, indicators_json VARCHAR)",
+    "CREATE UNIQUE INDEX ix_legacy ON market_data_history (symbol, interval, timestamp)",
+)
+
+
+def synthetic_rows(seed=0):
+    rng = np.random.default_rng(seed)
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    values = rng.uniform(0, 100, (N_ROWS, 5 + len(HISTORY_INDICATORS)))
+    rows = []
+    for i, row in enumerate(values.tolist()):
+        candle = {
+            "symbol": SYMBOL, "interval": INTERVAL, "timestamp": start + timedelta(minutes=5 * i),
+            "open": row[0], "high": row[1], "low": row[2], "close": row[3], "volume": row[4],
+        }
+        indicators = dict(zip(HISTORY_INDICATORS, row[5:]))
+        rows.append((candle, indicators))
+    return rows
+
+
+def legacy_engine(path, rows):
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as connection:
+        for statement in LEGACY_DDL:
+            connection.execute(text(statement))
+        connection.execute(
+            text(
+                "INSERT INTO market_data_history (symbol, timestamp, interval, open, high, low, close, volume, "
+                "indicators_json) VALUES (:symbol, :timestamp, :interval, :open, :high, :low, :close, :volume, "
+                ":indicators_json)"
+            ),
+            [
+                {**candle, "timestamp": candle["timestamp"].strftime("%Y-%m-%d %H:%M:%S.%f"),
+                 "indicators_json": json.dumps(indicators)}
+                for candle, indicators in rows
+            ],
+        )
+    return engine
+
+
+def typed_engine(path, rows):
+    engine = create_engine(f"sqlite:///{path}")
+    SQLModel.metadata.create_all(engine, tables=[MarketDataHistory.__table__])
+    with engine.begin() as connection:
+        connection.execute(
+            MarketDataHistory.__table__.insert(),
+            [
+                {**candle, **{HISTORY_INDICATORS[name]: value for name, value in indicators.items()}}
+                for candle, indicators in rows
+            ],
+        )
+    return engine
+
+
+def legacy_read(session, limit):
+    """The pre-column endpoint: whole rows, then json.loads per row."""
+    result = session.execute(text(
+        "SELECT * FROM market_data_history WHERE symbol = :symbol AND interval = :interval "
+        "ORDER BY timestamp DESC LIMIT :limit"
+    ), {"symbol": SYMBOL, "interval": INTERVAL, "limit": limit})
+    history = []
+    for row in result.mappings():
+        data = dict(row)
+        data["timestamp"] = datetime.fromisoformat(data["timestamp"])
+        indicators_json = data.get("indicators_json")
+        if indicators_json:
+            data["indicators"] = json.loads(indicators_json)
+        history.append(data)
+    return history
+
+
+def typed_read(session, limit):
+    return read_history(session, SYMBOL, INTERVAL, limit)
+
+
+def encode(history):
+    return json.dumps(jsonable_encoder(history))
+
+
+def timed(func, *args):
+    samples = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        func(*args)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    rows = synthetic_rows()
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy = legacy_engine(os.path.join(tmp, "legacy.db"), rows)
+        typed = typed_engine(os.path.join(tmp, "typed.db"), rows)
+        print(f"{N_ROWS} candles, median of {REPEATS} runs")
+        print(f"{'path':>8} {'read':>10} {'encode':>10} {'bytes':>10}")
+        results = {}
+        for name, engine, read in [("legacy", legacy, legacy_read), ("typed", typed, typed_read)]:
+            with Session(engine) as session:
+                history = read(session, N_ROWS)
+                assert len(history) == N_ROWS
+                read_time = timed(read, session, N_ROWS)
+                encode_time = timed(encode, history)
+            results[name] = read_time + encode_time
+            print(f"{name:>8} {read_time * 1000:>8.1f}ms {encode_time * 1000:>8.1f}ms {len(encode(history)):>10}")
+            engine.dispose()
+        print(f"speedup: {results['legacy'] / results['typed']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Ticker indexer DB time on a 50k-ticker synthetic catalog.
+
+Times IndexerService.sync_tickers, served by an in-process screener with no
+network latency (so the time is page assembly plus the DB diff), against a
+fresh SQLite file for: the initial load, an unchanged re-sync, and a re-sync
+where CHURN of the catalog was renamed, delisted or newly listed. A slice of
+the catalog is favorited with history so the cascade prune is exercised.
+
+Run from the backend directory:
+    python -m benchmarks.bench_indexer_sync
+"""
+import os
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import pandas as pd
+from sqlmodel import Session, SQLModel, create_engine
+
+import app.services.indexer as indexer_module
+from app.models import Favorite, MarketDataHistory
+from app.services.indexer import IndexerService
+
+N_TICKERS = 50_000
+CHURN = 0.05
+N_FAVORITES = 200
+EXCHANGES = ["BINANCE", "BYBIT", "BITGET", "OKX"]
+
+
+def synthetic_catalog(n, offset=0):
+    rows = []
+    for i in range(offset, offset + n):
+        exchange = EXCHANGES[i % len(EXCHANGES)]
+        rows.append({
+            "Symbol": f"{exchange}:SYM{i}USDT",
+            "Exchange": exchange,
+            "Name": f"SYM{i}USDT",
+            "Description": f"Synthetic {i} / Tether",
+        })
+    return pd.DataFrame(rows)
+
+
+def churned_catalog(catalog):
+    n_churn = int(len(catalog) * CHURN)
+    # Delist the first n_churn rows (these include the favorites), rename the
+    # next n_churn, and list n_churn brand new ones.
+    kept = catalog.iloc[n_churn:].copy()
+    kept.iloc[:n_churn, kept.columns.get_loc("Description")] = "Renamed"
+    return pd.concat([kept, synthetic_catalog(n_churn, offset=len(catalog))], ignore_index=True)
+
+
+def local_screener(catalog):
+    """A CryptoScreener stand-in paging through `catalog` by exchange."""
+    by_exchange = {exchange: page.reset_index(drop=True) for exchange, page in catalog.groupby("Exchange")}
+
+    class Screener:
+        def where(self, condition): self.exchange = condition.value
+        def set_range(self, start, end): self.range = (start, end)
+        def get(self):
+            page = by_exchange.get(self.exchange, catalog.iloc[:0])
+            return page.iloc[self.range[0]:self.range[1]]
+    return Screener
+
+
+def timed_sync(engine, catalog):
+    indexer_module.CryptoScreener = local_screener(catalog)
+    with Session(engine) as session:
+        start = time.perf_counter()
+        IndexerService(session).sync_tickers()
+        return time.perf_counter() - start
+
+
+def main():
+    catalog = synthetic_catalog(N_TICKERS)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        SQLModel.metadata.create_all(engine)
+
+        results = [("initial", timed_sync(engine, catalog))]
+
+        with Session(engine) as session:
+            now = datetime.now(timezone.utc)
+            for symbol in catalog["Symbol"].iloc[:N_FAVORITES]:
+                session.add(Favorite(symbol=symbol))
+                session.add(MarketDataHistory(symbol=symbol, interval="5", timestamp=now))
+            session.commit()
+
+        results.append(("unchanged", timed_sync(engine, catalog)))
+        results.append((f"churn {CHURN:.0%}", timed_sync(engine, churned_catalog(catalog))))
+        engine.dispose()
+
+    print(f"{N_TICKERS} tickers")
+    for name, seconds in results:
+        print(f"{name:>12} {seconds * 1000:>9.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Screener post-processing: per-call column resolution + replace/to_dict vs.
+a cached rename plan + direct record serializer.
+
+Times _process_dataframe plus record conversion on a 1,000-row frame shaped
+like a screener answer (interval fields, colliding default columns, NaNs)
+and checks that both paths serialize to byte-identical JSON.
+
+Run from the backend directory:
+    python -m benchmarks.bench_process_dataframe
+"""
+import json
+import statistics
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.services.records import to_records
+from app.services.screener import ScreenerService
+
+N_ROWS = 1_000
+REPEATS = 200
+INTERVALS = ["1D", "5", "60"]
+
+
+def legacy_process(df, fields_map):
+    """The pre-plan implementation, including the replace/to_dict conversion."""
+    if df.empty: return []
+    target_display_names = [
+        "Price", "Change %", "Volume", "Relative Strength Index (14)",
+        "MACD Level (12, 26)", "MACD Signal (12, 26)",
+        "Simple Moving Average (20)", "Simple Moving Average (50)", "Simple Moving Average (200)"
+    ]
+    source_cols = []
+    for f in fields_map.values():
+        if hasattr(f, "field_name"): source_cols.append(f.field_name)
+        if hasattr(f, "label"): source_cols.append(f.label)
+    cols_to_drop = [c for c in df.columns if c in target_display_names and c not in source_cols]
+    if cols_to_drop:
+        df = df.drop(columns=cols_to_drop)
+    rename_map = {"name": "Symbol", "exchange": "Exchange", "description": "Description"}
+    calc_map = {
+        fields_map["price"]: "Price", fields_map["rsi"]: "Relative Strength Index (14)",
+        fields_map["change"]: "Change %", fields_map["macd"]: "MACD Level (12, 26)",
+        fields_map["macd_sig"]: "MACD Signal (12, 26)", fields_map["sma20"]: "Simple Moving Average (20)",
+        fields_map["sma50"]: "Simple Moving Average (50)", fields_map["sma200"]: "Simple Moving Average (200)",
+        fields_map["volume"]: "Volume"
+    }
+    for f, display_name in calc_map.items():
+        if not f: continue
+        target_name = f.field_name.lower() if hasattr(f, "field_name") else str(f).lower()
+        target_label = f.label.lower() if hasattr(f, "label") else str(f).lower()
+        actual_col = next((col for col in df.columns if col.lower() == target_name or col.lower() == target_label), None)
+        if actual_col: rename_map[actual_col] = display_name
+    return df.rename(columns=rename_map).replace({np.nan: None}).to_dict(orient='records')
+
+
+def planned_process(service, df, fields_map):
+    return to_records(service._process_dataframe(df, fields_map))
+
+
+def synthetic_frame(service, interval, seed=0):
+    rng = np.random.default_rng(seed)
+    data = {
+        "name": [f"BINANCE:SYM{i}USDT" for i in range(N_ROWS)],
+        "exchange": ["BINANCE"] * N_ROWS,
+        "description": [f"Symbol {i}" for i in range(N_ROWS)],
+        "Price": rng.uniform(0, 10, N_ROWS),
+        "Change %": rng.uniform(-5, 5, N_ROWS),
+    }
+    for f in service._get_common_fields(interval).values():
+        column = rng.uniform(-100, 100, N_ROWS)
+        column[rng.random(N_ROWS) < 0.05] = np.nan
+        data[f.label] = column
+    return pd.DataFrame(data)
+
+
+def timed(func, *args):
+    samples = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        func(*args)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    service = ScreenerService()
+    print(f"{N_ROWS} rows, median of {REPEATS} runs")
+    print(f"{'interval':>8} {'legacy':>10} {'planned':>10} {'speedup':>8}")
+    for interval in INTERVALS:
+        fields = service._get_common_fields(interval)
+        df = synthetic_frame(service, interval)
+        legacy_json = json.dumps(legacy_process(df, fields))
+        assert json.dumps(planned_process(service, df, fields)) == legacy_json, "outputs differ"
+        legacy = timed(legacy_process, df, fields)
+        planned = timed(planned_process, service, df, fields)
+        print(f"{interval:>8} {legacy * 1000:>8.2f}ms {planned * 1000:>8.2f}ms {legacy / planned:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
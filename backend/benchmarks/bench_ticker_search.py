@@ -0,0 +1,114 @@
+"""
+Ticker search: in-memory n-gram index and FTS5 mirror vs. the LIKE '%q%' scan.
+
+Loads a 50k-ticker synthetic catalog into a fresh SQLite file and replays
+10k search-box queries (pair prefixes of 2-8 characters, base assets,
+exchanges and full symbols) against TickerSearchIndex and fts_search,
+reporting per-query p50/p99. The LIKE query is replayed for the first
+LIKE_QUERIES of them, and two-word token queries ("<base> <exchange>") are
+replayed against FTS5 only.
+
+Run from the backend directory:
+    python -m benchmarks.bench_ticker_search
+"""
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app.models import TickerIndex
+from app.services.search_index import TickerSearchIndex, fts_search
+
+N_TICKERS = 50_000
+N_QUERIES = 10_000
+LIKE_QUERIES = 500
+EXCHANGES = ["BINANCE", "BYBIT", "BITGET", "OKX"]
+QUOTES = ["USDT", "USDC", "BTC", "USDT.P"]
+
+
+def synthetic_tickers(rng):
+    alphabet = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+    bases = {"".join(rng.choices(alphabet, k=rng.randint(2, 6))) for _ in range(N_TICKERS)}
+    bases = sorted(bases)
+    tickers = {}
+    while len(tickers) < N_TICKERS:
+        exchange = rng.choice(EXCHANGES)
+        name = rng.choice(bases) + rng.choice(QUOTES)
+        tickers[f"{exchange}:{name}"] = TickerIndex(
+            symbol=f"{exchange}:{name}", exchange=exchange, name=name, description=f"{name} synthetic"
+        )
+    return list(tickers.values())
+
+
+def synthetic_queries(rng, tickers):
+    queries = []
+    for _ in range(N_QUERIES):
+        ticker = rng.choice(tickers)
+        kind = rng.random()
+        if kind < 0.7:
+            queries.append(ticker.name[:rng.randint(2, 8)])
+        elif kind < 0.85:
+            queries.append(ticker.name.split("USD")[0])
+        elif kind < 0.95:
+            queries.append(ticker.symbol)
+        else:
+            queries.append(ticker.exchange)
+    return queries
+
+
+def like_search(session, query):
+    query = query.strip().upper()
+    statement = select(TickerIndex).where(
+        (TickerIndex.symbol.like(f"%{query}%")) | (TickerIndex.name.like(f"%{query}%"))
+    )
+    return [r.model_dump() for r in session.exec(statement.limit(50)).all()]
+
+
+def timed(fn, queries):
+    timings = []
+    for q in queries:
+        start = time.perf_counter()
+        fn(q)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return timings
+
+
+def report(name, timings):
+    p50 = statistics.median(timings) * 1e6
+    p99 = timings[int(len(timings) * 0.99) - 1] * 1e6
+    print(f"{name:>8} {len(timings):>7} {p50:>10.1f}us {p99:>10.1f}us")
+
+
+def main():
+    rng = random.Random(0)
+    tickers = synthetic_tickers(rng)
+    queries = synthetic_queries(rng, tickers)
+    token_queries = [f"{t.name[:3]} {t.exchange.lower()}" for t in rng.sample(tickers, N_QUERIES)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        SQLModel.metadata.create_all(engine)
+        with Session(engine) as session:
+            session.add_all(tickers)
+            session.commit()
+
+        with Session(engine) as session:
+            index = TickerSearchIndex()
+            start = time.perf_counter()
+            index.load(session)
+            print(f"Index build: {len(index)} tickers in {(time.perf_counter() - start) * 1000:.0f}ms")
+
+            print(f"{'path':>8} {'queries':>7} {'p50':>12} {'p99':>12}")
+            report("index", timed(index.search, queries))
+            report("fts", timed(lambda q: fts_search(session, q), queries))
+            report("like", timed(lambda q: like_search(session, q), queries[:LIKE_QUERIES]))
+            report("fts 2w", timed(lambda q: fts_search(session, q), token_queries))
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Top-movers queries: per-request upstream sort vs. the local universe snapshot.
+
+The "upstream" path is ScreenerService.get_top_movers with its cache disabled:
+every query builds a CryptoScreener, lets TradingView filter/sort/limit (here
+a mock answering after UPSTREAM_LATENCY with a pre-sorted 50-row frame) and
+post-processes the result. The "local" path answers the same gainers/losers
+queries plus filtered ones (min volume, RSI band, exchange subset) from a
+UniverseSnapshot of N_SYMBOLS rows carrying every interval's fields. The
+one-off snapshot build is reported separately.
+
+Run from the backend directory:
+    python -m benchmarks.bench_universe_movers
+"""
+import statistics
+import time
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+from app.services.screener import ScreenerService
+
+N_SYMBOLS = 3_000
+UPSTREAM_LATENCY = 0.25
+UPSTREAM_QUERIES = 8
+LOCAL_QUERIES = 2_000
+EXCHANGES = ["BINANCE", "BYBIT", "BITGET", "OKX"]
+
+
+def synthetic_universe(service, n, seed=0):
+    rng = np.random.default_rng(seed)
+    data = {
+        "name": [f"{EXCHANGES[i % 4]}:SYM{i}USDT" for i in range(n)],
+        "exchange": [EXCHANGES[i % 4] for i in range(n)],
+        "description": [f"Symbol {i}" for i in range(n)],
+    }
+    for interval in service.interval_map:
+        for f in service._get_common_fields(interval).values():
+            data.setdefault(f.label, rng.uniform(-15, 15, n))
+    return pd.DataFrame(data)
+
+
+class SlowScreener:
+    """Stands in for CryptoScreener: answers every query with the same frame after a delay."""
+
+    def __init__(self, frame):
+        self.frame = frame
+
+    def __call__(self):
+        return self
+
+    def where(self, *args): pass
+
+    def set_range(self, *args): pass
+
+    def sort_by(self, *args, **kwargs): pass
+
+    def select(self, *args): pass
+
+    def get(self):
+        time.sleep(UPSTREAM_LATENCY)
+        return self.frame
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return statistics.median(samples), samples[int(len(samples) * 0.99) - 1]
+
+
+def bench_upstream(service, universe):
+    page = universe.sort_values("Change %", ascending=False).head(50)
+    service.movers_cache.ttl = 0
+    timings = []
+    with patch("app.services.screener.CryptoScreener", SlowScreener(page)):
+        for i in range(UPSTREAM_QUERIES):
+            start = time.perf_counter()
+            service.get_top_movers(limit=50, interval="1D", sort_descending=i % 2 == 0)
+            timings.append(time.perf_counter() - start)
+    return timings
+
+
+def bench_local(service, universe):
+    rng = np.random.default_rng(1)
+    intervals = list(service.interval_map)
+    with patch("app.services.screener.CryptoScreener", SlowScreener(universe)):
+        service.universe_cache.ttl = 3600
+        start = time.perf_counter()
+        snapshot = service.get_universe()
+        for interval in intervals:
+            snapshot.top_movers(interval, 1)
+        build = time.perf_counter() - start - UPSTREAM_LATENCY
+
+    plain, filtered = [], []
+    for _ in range(LOCAL_QUERIES):
+        interval = intervals[rng.integers(len(intervals))]
+        descending = bool(rng.integers(2))
+        start = time.perf_counter()
+        service.query_movers(limit=50, interval=interval, sort_descending=descending)
+        plain.append(time.perf_counter() - start)
+
+        low = float(rng.uniform(10, 50))
+        start = time.perf_counter()
+        service.query_movers(
+            limit=50, interval=interval, sort_descending=descending, min_volume=0.0,
+            rsi_min=low, rsi_max=low + 40, exchanges=EXCHANGES[:2],
+        )
+        filtered.append(time.perf_counter() - start)
+    return build, plain, filtered
+
+
+def main():
+    service = ScreenerService()
+    universe = synthetic_universe(service, N_SYMBOLS)
+    print(f"{N_SYMBOLS} symbols x {len(service.interval_map)} intervals, upstream latency {UPSTREAM_LATENCY * 1000:.0f}ms")
+
+    upstream = bench_upstream(service, universe)
+    build, plain, filtered = bench_local(service, universe)
+
+    print(f"{'path':>16} {'p50':>10} {'p99':>10}")
+    for name, samples in (("upstream sort", upstream), ("local", plain), ("local + filters", filtered)):
+        p50, p99 = percentiles(samples)
+        print(f"{name:>16} {p50 * 1e6:>8.0f}us {p99 * 1e6:>8.0f}us")
+    print(f"snapshot build (all intervals, excluding fetch): {build * 1000:.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
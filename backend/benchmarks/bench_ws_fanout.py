@@ -0,0 +1,109 @@
+"""
+WebSocket fan-out load test: 1,000 simulated clients.
+
+Each simulated client takes SEND_LATENCY seconds per send and SLOW_FRACTION
+of them take SLOW_LATENCY (a congested link). For every tick a 50-row
+market_update is broadcast and the time from the tick to the last delivery
+to a healthy client is recorded. The "legacy" path is the old sequential
+`await send_json` loop; "fanout" is ConnectionManager.broadcast.
+
+Run from the backend directory:
+    python -m benchmarks.bench_ws_fanout
+"""
+import asyncio
+import json
+import random
+import statistics
+import time
+
+from app.main import ConnectionManager
+
+N_CLIENTS = 1_000
+TICKS = 10
+SEND_LATENCY = 0.0005
+SLOW_FRACTION = 0.01
+SLOW_LATENCY = 0.2
+
+
+class SimulatedClient:
+    def __init__(self, latency):
+        self.latency = latency
+        self.slow = latency >= SLOW_LATENCY
+        self.last_delivery = 0.0
+
+    async def accept(self): pass
+
+    async def close(self, code=1000): pass
+
+    async def send_text(self, text):
+        await asyncio.sleep(self.latency)
+        self.last_delivery = time.perf_counter()
+
+    async def send_json(self, message):
+        await self.send_text(json.dumps(message))
+
+
+def payload(rng):
+    return {
+        "type": "market_update",
+        "data": [
+            {"Symbol": f"BINANCE:T{i}USDT", "Price": rng.uniform(1, 100), "Change %": rng.uniform(-10, 10),
+             "Volume": rng.randint(1, 10 ** 9), "Relative Strength Index (14)": rng.uniform(0, 100)}
+            for i in range(50)
+        ],
+    }
+
+
+def make_clients(rng):
+    return [
+        SimulatedClient(SLOW_LATENCY if rng.random() < SLOW_FRACTION else SEND_LATENCY)
+        for _ in range(N_CLIENTS)
+    ]
+
+
+async def legacy_tick(clients, message):
+    for client in clients:
+        try:
+            await client.send_json(message)
+        except Exception:
+            pass
+
+
+async def run(mode):
+    rng = random.Random(0)
+    clients = make_clients(rng)
+    manager = ConnectionManager(send_timeout=1.0)
+    if mode == "fanout":
+        for client in clients:
+            await manager.connect(client)
+
+    healthy = [c for c in clients if not c.slow]
+    latencies = []
+    for _ in range(TICKS):
+        message = payload(rng)
+        start = time.perf_counter()
+        if mode == "legacy":
+            await legacy_tick(clients, message)
+        else:
+            await manager.broadcast(message)
+            # Wait until every healthy client has this tick
+            while min(c.last_delivery for c in healthy) < start:
+                await asyncio.sleep(0.0005)
+        latencies.append(max(c.last_delivery for c in healthy) - start)
+        await asyncio.sleep(0.05)
+
+    for client in clients:
+        manager.disconnect(client)
+    return latencies
+
+
+def main():
+    print(f"{N_CLIENTS} clients, {SLOW_FRACTION:.0%} slow ({SLOW_LATENCY * 1000:.0f}ms sends)")
+    print(f"{'path':>8} {'p50':>10} {'max':>10}")
+    for mode in ("legacy", "fanout"):
+        latencies = asyncio.run(run(mode))
+        print(f"{mode:>8} {statistics.median(latencies) * 1000:>8.1f}ms {max(latencies) * 1000:>8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
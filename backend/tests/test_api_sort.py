@@ -10,15 +10,15 @@ def test_get_top_movers_sort_desc():
         mock_get.return_value = []
         # Test default
         client.get("/api/v1/screener/top-movers")
-        mock_get.assert_called_with(limit=50, interval='1D', sort_descending=True)
+        mock_get.assert_called_with(limit=50, interval='1D', sort_descending=True, strict=False)
         
         # Test explicit desc
         client.get("/api/v1/screener/top-movers?sort=desc")
-        mock_get.assert_called_with(limit=50, interval='1D', sort_descending=True)
+        mock_get.assert_called_with(limit=50, interval='1D', sort_descending=True, strict=False)
 
 def test_get_top_movers_sort_asc():
     with patch('app.services.screener.ScreenerService.get_top_movers') as mock_get:
         mock_get.return_value = []
         # Test asc
         client.get("/api/v1/screener/top-movers?sort=asc")
-        mock_get.assert_called_with(limit=50, interval='1D', sort_descending=False)
+        mock_get.assert_called_with(limit=50, interval='1D', sort_descending=False, strict=False)
@@ -0,0 +1,57 @@
+import asyncio
+import time
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from app.main import app
+from app.services.async_screener import AsyncScreenerService
+from app.services.screener import ScreenerService
+
+
+def slow_top_movers(self, limit=50, interval="1D", sort_descending=True, strict=False):
+    time.sleep(0.5)
+    return [{"Symbol": "BINANCE:BTCUSDT", "Change %": 1.0}]
+
+
+def test_event_loop_not_blocked_by_slow_upstream():
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            slow = asyncio.create_task(client.get("/api/v1/screener/top-movers?limit=7"))
+            await asyncio.sleep(0.05)
+            start = time.perf_counter()
+            root = await client.get("/")
+            root_latency = time.perf_counter() - start
+            movers = await slow
+        return root, root_latency, movers
+
+    with patch.object(ScreenerService, "get_top_movers", slow_top_movers):
+        root, root_latency, movers = asyncio.run(scenario())
+
+    assert root.status_code == 200
+    assert movers.status_code == 200
+    assert root_latency < 0.25
+
+
+def test_facade_timeout_raises():
+    facade = AsyncScreenerService(ScreenerService(), max_workers=1, timeout=0.05)
+    with patch.object(ScreenerService, "get_top_movers", slow_top_movers):
+        with pytest.raises(TimeoutError):
+            asyncio.run(facade.get_top_movers())
+    facade.shutdown()
+
+
+def test_top_movers_timeout_maps_to_504():
+    from app.main import async_screener
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/api/v1/screener/top-movers")
+
+    with patch.object(ScreenerService, "get_top_movers", slow_top_movers), \
+            patch.object(async_screener, "timeout", 0.05):
+        response = asyncio.run(scenario())
+    assert response.status_code == 504
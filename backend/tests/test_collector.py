@@ -51,6 +51,28 @@ def test_purge_old_data(session):
     # SQLite might return naive datetime, so we compare without tz or normalize
     assert remaining[0].timestamp.replace(tzinfo=timezone.utc) == now.replace(tzinfo=timezone.utc)
 
+def test_purge_old_data_per_interval_batches(session):
+    collector = CollectorService()
+    import app.services.collector
+    app.services.collector.engine = session.get_bind()
+
+    now = datetime.now(timezone.utc)
+    for days in range(1, 31):
+        session.add(MarketDataHistory(symbol="BTCUSD", interval="5", timestamp=now - timedelta(days=days, hours=-1)))
+    session.add(MarketDataHistory(symbol="BTCUSD", interval="1D", timestamp=now - timedelta(days=400)))
+    session.add(MarketDataHistory(symbol="BTCUSD", interval="60", timestamp=now - timedelta(days=200)))
+    session.commit()
+
+    stats = collector.purge_old_data(
+        retention={"5": timedelta(days=14), "1D": timedelta(days=5 * 365)},
+        batch_size=4
+    )
+
+    assert stats["by_interval"] == {"5": 16, "1D": 0, "default": 1}
+    assert stats["deleted"] == 17
+    remaining = session.exec(select(MarketDataHistory)).all()
+    assert sorted(h.interval for h in remaining) == ["1D"] + ["5"] * 14
+
 def test_collect_all(session, monkeypatch):
     collector = CollectorService()
     import app.services.collector
@@ -93,3 +115,190 @@ def test_collect_all(session, monkeypatch):
     assert len(history) == 1
     assert history[0].symbol == "BINANCE:BTCUSDT"
     assert history[0].close == 98200.0
+
+def test_collect_symbols_upserts_on_conflict(session, monkeypatch):
+    collector = CollectorService()
+    import app.services.collector
+    app.services.collector.engine = session.get_bind()
+
+    prices = iter([98200.0, 98300.0])
+
+    class MockScreener:
+        def select(self, *args): pass
+        def set_range(self, *args): pass
+        def get(self):
+            price = next(prices)
+            return pd.DataFrame([
+                {"Symbol": "BINANCE:BTCUSDT", "Price (5)": price, "Price (60)": price,
+                 "Relative Strength Index (14) (5)": 55.0},
+                {"Symbol": "BINANCE:NOTREQUESTED", "Price (5)": 1.0, "Price (60)": 1.0},
+            ])
+
+    class FixedDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime(2026, 2, 9, 10, 12, 34, tzinfo=timezone.utc)
+
+    monkeypatch.setattr("app.services.collector.CryptoScreener", lambda: MockScreener())
+    # Keep both cycles inside the same candle
+    monkeypatch.setattr("app.services.collector.datetime", FixedDatetime)
+    collector.intervals = ["5", "60"]
+
+    collector.collect_symbols(["BINANCE:BTCUSDT"])
+    collector.collect_symbols(["BINANCE:BTCUSDT"])
+
+    session.expire_all()
+    history = session.exec(select(MarketDataHistory).order_by(MarketDataHistory.interval)).all()
+    assert [(h.symbol, h.interval) for h in history] == [("BINANCE:BTCUSDT", "5"), ("BINANCE:BTCUSDT", "60")]
+    # The second cycle updated the same candles in place
+    assert all(h.close == 98300.0 for h in history)
+    assert history[0].rsi == 55.0
+    assert history[1].rsi is None
+
+def test_collect_symbols_batches_and_isolates_bad_symbols(session, monkeypatch):
+    import threading
+    import time as time_module
+    import app.services.collector
+    app.services.collector.engine = session.get_bind()
+
+    requests, active, peak = [], [0], [0]
+    lock = threading.Lock()
+
+    class MockScreener:
+        symbols = None
+        def select(self, *args): pass
+        def set_range(self, *args): pass
+        def get(self):
+            tickers = self.symbols["tickers"]
+            with lock:
+                requests.append(list(tickers))
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time_module.sleep(0.02)
+            with lock:
+                active[0] -= 1
+            if "BINANCE:BAD" in tickers:
+                raise ValueError("invalid symbol")
+            return pd.DataFrame([{"Symbol": t, "Price (5)": 1.0} for t in tickers])
+
+    monkeypatch.setattr("app.services.collector.CryptoScreener", MockScreener)
+    collector = CollectorService()
+    collector.intervals = ["5"]
+    collector.batch_size = 3
+    collector.batch_concurrency = 2
+    collector.batch_retries = 1
+    collector.retry_backoff = 0
+
+    symbols = [f"BINANCE:S{i}" for i in range(8)]
+    symbols.insert(4, "BINANCE:BAD")
+    report = collector.collect_symbols(symbols)
+
+    assert max(len(r) for r in requests) <= 3
+    assert peak[0] == 2
+    assert report["failed"] == ["BINANCE:BAD"]
+    assert report["stored"] == 8
+    # 3 batches; the bad one is split twice before the symbol is isolated,
+    # and a rejected request is never retried as is
+    failed_batches = [b for b in report["batches"] if not b["ok"]]
+    assert [b["symbols"] for b in failed_batches] == [3, 2, 1]
+    assert all(b["attempts"] == 1 and not b["transient"] and b["seconds"] >= 0 for b in failed_batches)
+    stored = session.exec(select(MarketDataHistory.symbol)).all()
+    assert sorted(stored) == sorted(s for s in symbols if s != "BINANCE:BAD")
+
+def _failing_screener(error, calls):
+    class MockScreener:
+        symbols = None
+        def select(self, *args): pass
+        def set_range(self, *args): pass
+        def get(self):
+            calls.append(list(self.symbols["tickers"]))
+            raise error
+    return MockScreener
+
+def test_collect_symbols_backs_off_when_upstream_is_down(session, monkeypatch):
+    from tvscreener.exceptions import MalformedRequestException
+    from app.services.collector import CollectorUpstreamError
+    import app.services.collector
+    app.services.collector.engine = session.get_bind()
+
+    calls = []
+    error = MalformedRequestException(0, "Connection refused", "https://scanner.example", "{}")
+    monkeypatch.setattr("app.services.collector.CryptoScreener", _failing_screener(error, calls))
+    collector = CollectorService()
+    collector.intervals = ["5"]
+    collector.batch_size = 3
+    collector.batch_concurrency = 2
+    collector.batch_retries = 2
+    collector.retry_backoff = 0
+
+    symbols = [f"BINANCE:S{i}" for i in range(30)]
+    with pytest.raises(CollectorUpstreamError) as raised:
+        collector.collect_symbols(symbols)
+
+    # Only the batches already running are retried; nothing is split or queued after the first failure
+    assert len(calls) <= collector.batch_concurrency * (collector.batch_retries + 1)
+    assert max(len(c) for c in calls) == 3
+    report = raised.value.report
+    assert sorted(report["failed"]) == sorted(symbols)
+    assert report["stored"] == 0
+
+def test_collect_symbols_does_not_bisect_when_every_batch_is_rejected(session, monkeypatch):
+    from app.services.collector import CollectorUpstreamError
+    import app.services.collector
+    app.services.collector.engine = session.get_bind()
+
+    calls = []
+    monkeypatch.setattr("app.services.collector.CryptoScreener", _failing_screener(ValueError("bad payload"), calls))
+    collector = CollectorService()
+    collector.intervals = ["5"]
+    collector.batch_size = 3
+    collector.batch_concurrency = 2
+    collector.batch_retries = 2
+    collector.retry_backoff = 0
+
+    symbols = [f"BINANCE:S{i}" for i in range(9)]
+    with pytest.raises(CollectorUpstreamError):
+        collector.collect_symbols(symbols)
+    assert len(calls) == 3
+
+def test_is_transient():
+    from tvscreener.exceptions import MalformedRequestException
+    from app.services.collector import is_transient
+
+    assert is_transient(MalformedRequestException(0, "Connection reset", "https://scanner.example", "{}"))
+    assert is_transient(MalformedRequestException(408, "Timeout", "https://scanner.example", "{}"))
+    assert is_transient(MalformedRequestException(429, "Too Many Requests", "https://scanner.example", "{}"))
+    assert is_transient(MalformedRequestException(502, "Bad Gateway", "https://scanner.example", "{}"))
+    assert not is_transient(MalformedRequestException(400, "unknown field", "https://scanner.example", "{}"))
+    assert not is_transient(ValueError("invalid symbol"))
+
+def test_collect_symbols_stamps_the_candle_open_when_the_cycle_started(session, monkeypatch):
+    import app.services.collector
+    app.services.collector.engine = session.get_bind()
+
+    # The cycle starts just before the 10:10 close and the fetch runs past it
+    clock = [datetime(2026, 2, 9, 10, 9, 55, tzinfo=timezone.utc)]
+
+    class SlowClock(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return clock[0]
+
+    class MockScreener:
+        symbols = None
+        def select(self, *args): pass
+        def set_range(self, *args): pass
+        def get(self):
+            clock[0] += timedelta(seconds=10)
+            return pd.DataFrame([{"Symbol": t, "Price (5)": 1.0} for t in self.symbols["tickers"]])
+
+    monkeypatch.setattr("app.services.collector.datetime", SlowClock)
+    monkeypatch.setattr("app.services.collector.CryptoScreener", MockScreener)
+    collector = CollectorService()
+    collector.intervals = ["5"]
+    collector.retry_backoff = 0
+
+    collector.collect_symbols(["BINANCE:BTCUSDT"])
+
+    stored = session.exec(select(MarketDataHistory)).one()
+    assert stored.timestamp.replace(tzinfo=timezone.utc) == datetime(2026, 2, 9, 10, 5, tzinfo=timezone.utc)
@@ -0,0 +1,165 @@
+from sqlmodel import Session, select, create_engine, SQLModel
+from sqlalchemy import inspect, text
+from app.models import MarketDataHistory
+from app.database import make_engine, migrate_market_data_history, migrate_history_indicators
+from datetime import datetime, timezone
+import pytest
+
+INDEX_NAME = "ix_market_data_history_symbol_interval_timestamp"
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+def test_history_query_uses_composite_index(engine):
+    statement = select(MarketDataHistory).where(
+        MarketDataHistory.symbol == "BINANCE:BTCUSDT",
+        MarketDataHistory.interval == "5"
+    ).order_by(MarketDataHistory.timestamp.desc()).limit(100)
+    compiled = statement.compile(engine, compile_kwargs={"literal_binds": True})
+
+    with engine.connect() as connection:
+        plan = " ".join(row[-1] for row in connection.execute(text(f"EXPLAIN QUERY PLAN {compiled}")))
+
+    assert INDEX_NAME in plan
+    # Ordering comes straight from the index, no separate sort step
+    assert "TEMP B-TREE" not in plan
+
+def test_duplicate_candle_rejected(engine):
+    ts = datetime(2026, 2, 9, 10, 10, tzinfo=timezone.utc)
+    with Session(engine) as session:
+        session.add(MarketDataHistory(symbol="BINANCE:BTCUSDT", interval="5", timestamp=ts))
+        session.add(MarketDataHistory(symbol="BINANCE:BTCUSDT", interval="5", timestamp=ts))
+        with pytest.raises(Exception):
+            session.commit()
+
+def test_migration_deduplicates_legacy_table():
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+    with engine.begin() as connection:
+        # Simulate a database created before the unique index existed
+        connection.execute(text(f"DROP INDEX {INDEX_NAME}"))
+        for close in (1.0, 2.0):
+            connection.execute(text(
+                "INSERT INTO market_data_history (symbol, interval, timestamp, close) "
+                "VALUES ('BINANCE:BTCUSDT', '5', '2026-02-09 10:10:00.000000', :close)"
+            ), {"close": close})
+        connection.execute(text(
+            "INSERT INTO market_data_history (symbol, interval, timestamp, close) "
+            "VALUES ('BINANCE:BTCUSDT', '60', '2026-02-09 10:00:00.000000', 3.0)"
+        ))
+
+    with engine.begin() as connection:
+        migrate_market_data_history(connection)
+        # Running it again is a no-op
+        migrate_market_data_history(connection)
+
+    assert INDEX_NAME in {ix["name"] for ix in inspect(engine).get_indexes("market_data_history")}
+    with Session(engine) as session:
+        history = session.exec(select(MarketDataHistory).order_by(MarketDataHistory.interval)).all()
+        # The most recently written duplicate wins
+        assert [(h.interval, h.close) for h in history] == [("5", 2.0), ("60", 3.0)]
+
+def test_migration_moves_indicator_json_into_columns():
+    engine = create_engine("sqlite://")
+    with engine.begin() as connection:
+        # The pre-column layout
+        connection.execute(text(
+            "CREATE TABLE market_data_history (id INTEGER PRIMARY KEY, symbol VARCHAR, timestamp DATETIME, "
+            "interval VARCHAR, open FLOAT, high FLOAT, low FLOAT, close FLOAT, volume FLOAT, indicators_json VARCHAR)"
+        ))
+        rows = [
+            ("5", '{"RSI": 55.5, "MACD": 1.2, "MACD_Signal": 0.8, "SMA20": 10.0, "SMA50": null, "SMA200": 9.0}'),
+            ("60", None),
+            ("15", "not json"),
+        ]
+        for interval, payload in rows:
+            connection.execute(text(
+                "INSERT INTO market_data_history (symbol, timestamp, interval, close, indicators_json) "
+                "VALUES ('BINANCE:BTCUSDT', '2026-02-09 10:00:00.000000', :interval, 1.0, :payload)"
+            ), {"interval": interval, "payload": payload})
+
+    with engine.begin() as connection:
+        migrate_history_indicators(connection)
+        # Running it again is a no-op
+        migrate_history_indicators(connection)
+
+    assert "indicators_json" not in {c["name"] for c in inspect(engine).get_columns("market_data_history")}
+    with Session(engine) as session:
+        history = {h.interval: h for h in session.exec(select(MarketDataHistory)).all()}
+    assert (history["5"].rsi, history["5"].macd, history["5"].macd_signal) == (55.5, 1.2, 0.8)
+    assert (history["5"].sma20, history["5"].sma50, history["5"].sma200) == (10.0, None, 9.0)
+    assert history["60"].rsi is None and history["15"].rsi is None
+    assert history["15"].close == 1.0
+
+def test_file_engine_profile(tmp_path):
+    engine = make_engine(f"sqlite:///{tmp_path / 'profile.db'}")
+    with engine.connect() as connection:
+        pragma = lambda name: connection.execute(text(f"PRAGMA {name}")).scalar()
+        assert pragma("journal_mode") == "wal"
+        assert pragma("synchronous") == 1  # NORMAL
+        assert pragma("busy_timeout") == 5000
+    assert engine.echo is False
+
+def test_history_reads_while_collector_writes(tmp_path):
+    import statistics
+    import threading
+    import time
+    from datetime import timedelta
+    from app.services.collector import CollectorService
+    from app.services.favorites_history import read_history
+
+    engine = make_engine(f"sqlite:///{tmp_path / 'concurrent.db'}")
+    SQLModel.metadata.create_all(engine)
+    collector = CollectorService()
+    symbols = [f"BINANCE:T{i}USDT" for i in range(20)]
+    start = datetime(2026, 2, 9, tzinfo=timezone.utc)
+
+    def records(cycle):
+        return [
+            {"symbol": symbol, "interval": "5", "timestamp": start + timedelta(minutes=5 * (cycle + i)),
+             "open": 1.0, "high": 2.0, "low": 0.5, "close": float(cycle), "volume": 1.0}
+            for symbol in symbols for i in range(25)
+        ]
+
+    errors, latencies = [], []
+    stop = threading.Event()
+
+    def writer():
+        try:
+            for cycle in range(10):
+                with Session(engine) as session:
+                    collector._upsert_history(session, records(cycle))
+                    session.commit()
+        except Exception as e:
+            errors.append(e)
+        finally:
+            stop.set()
+
+    def reader(symbol):
+        try:
+            while not stop.is_set():
+                began = time.perf_counter()
+                with Session(engine) as session:
+                    read_history(session, symbol, "5", 100)
+                latencies.append(time.perf_counter() - began)
+                time.sleep(0.005)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=reader, args=(symbols[i % len(symbols)],)) for i in range(50)]
+    threads.append(threading.Thread(target=writer))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=60)
+
+    assert not errors, errors
+    assert stop.is_set() and latencies
+    with Session(engine) as session:
+        assert len(read_history(session, symbols[0], "5", 1000)) == 34
+    p95 = statistics.quantiles(latencies, n=20)[-1]
+    print(f"{len(latencies)} history reads alongside 10 upserts, p95 {p95 * 1000:.1f}ms")
+    assert p95 < 1.0
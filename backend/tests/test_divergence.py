@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+import pytest
+from app.services.channels import parse_channel
+from app.services.divergence import DivergenceWindow, detect
+from app.services.screener import ScreenerService
+
+# 10 bars: a low at bar 3, a rally, then a lower price low at bar 8
+V_PRICE = [10, 9, 8, 7, 8, 9, 8, 7.5, 6.5, 7]
+
+def test_detects_bullish_and_bearish_divergences():
+    close = np.array([
+        V_PRICE,
+        V_PRICE,                                   # RSI confirms the lower low
+        [20 - p for p in V_PRICE],                 # mirrored: higher high
+        V_PRICE[:8] + [np.nan, np.nan],            # recent bars missing
+    ], dtype=float)
+    rsi = np.array([
+        [50, 40, 35, 25, 40, 45, 40, 35, 30, 32],  # higher RSI low: bullish
+        [50, 40, 35, 30, 40, 45, 40, 30, 22, 25],
+        [50, 60, 65, 75, 60, 55, 60, 65, 70, 68],  # lower RSI high: bearish
+        [50, 40, 35, 25, 40, 45, 40, 35, 30, 32],
+    ], dtype=float)
+    found = detect(close, rsi, recent=3)
+    assert found["kind"].tolist() == [1, 0, 2, 0]
+    assert found["strength"][0] == 5.0 and found["strength"][2] == 5.0
+    assert (found["prior_price"][0], found["pivot_price"][0], found["bars_apart"][0]) == (7.0, 6.5, 5)
+
+def test_prior_extreme_must_be_a_swing():
+    # Price only falls: the prior low is the last bar before the recent ones
+    close = np.array([[10, 9, 8, 7, 6, 5, 4, 3, 2, 1]], dtype=float)
+    rsi = np.array([[50, 45, 40, 35, 30, 25, 20, 30, 35, 40]], dtype=float)
+    assert detect(close, rsi, recent=3)["kind"].tolist() == [0]
+
+def test_window_rolls_per_bar():
+    window = DivergenceWindow("60", bars=4, recent=1)
+    records = [{"Symbol": "A"}, {"Symbol": "B"}]
+    hour = 3600
+    window.observe(["A", "B"], np.array([1.0, 2.0]), np.array([10.0, 20.0]), records, 100 * hour)
+    # Same bar: the forming column is overwritten
+    window.observe(["A", "B"], np.array([1.5, 2.5]), np.array([15.0, 25.0]), records, 100 * hour + 60)
+    assert window.close[:, -1].tolist() == [1.5, 2.5]
+    # Two bars later with only A: the missed bar stays empty
+    window.observe(["A"], np.array([3.0]), np.array([30.0]), records[:1], 102 * hour)
+    assert np.isnan(window.close[0, 2]) and window.close[0].tolist()[1::2] == [1.5, 3.0]
+    # B has no data left once its bar leaves the window
+    window.observe(["A"], np.array([4.0]), np.array([40.0]), records[:1], 105 * hour)
+    assert len(window) == 1
+
+def universe_frame(step, n=50):
+    # Half the symbols make a bullish divergence over the bars, the rest trend up
+    rows = []
+    for i in range(n):
+        diverging = i % 2 == 0
+        price = V_PRICE[step] if diverging else 10 + step
+        rsi = [50, 40, 35, 25, 40, 45, 40, 35, 30, 32][step] if diverging else 50 + step
+        rows.append({"Symbol": f"BINANCE:T{i}USDT", "Exchange": "BINANCE", "Price": price,
+                     "Relative Strength Index (14)": rsi, "Change %": 1.0, "Volume": 1e6})
+    return pd.DataFrame(rows)
+
+def test_service_scans_universe_snapshots(monkeypatch):
+    service = ScreenerService(universe_ttl=0)
+    clock = {"step": 0}
+    monkeypatch.setattr(service, "_fetch_universe", lambda: universe_frame(clock["step"]))
+    monkeypatch.setattr(service, "_interval_frame", lambda frame, interval: frame)
+    monkeypatch.setattr("app.services.universe.time.time", lambda: 1_000_000 * 3600 + clock["step"] * 3600)
+
+    # One bar seen: no signals yet, and the fill level says why
+    assert service.get_divergences("60") == {"interval": "60", "bars": 1, "window": 30, "divergences": []}
+    for step in range(1, 10):
+        clock["step"] = step
+        service.get_universe()  # every snapshot feeds the windows, requested or not
+    scan = service.get_divergences("60", kind="bullish", limit=100)
+    rows = scan["divergences"]
+    assert scan["bars"] == 10
+    assert len(rows) == 25 and {r["Divergence"] for r in rows} == {"bullish"}
+    assert rows[0]["Symbol"] == "BINANCE:T0USDT" and rows[0]["Bars Apart"] == 5
+    assert service.get_divergences("60", kind="bearish")["divergences"] == []
+    # The 5m window was fed by the same hourly snapshots; 30 bars span the last three
+    assert service.get_divergences("5")["bars"] == 3
+    with pytest.raises(ValueError):
+        service.get_divergences("60", kind="sideways")
+    # A 1D window would take a month of uptime to fill
+    with pytest.raises(ValueError):
+        service.get_divergences("1D")
+
+def test_divergence_channel():
+    assert parse_channel("divergence:60", ["60", "1D"]).kind == "divergence"
+    with pytest.raises(ValueError):
+        parse_channel("divergence:7", ["60"])
+    with pytest.raises(ValueError):
+        parse_channel("divergence:1D", ["60", "1D"])
+
+def test_window_fill_level():
+    window = DivergenceWindow("60", bars=5)
+    assert window.filled == 0
+    hour = 3600
+    for bar in (100, 101, 101, 103):
+        window.observe(["A"], np.array([1.0]), np.array([50.0]), [{"Symbol": "A"}], bar * hour)
+    # Bars 100, 101 and 103 hold data; the missed bar 102 does not count
+    assert window.filled == 3
+    window.observe(["A"], np.array([1.0]), np.array([50.0]), [{"Symbol": "A"}], 110 * hour)
+    assert window.filled == 1
+
+def test_divergence_endpoint_rejects_bad_queries():
+    from fastapi.testclient import TestClient
+    from app.main import app
+    client = TestClient(app)
+    assert client.get("/api/v1/screener/divergences", params={"kind": "sideways"}).status_code == 400
+    assert client.get("/api/v1/screener/divergences", params={"interval": "7"}).status_code == 400
+    assert client.get("/api/v1/screener/divergences", params={"interval": "1W"}).status_code == 400
+
+def test_divergence_channel_publishes_fill_level():
+    import asyncio
+    from unittest.mock import patch
+    from app.main import load_channel
+    scan = {"interval": "60", "bars": 4, "window": 30, "divergences": []}
+    with patch("app.services.screener.ScreenerService.get_divergences", return_value=scan):
+        data = asyncio.run(load_channel("divergence:60"))
+    assert data.rows == [] and data.meta == {"interval": "60", "bars": 4, "window": 30}
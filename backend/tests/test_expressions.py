@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+import pytest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from app.services.expressions import ExpressionError, compile_expression, compile_filter, compile_sort
+from app.services.screener import ScreenerService
+from app.services.universe import UniverseSnapshot
+
+COLUMNS = {
+    "rsi": np.array([25.0, 45.0, 28.0, np.nan]),
+    "change": np.array([1.5, 3.0, -2.0, 4.0]),
+    "volume": np.array([2e6, 5e6, 3e6, 1e7]),
+    "macd": np.array([0.5, 0.1, 0.3, 0.15]),
+    "macd_signal": np.array([0.2, 0.4, 0.1, 0.0]),
+    "exchange": np.array(["BINANCE", "OKX", "BYBIT", "OKX"], dtype=object),
+}
+
+def evaluate(text):
+    return compile_expression(text).evaluate(COLUMNS, 4).tolist()
+
+def test_filters_are_vectorized():
+    assert evaluate("rsi < 30 and change > 0 and volume > 1e6") == [True, False, False, False]
+    assert evaluate("rsi < 30 or exchange == 'okx'") == [True, True, True, True]
+    assert evaluate("not (20 < rsi < 30)") == [False, True, False, True]
+    assert evaluate("exchange in ('OKX', 'BYBIT') and macd > macd_signal") == [False, False, True, True]
+    assert evaluate("exchange not in ['OKX']") == [True, False, True, False]
+    assert evaluate("1 > 0") == [True] * 4
+
+def test_constants_mix_with_columns():
+    assert evaluate("rsi < 30 and 1 > 0") == evaluate("rsi < 30")
+    assert evaluate("rsi < 30 or 2 < 1") == evaluate("rsi < 30")
+    assert evaluate("1 < 2 < rsi") == evaluate("2 < rsi")
+    assert evaluate("rsi > 100 or 1 < 2") == [True] * 4
+    assert evaluate("1 < 2 and 3 > 2 and rsi < 30") == evaluate("rsi < 30")
+
+def test_sort_keys():
+    assert evaluate("macd - macd_signal") == pytest.approx([0.3, -0.3, 0.2, 0.15])
+    assert evaluate("change / (volume / 1e6) * -1") == pytest.approx([-0.75, -0.6, 2 / 3, -0.4])
+
+def test_compiled_once_per_text():
+    assert compile_expression("rsi < 30") is compile_expression("rsi < 30")
+
+@pytest.mark.parametrize("text", [
+    "", "rsi <", "__import__('os')", "rsi.real > 1", "foo > 1", "rsi and change",
+    "exchange > 1", "rsi == 'OKX'", "exchange in rsi", "[x for x in rsi]", "rsi ** 2", "x" * 600,
+])
+def test_rejects_anything_outside_the_grammar(text):
+    with pytest.raises(ExpressionError):
+        compile_filter(text)
+
+def test_kind_checks():
+    with pytest.raises(ExpressionError):
+        compile_filter("macd - macd_signal")
+    with pytest.raises(ExpressionError):
+        compile_sort("rsi < 30")
+
+def test_screen_over_universe():
+    frame = pd.DataFrame({
+        "Symbol": ["BINANCE:A", "OKX:B", "BYBIT:C", "OKX:D"],
+        "Exchange": ["BINANCE", "OKX", "BYBIT", "OKX"],
+        "Change %": COLUMNS["change"],
+        "Volume": COLUMNS["volume"],
+        "Volume 24h in USD": [5e5, 2e7, 8e6, 3e6],
+        "Relative Strength Index (14)": COLUMNS["rsi"],
+        "MACD Level (12, 26)": COLUMNS["macd"],
+        "MACD Signal (12, 26)": COLUMNS["macd_signal"],
+    })
+    universe = UniverseSnapshot(frame, lambda df, interval: df)
+    rows = universe.screen("1D", compile_filter("macd > macd_signal"), compile_sort("macd - macd_signal"))
+    assert [r["Symbol"] for r in rows] == ["BINANCE:A", "BYBIT:C", "OKX:D"]
+    rows = universe.screen("1D", compile_filter("rsi < 50"), descending=False, limit=1)
+    assert [r["Symbol"] for r in rows] == ["BYBIT:C"]
+    # USD liquidity, not the base-unit interval volume
+    rows = universe.screen("1D", compile_filter("volume_usd > 5e6"), compile_sort("volume_usd"))
+    assert [r["Symbol"] for r in rows] == ["OKX:B", "BYBIT:C"]
+
+def test_screen_validates_before_fetching():
+    service = ScreenerService()
+    with patch("app.services.screener.CryptoScreener") as MockScreener:
+        with pytest.raises(ValueError):
+            service.screen(where="rsi <")
+    MockScreener.assert_not_called()
+
+def test_screen_endpoint():
+    from app.main import app
+    client = TestClient(app)
+    with patch("app.services.screener.ScreenerService.screen", return_value=[]) as mock_screen:
+        response = client.get("/api/v1/screener/screen", params={"where": "rsi < 30", "sort": "macd", "order": "asc"})
+        assert response.status_code == 200
+        mock_screen.assert_called_with(where="rsi < 30", sort="macd", interval="1D", sort_descending=False, limit=50)
+    response = client.get("/api/v1/screener/screen", params={"where": "open('x')"})
+    assert response.status_code == 400
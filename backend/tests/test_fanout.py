@@ -0,0 +1,96 @@
+import asyncio
+import json
+import time
+import pytest
+from app.main import ConnectionManager
+from app.services.fanout import ClientChannel
+
+class FakeWebSocket:
+    def __init__(self, delay=0.0, fail=False):
+        self.delay = delay
+        self.fail = fail
+        self.received = []
+        self.closed_with = None
+
+    async def accept(self): pass
+
+    async def send_text(self, text):
+        if self.fail:
+            raise ConnectionResetError("gone")
+        await asyncio.sleep(self.delay)
+        self.received.append((time.perf_counter(), json.loads(text)))
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+async def connect_all(manager, sockets):
+    for ws in sockets:
+        await manager.connect(ws)
+
+def test_slow_client_does_not_delay_others():
+    async def scenario():
+        manager = ConnectionManager(send_timeout=5.0)
+        fast = [FakeWebSocket() for _ in range(50)]
+        slow = FakeWebSocket(delay=0.5)
+        await connect_all(manager, fast + [slow])
+
+        start = time.perf_counter()
+        await manager.broadcast({"type": "market_update", "data": [1, 2, 3]})
+        await asyncio.sleep(0.05)
+        assert all(ws.received for ws in fast)
+        last_fast = max(ws.received[0][0] for ws in fast) - start
+        assert not slow.received
+        return last_fast
+
+    assert asyncio.run(scenario()) < 0.05
+
+def test_failed_and_timed_out_clients_are_pruned():
+    async def scenario():
+        manager = ConnectionManager(send_timeout=0.05)
+        healthy, dead, stuck = FakeWebSocket(), FakeWebSocket(fail=True), FakeWebSocket(delay=1.0)
+        await connect_all(manager, [healthy, dead, stuck])
+
+        await manager.broadcast({"type": "pong"})
+        await asyncio.sleep(0.1)
+        return manager, healthy, dead, stuck
+
+    manager, healthy, dead, stuck = asyncio.run(scenario())
+    assert manager.active_connections == [healthy]
+    assert set(manager.channels) == {healthy}
+    assert dead.closed_with == 1008 and stuck.closed_with == 1008
+
+def test_drop_oldest_policy_keeps_latest_messages():
+    async def scenario():
+        ws = FakeWebSocket(delay=0.01)
+        channel = ClientChannel(ws, maxsize=2, policy="drop_oldest")
+        for i in range(10):
+            channel.offer(json.dumps({"seq": i}))
+        await asyncio.sleep(0.1)
+        channel.close()
+        return ws, channel
+
+    ws, channel = asyncio.run(scenario())
+    seqs = [message["seq"] for _, message in ws.received]
+    # Nothing was in flight yet, so only the two newest survive
+    assert seqs == [8, 9]
+    assert channel.dropped == 8
+
+def test_disconnect_policy_drops_slow_consumer():
+    async def scenario():
+        manager = ConnectionManager(queue_size=2, slow_client_policy="disconnect")
+        slow = FakeWebSocket(delay=0.2)
+        await manager.connect(slow)
+        for i in range(5):
+            await manager.broadcast({"seq": i})
+        await asyncio.sleep(0)
+        return manager, slow
+
+    manager, slow = asyncio.run(scenario())
+    assert manager.active_connections == []
+    assert slow.closed_with == 1008
+
+def test_unknown_policy_rejected():
+    async def scenario():
+        ClientChannel(FakeWebSocket(), policy="block")
+    with pytest.raises(ValueError):
+        asyncio.run(scenario())
@@ -40,3 +40,117 @@ def test_add_duplicate_favorite():
     client.post("/api/v1/favorites", json={"symbol": "BINANCE:BTCUSDT"})
     response = client.post("/api/v1/favorites", json={"symbol": "BINANCE:BTCUSDT"})
     assert response.status_code == 400 # or 409
+
+def test_favorite_history_nests_typed_indicators():
+    from datetime import datetime, timezone
+    from sqlmodel import Session
+    from app.models import Favorite, MarketDataHistory
+    with Session(engine) as session:
+        session.add(Favorite(symbol="BINANCE:BTCUSDT"))
+        for minute, rsi in [(0, 40.0), (5, None)]:
+            session.add(MarketDataHistory(
+                symbol="BINANCE:BTCUSDT", timestamp=datetime(2026, 2, 9, 10, minute, tzinfo=timezone.utc), interval="5",
+                open=1.0, high=2.0, low=0.5, close=1.5, volume=10.0, rsi=rsi, sma20=1.2
+            ))
+        session.commit()
+
+    response = client.get("/api/v1/favorites/history", params={"symbol": "BINANCE:BTCUSDT", "interval": "5"})
+    assert response.status_code == 200
+    newest, oldest = response.json()
+    assert newest["timestamp"] == "2026-02-09T10:05:00+00:00"
+    assert newest["close"] == 1.5
+    assert newest["indicators"] == {
+        "RSI": None, "MACD": None, "MACD_Signal": None, "SMA20": 1.2, "SMA50": None, "SMA200": None
+    }
+    assert oldest["indicators"]["RSI"] == 40.0
+
+def test_history_of_unknown_favorite_is_404():
+    response = client.get("/api/v1/favorites/history", params={"symbol": "BINANCE:XUSDT", "interval": "5"})
+    assert response.status_code == 404
+
+def add_history(symbol="BINANCE:BTCUSDT", n=36):
+    """A favorite with n 5m candles from 2026-02-09 09:00; candle i has open i and volume 1."""
+    from datetime import datetime, timedelta, timezone
+    from sqlmodel import Session
+    from app.models import Favorite, MarketDataHistory
+    start = datetime(2026, 2, 9, 9, tzinfo=timezone.utc)
+    with Session(engine) as session:
+        session.add(Favorite(symbol=symbol))
+        for i in range(n):
+            session.add(MarketDataHistory(
+                symbol=symbol, timestamp=start + timedelta(minutes=5 * i), interval="5",
+                open=float(i), high=i + 1.0, low=i - 1.0, close=i + 0.5, volume=1.0
+            ))
+        session.commit()
+
+def history(**params):
+    response = client.get("/api/v1/favorites/history", params={"symbol": "BINANCE:BTCUSDT", "interval": "5", **params})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+def test_history_range_and_keyset_pages():
+    add_history()
+    in_range = history(**{"from": "2026-02-09T09:30:00Z", "to": "2026-02-09T10:00:00Z"})
+    assert [c["open"] for c in in_range] == [12.0, 11.0, 10.0, 9.0, 8.0, 7.0, 6.0]
+
+    first = history(limit=20)
+    second = history(limit=20, before=first[-1]["timestamp"])
+    assert [c["open"] for c in first + second] == [float(i) for i in range(35, -1, -1)]
+    assert history(limit=20, before=second[-1]["timestamp"]) == []
+
+def test_history_resampled_server_side():
+    add_history()
+    hourly = history(resample="60")
+    assert [(c["timestamp"], c["open"], c["high"], c["low"], c["close"], c["volume"], c["candles"]) for c in hourly] == [
+        ("2026-02-09T11:00:00+00:00", 24.0, 36.0, 23.0, 35.5, 12.0, 12),
+        ("2026-02-09T10:00:00+00:00", 12.0, 24.0, 11.0, 23.5, 12.0, 12),
+        ("2026-02-09T09:00:00+00:00", 0.0, 12.0, -1.0, 11.5, 12.0, 12),
+    ]
+    # limit counts hourly candles; before pages through them
+    assert [c["open"] for c in history(resample="60", limit=1, before="2026-02-09T11:00:00Z")] == [12.0]
+    assert [c["open"] for c in history(resample="60", **{"from": "2026-02-09T09:30:00Z"})] == [24.0, 12.0]
+
+def test_history_rejects_unaligned_resample():
+    add_history()
+    response = client.get("/api/v1/favorites/history", params={
+        "symbol": "BINANCE:BTCUSDT", "interval": "5", "resample": "7"
+    })
+    assert response.status_code == 400
+
+def test_history_batch_is_columnar():
+    add_history("BINANCE:BTCUSDT")
+    add_history("BINANCE:ETHUSDT", n=3)
+    response = client.get("/api/v1/favorites/history/batch", params={
+        "symbols": "BINANCE:BTCUSDT,BINANCE:ETHUSDT,BINANCE:XUSDT", "intervals": "5,60", "limit": 2
+    })
+    assert response.status_code == 200
+    body = response.json()
+    assert body["fields"][:6] == ["timestamp", "open", "high", "low", "close", "volume"]
+    assert body["missing"] == ["BINANCE:XUSDT"]
+    btc = body["series"]["BINANCE:BTCUSDT"]["5"]
+    # Newest two candles, oldest first, epoch-second timestamps
+    assert btc["timestamp"] == [1770637800, 1770638100]
+    assert btc["open"] == [34.0, 35.0] and btc["RSI"] == [None, None]
+    assert body["series"]["BINANCE:ETHUSDT"]["5"]["open"] == [1.0, 2.0]
+    # No 60m candles were stored
+    assert "60" not in body["series"]["BINANCE:BTCUSDT"]
+
+def test_history_batch_defaults_to_every_favorite():
+    add_history("BINANCE:BTCUSDT", n=2)
+    add_history("BINANCE:ETHUSDT", n=1)
+    body = client.get("/api/v1/favorites/history/batch").json()
+    assert sorted(body["series"]) == ["BINANCE:BTCUSDT", "BINANCE:ETHUSDT"]
+    assert len(body["series"]["BINANCE:BTCUSDT"]["5"]["close"]) == 2
+
+def test_favorite_indicators_are_computed_from_stored_closes():
+    from app.services.indicators import indicator_engine
+    indicator_engine.clear()
+    add_history()
+    body = client.get("/api/v1/favorites/indicators", params={
+        "symbol": "BINANCE:BTCUSDT", "interval": "5", "bars": 10
+    }).json()
+    assert len(body["timestamp"]) == 10 and body["timestamp"][-1] == 1770637800 + 300
+    # Closes rise by one every bar
+    assert body["RSI"][-1] == 100.0
+    assert body["SMA20"][-1] == sum(i + 0.5 for i in range(16, 36)) / 20
+    indicator_engine.clear()
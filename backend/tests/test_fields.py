@@ -0,0 +1,41 @@
+import pytest
+from unittest.mock import patch
+import pandas as pd
+from tvscreener import CryptoField
+from app.services.fields import (
+    FIELD_REGISTRY, INTERVALS, UNIVERSE_REQUEST, FieldRegistryError, build_field_registry,
+)
+from app.services.screener import ScreenerService
+
+def test_every_interval_resolves_to_its_own_columns():
+    assert set(FIELD_REGISTRY) == set(INTERVALS) >= {"1", "120"}
+    assert FIELD_REGISTRY["5"].fields["rsi"].field_name == "RSI|5"
+    assert FIELD_REGISTRY["1D"].fields["change"] is CryptoField.CHANGE_PERCENT
+    # Enum member names would have picked the previous-bar RSI and absolute changes
+    assert FIELD_REGISTRY["1"].fields["rsi"].field_name == "RSI|1"
+    assert FIELD_REGISTRY["1W"].fields["change"].field_name == "change|1W"
+    assert FIELD_REGISTRY["1M"].fields["change"].field_name == "change|1M"
+
+def test_bundles_are_immutable_and_request_ready():
+    bundle = FIELD_REGISTRY["15"]
+    with pytest.raises(TypeError):
+        bundle.fields["rsi"] = CryptoField.PRICE
+    assert bundle.request[:3] == (CryptoField.NAME, CryptoField.EXCHANGE, CryptoField.DESCRIPTION)
+    assert len(bundle.request) == len(set(bundle.request)) == 12
+    assert not any(f.historical for f in UNIVERSE_REQUEST)
+    # The universe also carries the 24h USD volume its liquidity filters use
+    assert CryptoField.VOLUME_24H_IN_USD in UNIVERSE_REQUEST
+    assert "change|15" in bundle.column_keys
+
+def test_missing_field_fails_fast():
+    with pytest.raises(FieldRegistryError, match="7/price"):
+        build_field_registry({"7": "7"})
+
+def test_requests_select_the_prebuilt_bundle():
+    service = ScreenerService()
+    with patch("app.services.screener.CryptoScreener") as MockScreener:
+        MockScreener.return_value.get.return_value = pd.DataFrame({"name": ["A"], "change|120": [1.0]})
+        service.get_top_movers(interval="120")
+        service.get_assets_by_symbols(["A"], interval="120")
+    calls = MockScreener.return_value.select.call_args_list
+    assert [call.args for call in calls] == [FIELD_REGISTRY["120"].request] * 2
@@ -2,6 +2,7 @@ from sqlmodel import Session, select, create_engine, SQLModel
 from app.models import TickerIndex
 from app.services.indexer import IndexerService
 import pytest
+import pandas as pd
 
 @pytest.fixture
 def session():
@@ -30,3 +31,39 @@ def test_sync_tickers(session, monkeypatch):
     tickers = session.exec(select(TickerIndex)).all()
     assert len(tickers) == 2
     assert tickers[0].symbol == "BINANCE:BTCUSDT"
+
+def serve_catalog(monkeypatch, rows):
+    """Serves `rows` as the screener would: filtered by exchange, one range at a time."""
+    catalog = pd.DataFrame(rows)
+    class CatalogScreener:
+        def where(self, condition): self.exchange = condition.value
+        def set_range(self, start, end): self.range = (start, end)
+        def get(self):
+            page = catalog[catalog["Exchange"] == self.exchange]
+            return page.iloc[self.range[0]:self.range[1]].reset_index(drop=True)
+    monkeypatch.setattr("app.services.indexer.CryptoScreener", CatalogScreener)
+
+def test_sync_applies_catalog_diff(session, monkeypatch):
+    session.add(TickerIndex(symbol="BINANCE:BTCUSDT", exchange="BINANCE", name="BTC", description="Bitcoin"))
+    session.add(TickerIndex(symbol="BINANCE:ETHUSDT", exchange="BINANCE", name="ETH", description=None))
+    session.add(TickerIndex(symbol="BINANCE:LUNAUSDT", exchange="BINANCE", name="LUNA"))
+    session.commit()
+    unchanged_at = session.exec(select(TickerIndex).where(TickerIndex.symbol == "BINANCE:ETHUSDT")).first().updated_at
+
+    serve_catalog(monkeypatch, [
+        {"Symbol": "BINANCE:BTCUSDT", "Exchange": "BINANCE", "Name": "BTC", "Description": "Bitcoin Spot"},
+        {"Symbol": "BINANCE:ETHUSDT", "Exchange": "BINANCE", "Name": "ETH", "Description": None},
+        {"Symbol": "BYBIT:SOLUSDT", "Exchange": "BYBIT", "Name": "SOL", "Description": "Solana"},
+    ])
+    indexer = IndexerService(session)
+    indexer.retry_backoff = 0
+    total = indexer.sync_tickers()
+
+    assert total == 3
+    session.expire_all()
+    tickers = {t.symbol: t for t in session.exec(select(TickerIndex)).all()}
+    assert sorted(tickers) == ["BINANCE:BTCUSDT", "BINANCE:ETHUSDT", "BYBIT:SOLUSDT"]
+    assert tickers["BINANCE:BTCUSDT"].description == "Bitcoin Spot"
+    assert tickers["BYBIT:SOLUSDT"].exchange == "BYBIT"
+    # Rows that did not change keep their timestamp
+    assert tickers["BINANCE:ETHUSDT"].updated_at == unchanged_at
@@ -0,0 +1,129 @@
+from sqlmodel import Session, select, create_engine, SQLModel
+from app.models import TickerIndex, Favorite
+from app.services.indexer import IndexerService
+import threading
+import time
+import pytest
+import pandas as pd
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+
+class StubScreener:
+    """
+    Local stand-in for CryptoScreener serving `pages` full pages per exchange
+    with a fixed latency. `failures` maps (exchange, start) to how many times
+    that chunk raises before succeeding.
+    """
+    def __init__(self, catalog, chunk_size, latency=0.0, failures=None):
+        self.catalog = catalog
+        self.chunk_size = chunk_size
+        self.latency = latency
+        self.failures = dict(failures or {})
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        stub = self
+        class Screener:
+            def where(self, condition): self.exchange = condition.value
+            def set_range(self, start, end): self.start = start
+            def get(self):
+                time.sleep(stub.latency)
+                with stub.lock:
+                    key = (self.exchange, self.start)
+                    if stub.failures.get(key, 0) > 0:
+                        stub.failures[key] -= 1
+                        raise ConnectionError("upstream reset")
+                symbols = stub.catalog.get(self.exchange, [])[self.start:self.start + stub.chunk_size]
+                return pd.DataFrame(
+                    [{"Symbol": s, "Exchange": self.exchange, "Name": s.split(":")[1], "Description": ""} for s in symbols]
+                )
+        return Screener()
+
+def make_catalog(exchanges, per_exchange):
+    return {e: [f"{e}:T{i}USDT" for i in range(per_exchange)] for e in exchanges}
+
+def make_indexer(session, concurrency):
+    indexer = IndexerService(session)
+    indexer.chunk_size = 10
+    indexer.fetch_concurrency = concurrency
+    indexer.pages_ahead = 2
+    indexer.retry_backoff = 0.0
+    return indexer
+
+def test_concurrent_fetch_speedup(session, monkeypatch):
+    catalog = make_catalog(["BINANCE", "BYBIT", "BITGET", "OKX"], 35)
+    monkeypatch.setattr("app.services.indexer.CryptoScreener", StubScreener(catalog, 10, latency=0.05))
+
+    timings = {}
+    for concurrency in (1, 8):
+        start = time.perf_counter()
+        assert make_indexer(session, concurrency).sync_tickers() == 140
+        timings[concurrency] = time.perf_counter() - start
+
+    # Every round trip back to back vs. a few overlapping waves
+    assert timings[8] * 2 < timings[1]
+    assert len(session.exec(select(TickerIndex)).all()) == 140
+
+def test_failed_chunk_is_retried(session, monkeypatch):
+    catalog = make_catalog(["BINANCE"], 25)
+    stub = StubScreener(catalog, 10, failures={("BINANCE", 10): 2})
+    monkeypatch.setattr("app.services.indexer.CryptoScreener", stub)
+
+    assert make_indexer(session, 4).sync_tickers() == 25
+
+def test_failed_exchange_is_not_pruned(session, monkeypatch):
+    session.add(TickerIndex(symbol="BYBIT:T19USDT", exchange="BYBIT"))
+    session.add(Favorite(symbol="BYBIT:T19USDT"))
+    session.add(TickerIndex(symbol="BINANCE:GONEUSDT", exchange="BINANCE"))
+    session.commit()
+
+    catalog = make_catalog(["BINANCE", "BYBIT"], 25)
+    # The second BYBIT page never succeeds
+    stub = StubScreener(catalog, 10, failures={("BYBIT", 10): 99})
+    monkeypatch.setattr("app.services.indexer.CryptoScreener", stub)
+
+    indexer = make_indexer(session, 4)
+    indexer.fetch_retries = 1
+    indexer.sync_tickers()
+
+    symbols = {t.symbol for t in session.exec(select(TickerIndex)).all()}
+    assert "BINANCE:GONEUSDT" not in symbols
+    # BYBIT's catalog is incomplete, so its unseen tickers and favorites survive
+    assert "BYBIT:T19USDT" in symbols
+    assert session.exec(select(Favorite)).first() is not None
+
+def test_sync_does_not_hold_the_write_lock_while_fetching(tmp_path, monkeypatch):
+    import sqlite3
+    from app.database import make_engine
+    path = tmp_path / "index.db"
+    engine = make_engine(f"sqlite:///{path}")
+    SQLModel.metadata.create_all(engine)
+
+    writes = []
+    class WritingStub(StubScreener):
+        def __call__(self):
+            screener = super().__call__()
+            fetch = screener.get
+            def get():
+                # Another writer (collector, purger, add_favorite) during the sync
+                with sqlite3.connect(path, timeout=0.2) as other:
+                    other.execute("CREATE TABLE IF NOT EXISTS other_writer (n INTEGER)")
+                    other.execute("INSERT INTO other_writer VALUES (?)", (len(writes),))
+                writes.append(True)
+                return fetch()
+            screener.get = get
+            return screener
+
+    monkeypatch.setattr("app.services.indexer.CryptoScreener", WritingStub(make_catalog(["BINANCE"], 35), 10))
+    with Session(engine) as session:
+        indexer = make_indexer(session, 1)
+        indexer.supported_exchanges = ["BINANCE"]
+        assert indexer.sync_tickers() == 35
+    # Every page's concurrent write got through
+    assert len(writes) >= 4
+    engine.dispose()
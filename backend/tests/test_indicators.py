@@ -0,0 +1,134 @@
+import numpy as np
+import pandas as pd
+import pytest
+from datetime import datetime, timedelta, timezone
+from sqlmodel import Session, SQLModel, create_engine
+from app.models import MarketDataHistory
+from app.services.indicators import NAMES, IndicatorEngine, IndicatorState, compute_indicators
+
+def closes(n=600, seed=0):
+    return 100 + np.cumsum(np.random.default_rng(seed).normal(0, 1, n))
+
+def reference_rsi(close, period=14):
+    change = np.diff(close)
+    gain, loss = np.maximum(change, 0), np.maximum(-change, 0)
+    out = np.full(len(close), np.nan)
+    avg_gain, avg_loss = gain[:period].mean(), loss[:period].mean()
+    for i in range(period, len(close)):
+        if i > period:
+            avg_gain = (avg_gain * (period - 1) + gain[i - 1]) / period
+            avg_loss = (avg_loss * (period - 1) + loss[i - 1]) / period
+        out[i] = 100 - 100 / (1 + avg_gain / avg_loss)
+    return out
+
+def test_vectorized_indicators_match_references():
+    close = closes()
+    series = pd.Series(close)
+    macd = series.ewm(span=12, adjust=False).mean() - series.ewm(span=26, adjust=False).mean()
+    values = compute_indicators(close)
+    np.testing.assert_allclose(values["RSI"], reference_rsi(close), rtol=1e-10)
+    np.testing.assert_allclose(values["MACD"], macd, rtol=1e-9, atol=1e-12)
+    np.testing.assert_allclose(values["MACD_Signal"], macd.ewm(span=9, adjust=False).mean(), rtol=1e-9, atol=1e-12)
+    for period in (20, 50, 200):
+        np.testing.assert_allclose(values[f"SMA{period}"], series.rolling(period).mean(), rtol=1e-10)
+
+def test_streaming_updates_match_backfill():
+    close = closes()
+    values = compute_indicators(close)
+    # Resume from a backfilled state part way, and from scratch through the warm-up
+    for start in (0, 5, 14, 199, 400):
+        state = IndicatorState.from_closes(close[:start])
+        for i in range(start, len(close)):
+            # A revised close for the forming bar leaves the state untouched
+            state.preview(close[i] + 5)
+            previewed = state.preview(close[i])
+            state.commit(close[i])
+            expected = [values[name][i] for name in NAMES]
+            np.testing.assert_allclose(previewed, expected, rtol=1e-9, atol=1e-9)
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+
+START = datetime(2026, 2, 9, tzinfo=timezone.utc)
+
+def candle(i, close):
+    return {"symbol": "BINANCE:BTCUSDT", "interval": "60", "timestamp": START + timedelta(hours=i), "close": close}
+
+def test_engine_backfills_then_follows_the_collector(session):
+    close = closes(300)
+    for i, value in enumerate(close[:250]):
+        session.add(MarketDataHistory(**candle(i, value)))
+    session.commit()
+
+    engine = IndicatorEngine(lookback=100)
+    first = engine.series(session, "BINANCE:BTCUSDT", "60", bars=30)
+    assert len(first["timestamp"]) == 30
+    assert first["timestamp"][-1] == int((START + timedelta(hours=249)).timestamp())
+
+    # The forming bar is revised, then new bars arrive
+    engine.observe([candle(249, close[249] - 3.0)])
+    engine.observe([candle(249, close[249])] + [candle(i, close[i]) for i in range(250, 300)])
+    session.close()  # cached reads never touch the database
+    latest = engine.series(None, "BINANCE:BTCUSDT", "60", bars=80)
+    expected = compute_indicators(close)
+    for name in NAMES:
+        np.testing.assert_allclose(latest[name], expected[name][-80:], rtol=1e-9)
+    assert latest["timestamp"][-1] == int((START + timedelta(hours=299)).timestamp())
+
+def test_engine_reloads_on_out_of_order_candles(session):
+    for i, value in enumerate(closes(30)):
+        session.add(MarketDataHistory(**candle(i, value)))
+    session.commit()
+    engine = IndicatorEngine()
+    engine.series(session, "BINANCE:BTCUSDT", "60")
+    engine.observe([candle(3, 1.0)])
+    assert ("BINANCE:BTCUSDT", "60") not in engine._series
+    # Warm-up bars have no value yet
+    assert engine.series(session, "BINANCE:BTCUSDT", "60")["SMA20"][:19] == [None] * 19
+
+def test_candles_stored_during_a_backfill_are_not_lost(session, monkeypatch):
+    close = closes(60)
+    for i, value in enumerate(close[:50]):
+        session.add(MarketDataHistory(**candle(i, value)))
+    session.commit()
+
+    engine = IndicatorEngine()
+    load = engine._load
+
+    def racing_load(*args):
+        loaded = load(*args)
+        # The collector stores and observes a revision and a new bar after the read
+        engine.observe([candle(49, close[49]), candle(50, close[50])])
+        return loaded
+
+    monkeypatch.setattr(engine, "_load", racing_load)
+    first = engine.series(session, "BINANCE:BTCUSDT", "60", bars=60)
+    assert len(first["timestamp"]) == 51
+    assert engine._loading == {}
+
+    monkeypatch.setattr(engine, "_load", None)  # served from the cache from now on
+    engine.observe([candle(i, close[i]) for i in range(51, 60)])
+    latest = engine.series(session, "BINANCE:BTCUSDT", "60", bars=60)
+    expected = compute_indicators(close)
+    for name in NAMES:
+        np.testing.assert_allclose(np.array(latest[name], dtype=float), expected[name], rtol=1e-9)
+
+def test_stale_backfill_is_not_cached(session, monkeypatch):
+    for i, value in enumerate(closes(30)):
+        session.add(MarketDataHistory(**candle(i, value)))
+    session.commit()
+    engine = IndicatorEngine()
+    load = engine._load
+
+    def racing_load(*args):
+        loaded = load(*args)
+        engine.observe([candle(3, 1.0)])  # older than what was read
+        return loaded
+
+    monkeypatch.setattr(engine, "_load", racing_load)
+    assert len(engine.series(session, "BINANCE:BTCUSDT", "60")["timestamp"]) == 30
+    assert ("BINANCE:BTCUSDT", "60") not in engine._series
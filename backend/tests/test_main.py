@@ -28,3 +28,13 @@ def test_search_ticker_api():
         assert response.status_code == 200
         assert len(response.json()) == 1
         assert response.json()[0]['ticker'] == 'ETHUSD'
+
+def test_top_movers_rejects_limits_beyond_the_snapshot():
+    from app.main import app, screener_service
+    client = TestClient(app)
+    with patch('app.services.screener.ScreenerService.get_top_movers') as mock_get:
+        mock_get.return_value = []
+        assert client.get(f"/api/v1/screener/top-movers?limit={screener_service.max_movers}").status_code == 200
+        assert client.get(f"/api/v1/screener/top-movers?limit={screener_service.max_movers + 1}").status_code == 422
+        assert client.get("/api/v1/screener/top-movers?limit=0").status_code == 422
+        assert mock_get.call_count == 1
@@ -0,0 +1,74 @@
+import random
+from app.services.market_delta import DeltaStream, apply_delta, diff_rows
+
+def make_snapshot(rng, universe, size=50):
+    symbols = rng.sample(universe, size)
+    rows = [
+        {
+            "Symbol": s, "Exchange": s.split(":")[0],
+            "Price": round(rng.uniform(1, 100), 2), "Change %": round(rng.uniform(-10, 10), 2),
+            "Volume": rng.choice([None, rng.randint(1, 10 ** 9)]),
+        }
+        for s in symbols
+    ]
+    return sorted(rows, key=lambda r: r["Change %"], reverse=True)
+
+def test_replayed_deltas_reconstruct_snapshots():
+    rng = random.Random(7)
+    universe = [f"BINANCE:T{i}USDT" for i in range(80)]
+    stream = DeltaStream()
+    client_rows, client_seq = stream.snapshot()["data"], stream.snapshot()["seq"]
+
+    previous = []
+    for _ in range(200):
+        # Mostly small moves on a stable set, occasionally a reshuffle
+        if previous and rng.random() < 0.8:
+            snapshot = [dict(r) for r in previous]
+            for row in rng.sample(snapshot, 5):
+                row["Price"] = round(row["Price"] * rng.uniform(0.99, 1.01), 2)
+                row["Change %"] = round(rng.uniform(-10, 10), 2)
+            snapshot.sort(key=lambda r: r["Change %"], reverse=True)
+        else:
+            snapshot = make_snapshot(rng, universe)
+
+        message = stream.update(snapshot)
+        if message is None:
+            continue
+        assert message["base"] == client_seq
+        client_rows, client_seq = apply_delta(client_rows, message), message["seq"]
+        assert client_rows == snapshot
+        previous = snapshot
+
+    assert stream.snapshot() == {
+        "type": "market_snapshot", "v": 2, "channel": "movers", "seq": client_seq, "data": client_rows
+    }
+
+def test_delta_carries_only_changes():
+    before = [{"Symbol": "A", "Price": 1.0, "Change %": 3.0}, {"Symbol": "B", "Price": 2.0, "Change %": 2.0}]
+    after = [{"Symbol": "B", "Price": 2.0, "Change %": 4.0}, {"Symbol": "C", "Price": 5.0, "Change %": 1.0}]
+
+    delta = diff_rows(before, after)
+
+    assert delta == {
+        "upsert": [{"Symbol": "B", "Change %": 4.0}, {"Symbol": "C", "Price": 5.0, "Change %": 1.0}],
+        "remove": ["A"],
+        "ranks": {"B": 0, "C": 1},
+    }
+    assert diff_rows(after, [dict(r) for r in after]) is None
+
+def test_unchanged_snapshot_does_not_advance_sequence():
+    stream = DeltaStream()
+    rows = [{"Symbol": "A", "Price": 1.0}]
+    assert stream.update(rows)["seq"] == 1
+    assert stream.update([dict(r) for r in rows]) is None
+    assert stream.seq == 1
+
+def test_metadata_changes_are_published():
+    stream = DeltaStream("divergence:60")
+    assert stream.update([], {"bars": 1, "window": 30}) == {
+        "type": "market_delta", "v": 2, "channel": "divergence:60", "seq": 1, "base": 0,
+        "upsert": [], "remove": [], "ranks": {}, "meta": {"bars": 1, "window": 30}
+    }
+    assert stream.update([], {"bars": 1, "window": 30}) is None
+    assert stream.update([], {"bars": 2, "window": 30})["seq"] == 2
+    assert stream.snapshot()["meta"] == {"bars": 2, "window": 30}
@@ -0,0 +1,103 @@
+import asyncio
+import numpy as np
+import pandas as pd
+import pytest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from app.services.screener import ScreenerService
+
+@pytest.fixture
+def screener_service():
+    return ScreenerService()
+
+def make_universe(service, n=40, seed=0):
+    """A wide frame like the batched request returns: one column per interval field."""
+    rng = np.random.default_rng(seed)
+    data = {
+        "name": [f"BINANCE:T{i}USDT" for i in range(n)],
+        "exchange": ["BINANCE"] * n,
+        "description": [f"Token {i}" for i in range(n)],
+    }
+    for interval in service.interval_map:
+        for f in service._get_common_fields(interval).values():
+            data.setdefault(f.label, rng.uniform(-10, 10, n).round(4))
+    return pd.DataFrame(data)
+
+def test_batch_ranks_every_interval_from_one_request(screener_service):
+    universe = make_universe(screener_service)
+    with patch("app.services.screener.CryptoScreener") as MockScreener:
+        MockScreener.return_value.get.return_value = universe
+        result = screener_service.get_movers_batch(["5", "60", "1D"], limit=5)
+        # A second call inside the TTL is served from the same snapshot
+        screener_service.get_movers_batch(["15"], limit=5)
+
+    assert MockScreener.return_value.get.call_count == 1
+    for interval in ("5", "60", "1D"):
+        change = universe[screener_service._get_common_fields(interval)["change"].label]
+        gainers, losers = result[interval]["desc"], result[interval]["asc"]
+        assert [r["Symbol"] for r in gainers] == list(universe.loc[change.nlargest(5).index, "name"])
+        assert [r["Symbol"] for r in losers] == list(universe.loc[change.nsmallest(5).index, "name"])
+        assert [r["Change %"] for r in gainers] == list(change.nlargest(5))
+        assert all(r["Change %"] < 0 for r in losers)
+        assert {"Price", "Volume", "Relative Strength Index (14)"} <= set(gainers[0])
+
+def test_batch_losers_are_strictly_negative(screener_service):
+    universe = make_universe(screener_service, n=10)
+    universe["Change %"] = np.arange(10, dtype=float) - 2  # only two losers
+    with patch("app.services.screener.CryptoScreener") as MockScreener:
+        MockScreener.return_value.get.return_value = universe
+        result = screener_service.get_movers_batch(["1D"], limit=5)
+    assert [r["Change %"] for r in result["1D"]["asc"]] == [-2.0, -1.0]
+    assert [r["Change %"] for r in result["1D"]["desc"]] == [7.0, 6.0, 5.0, 4.0, 3.0]
+
+def test_batch_rejects_unknown_interval(screener_service):
+    with pytest.raises(ValueError):
+        screener_service.get_movers_batch(["7"])
+
+def test_batch_endpoint():
+    from app.main import app
+    client = TestClient(app)
+    with patch("app.services.screener.ScreenerService.get_movers_batch") as mock_batch:
+        mock_batch.return_value = {"5": {"desc": [], "asc": []}}
+        response = client.get("/api/v1/screener/top-movers/batch?intervals=5,15&limit=10")
+        assert response.status_code == 200
+        mock_batch.assert_called_with(["5", "15"], limit=10, strict=False)
+    assert client.get("/api/v1/screener/top-movers/batch?intervals=7").status_code == 400
+
+def test_movers_channels_share_one_batch():
+    from app.main import load_channels
+    batch = {"15": {"desc": [{"Symbol": "UP"}], "asc": [{"Symbol": "DOWN"}]},
+             "1D": {"desc": [{"Symbol": "DAY"}], "asc": []}}
+    with patch("app.services.screener.ScreenerService.get_movers_batch", return_value=batch) as mock_batch, \
+         patch("app.services.screener.ScreenerService.get_top_movers") as mock_single:
+        results = asyncio.run(load_channels(["movers:15:desc", "movers:15:asc", "movers:1D:desc"]))
+    mock_batch.assert_called_once_with(["15", "1D"], limit=50, strict=True)
+    mock_single.assert_not_called()
+    assert results == {"movers:15:desc": [{"Symbol": "UP"}], "movers:15:asc": [{"Symbol": "DOWN"}],
+                       "movers:1D:desc": [{"Symbol": "DAY"}]}
+
+def test_universe_is_paged_to_the_end(screener_service):
+    # Keyed by "Symbol" like real screener frames
+    universe = make_universe(screener_service, n=25).rename(columns={"name": "Symbol"})
+    ranges = []
+
+    class PagedScreener:
+        def where(self, *args): pass
+        def sort_by(self, *args, **kwargs): pass
+        def select(self, *args): pass
+        def set_range(self, start, end): self.range = (start, end)
+        def get(self):
+            ranges.append(self.range)
+            start, end = self.range
+            # The boundary symbol shows up on both sides of the page break
+            return universe.iloc[max(start - 1, 0):end].reset_index(drop=True)
+
+    screener_service.universe_page = 10
+    with patch("app.services.screener.CryptoScreener", PagedScreener):
+        result = screener_service.get_movers_batch(["1D"], limit=5)
+
+    assert ranges == [(0, 10), (10, 20), (20, 30)]
+    assert len(screener_service.get_universe()) == 25
+    # Symbols past the first page rank like the rest
+    change = universe[screener_service._get_common_fields("1D")["change"].label]
+    assert [r["Symbol"] for r in result["1D"]["desc"]] == list(universe.loc[change.nlargest(5).index, "Symbol"])
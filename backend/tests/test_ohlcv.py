@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+from datetime import datetime, timezone
+from app.services.ohlcv import check_resample, ceil_time, floor_time, resample, shift_time, to_seconds
+
+def test_resample_matches_pandas():
+    rng = np.random.default_rng(0)
+    # 5m candles over four days with gaps and missing values
+    seconds = np.sort(rng.choice(np.arange(0, 4 * 86400, 300), 900, replace=False)) + to_seconds(
+        datetime(2026, 2, 9, tzinfo=timezone.utc))
+    values = {f: rng.uniform(1, 100, len(seconds)) for f in ["open", "high", "low", "close", "volume"]}
+    for column in values.values():
+        column[rng.random(len(seconds)) < 0.1] = np.nan
+
+    candles = resample(seconds, *values.values(), "240")
+
+    frame = pd.DataFrame(values, index=pd.to_datetime(seconds, unit="s"))
+    expected = frame.resample("240min").agg(
+        {"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"}
+    )
+    counts = frame["open"].resample("240min").size()
+    expected = expected[counts > 0]
+    assert (candles["timestamp"] == (expected.index - pd.Timestamp(0)) // pd.Timedelta(seconds=1)).all()
+    for field in ["open", "high", "low", "close", "volume"]:
+        np.testing.assert_allclose(candles[field], expected[field].to_numpy())
+    assert candles["candles"].tolist() == counts[counts > 0].tolist()
+
+def test_all_missing_bucket_stays_missing():
+    nan = np.nan
+    candles = resample(np.array([0, 300, 3600]), *([np.array([nan, nan, 1.0])] * 5), "60")
+    assert np.isnan(candles["open"][0]) and np.isnan(candles["volume"][0])
+    assert candles["close"][1] == 1.0
+
+def test_calendar_buckets():
+    dt = datetime(2026, 2, 11, 13, 7, tzinfo=timezone.utc)
+    assert floor_time(dt, "1W") == datetime(2026, 2, 9, tzinfo=timezone.utc)  # Monday
+    assert floor_time(dt, "1M") == datetime(2026, 2, 1, tzinfo=timezone.utc)
+    assert shift_time(datetime(2026, 1, 1, tzinfo=timezone.utc), "1M", -2) == datetime(2025, 11, 1, tzinfo=timezone.utc)
+    assert ceil_time(dt, "60") == datetime(2026, 2, 11, 14, tzinfo=timezone.utc)
+    assert ceil_time(datetime(2026, 2, 11, 14, tzinfo=timezone.utc), "60") == datetime(2026, 2, 11, 14, tzinfo=timezone.utc)
+
+def test_aligned_resample_is_accepted():
+    for source, target in [("5", "60"), ("240", "1W"), ("5", "1M"), ("1D", "1M")]:
+        check_resample(source, target)
+
+@pytest.mark.parametrize("source,target", [("60", "5"), ("60", "90"), ("1W", "1M"), ("5", "2h")])
+def test_unaligned_resample_is_rejected(source, target):
+    with pytest.raises(ValueError):
+        check_resample(source, target)
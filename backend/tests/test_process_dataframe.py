@@ -0,0 +1,44 @@
+import json
+import numpy as np
+import pandas as pd
+import pytest
+from app.services.records import to_records
+from app.services.screener import ScreenerService
+from benchmarks.bench_process_dataframe import legacy_process
+
+def upstream_frame(service, interval, n=1000, seed=0):
+    """A frame shaped like the screener's answer, with NaNs, ints and defaults that collide."""
+    rng = np.random.default_rng(seed)
+    data = {
+        "name": [f"BINANCE:T{i}USDT" for i in range(n)],
+        "exchange": ["BINANCE"] * n,
+        "description": [None if i % 7 == 0 else f"Token {i}" for i in range(n)],
+        "Price": rng.uniform(0, 10, n),
+        "Change %": rng.uniform(-5, 5, n),
+        "trades": rng.integers(0, 1000, n),
+        "active": rng.integers(0, 2, n).astype(bool),
+    }
+    for f in service._get_common_fields(interval).values():
+        column = rng.uniform(-100, 100, n)
+        column[rng.random(n) < 0.1] = np.nan
+        data[f.label.upper() if interval == "5" else f.label] = column
+    return pd.DataFrame(data)
+
+@pytest.mark.parametrize("interval", ["1D", "5", "60", "1W"])
+def test_output_is_byte_identical(interval):
+    service = ScreenerService()
+    fields = service._get_common_fields(interval)
+    df = upstream_frame(service, interval)
+    expected = json.dumps(legacy_process(df, fields))
+    assert json.dumps(to_records(service._process_dataframe(df, fields))) == expected
+    # Second call goes through the cached plan
+    assert json.dumps(to_records(service._process_dataframe(df, fields))) == expected
+    assert len(service._rename_plans) == 1
+
+def test_to_records_matches_pandas_for_mixed_columns():
+    df = pd.DataFrame({
+        "f": [1.5, np.nan], "i": [1, 2], "b": [True, False], "s": ["x", None],
+        "o": pd.Series([np.int64(3), np.nan], dtype=object), "n": pd.Series([np.float64(2.5), None], dtype=object),
+    })
+    assert json.dumps(to_records(df)) == json.dumps(df.replace({np.nan: None}).to_dict(orient="records"))
+    assert to_records(df.iloc[:0]) == []
@@ -0,0 +1,109 @@
+import asyncio
+from app.services.scheduler import Scheduler, next_run_time
+
+class VirtualClock:
+    """Time only moves when the scheduler sleeps or a job 'works'."""
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, delay):
+        self.now += delay
+        await asyncio.sleep(0)
+
+def run_until(scheduler, job_name, runs):
+    async def scenario():
+        scheduler.start()
+        while scheduler.jobs[job_name].runs < runs:
+            await asyncio.sleep(0)
+        await scheduler.stop()
+    asyncio.run(scenario())
+
+def test_next_run_time_aligns_to_wall_clock():
+    # 10:02:13 -> next 5m candle close minus 5s is 10:04:55
+    now = 36000 + 133
+    assert next_run_time(now, 300, align=True, offset=-5) == 36000 + 295
+    assert next_run_time(36000, 300, align=True) == 36300
+    # Unaligned: steps from the previous slot, skipping missed ones
+    assert next_run_time(1003, 10, previous=1000) == 1010
+    assert next_run_time(1025, 10, previous=1000) == 1030
+
+def test_aligned_job_is_drift_free():
+    clock = VirtualClock(36000 + 17)
+    started = []
+
+    async def work():
+        started.append(clock())
+        clock.now += 7  # Each run takes 7s of wall time
+
+    scheduler = Scheduler(clock=clock, sleep=clock.sleep)
+    scheduler.add("collect", work, 300, align=True)
+    run_until(scheduler, "collect", 4)
+    assert started == [36300, 36600, 36900, 37200]
+
+    job = scheduler.jobs["collect"]
+    assert job.overruns == 0
+    assert job.next_run == 37500
+    status = scheduler.status()[0]
+    assert status["name"] == "collect" and status["runs"] == 4
+    assert status["next_run"].startswith("1970-01-01T10:25:00")
+
+def test_overrunning_job_never_overlaps():
+    clock = VirtualClock(1000)
+    active, started = [], []
+
+    async def slow():
+        active.append(1)
+        assert len(active) == 1
+        started.append(clock())
+        clock.now += 25
+        await asyncio.sleep(0)
+        active.pop()
+
+    scheduler = Scheduler(clock=clock, sleep=clock.sleep)
+    scheduler.add("slow", slow, 10, run_immediately=True)
+    run_until(scheduler, "slow", 3)
+    # Slots 1010 and 1020 were skipped while the first run was busy
+    assert started == [1000, 1030, 1060]
+    assert scheduler.jobs["slow"].overruns == 6
+    assert scheduler.jobs["slow"].last_duration == 25
+
+def test_failures_back_off_and_recover():
+    clock = VirtualClock(0)
+    started = []
+    outcomes = iter([False, False, False, True, True])
+
+    async def flaky():
+        started.append(clock())
+        if not next(outcomes):
+            raise ConnectionError("upstream down")
+
+    scheduler = Scheduler(clock=clock, sleep=clock.sleep)
+    job = scheduler.add("flaky", flaky, 10, run_immediately=True, max_backoff=30)
+    run_until(scheduler, "flaky", 5)
+    # 20s, 40s capped to 30s, then 30s; success resets to the 10s cadence
+    assert started == [0, 20, 50, 80, 90]
+    assert job.failures == 0 and job.last_error is None
+
+def test_failure_is_reported_in_status():
+    clock = VirtualClock(0)
+
+    async def broken():
+        raise RuntimeError("boom")
+
+    scheduler = Scheduler(clock=clock, sleep=clock.sleep)
+    scheduler.add("broken", broken, 10, run_immediately=True)
+    run_until(scheduler, "broken", 1)
+    status = scheduler.status()[0]
+    assert status["failures"] == 1
+    assert status["last_error"] == "RuntimeError: boom"
+    assert status["last_duration"] is not None
+
+def test_jobs_endpoint():
+    from fastapi.testclient import TestClient
+    from app.main import app, scheduler
+    response = TestClient(app).get("/api/v1/system/jobs")
+    assert response.status_code == 200
+    assert {job["name"] for job in response.json()} == set(scheduler.jobs)
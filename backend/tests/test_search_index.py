@@ -0,0 +1,98 @@
+from sqlmodel import Session, select, create_engine, SQLModel
+from app.models import TickerIndex
+from app.services.indexer import IndexerService
+from app.services.search_index import TickerSearchIndex, base_asset
+import pytest
+import pandas as pd
+
+TICKERS = [
+    ("BINANCE:BTCUSDT", "BINANCE", "BTCUSDT"),
+    ("BYBIT:BTCUSDT", "BYBIT", "BTCUSDT"),
+    ("BINANCE:BTCUSDT.P", "BINANCE", "BTCUSDT.P"),
+    ("BINANCE:BTCDOMUSDT", "BINANCE", "BTCDOMUSDT"),
+    ("BINANCE:WBTCUSDT", "BINANCE", "WBTCUSDT"),
+    ("OKX:ETHUSDT", "OKX", "ETHUSDT"),
+    ("BINANCE:ETHBTC", "BINANCE", "ETHBTC"),
+    ("BITGET:OKBUSDT", "BITGET", "OKBUSDT"),
+]
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        for symbol, exchange, name in TICKERS:
+            session.add(TickerIndex(symbol=symbol, exchange=exchange, name=name))
+        session.commit()
+        yield session
+
+@pytest.fixture
+def index(session):
+    index = TickerSearchIndex()
+    index.load(session)
+    return index
+
+def symbols(results):
+    return [r["symbol"] for r in results]
+
+def test_base_asset():
+    assert base_asset("BTCUSDT.P") == "BTC"
+    assert base_asset("ETHBTC") == "ETH"
+    assert base_asset("OKBUSDT") == "OKB"
+
+def test_exact_symbol_ranks_first(index):
+    assert symbols(index.search("bybit:btcusdt"))[0] == "BYBIT:BTCUSDT"
+    # An exact pair name beats its perpetual and other prefixes
+    assert symbols(index.search("BTCUSDT"))[:2] == ["BINANCE:BTCUSDT", "BYBIT:BTCUSDT"]
+
+def test_prefix_then_base_asset_then_substring(index):
+    results = symbols(index.search("BTC"))
+    assert results == [
+        "BINANCE:BTCUSDT", "BYBIT:BTCUSDT", "BINANCE:BTCUSDT.P", "BINANCE:BTCDOMUSDT",
+        "BINANCE:ETHBTC", "BINANCE:WBTCUSDT",
+    ]
+
+def test_exchange_match(index):
+    assert symbols(index.search("OKX")) == ["OKX:ETHUSDT"]
+    # Every BINANCE ticker before pairs that merely contain the text
+    results = symbols(index.search("BINANCE"))
+    assert len(results) == 5 and all(s.startswith("BINANCE:") for s in results)
+
+def test_substring_semantics_and_limit(index):
+    assert symbols(index.search("DOM")) == ["BINANCE:BTCDOMUSDT"]
+    # Shares every trigram with BTCUSDT but is not a substring of any ticker
+    assert index.search("USDTBTC") == []
+    assert len(index.search("USDT", limit=3)) == 3
+    assert index.search("  ") == []
+
+def test_indexer_refreshes_loaded_index(session, monkeypatch, index):
+    monkeypatch.setattr("app.services.indexer.ticker_search", index)
+    catalog = pd.DataFrame([
+        {"Symbol": s, "Exchange": e, "Name": n, "Description": ""} for s, e, n in TICKERS
+        if s != "BINANCE:WBTCUSDT"
+    ] + [{"Symbol": "BYBIT:SOLUSDT", "Exchange": "BYBIT", "Name": "SOLUSDT", "Description": "Solana"}])
+
+    assert index.search("SOL") == []
+    IndexerService(session).apply_catalog(catalog)
+
+    assert symbols(index.search("SOL")) == ["BYBIT:SOLUSDT"]
+    assert index.search("SOL")[0]["id"] is not None
+    assert "BINANCE:WBTCUSDT" not in symbols(index.search("BTC"))
+    assert len(index) == len(session.exec(select(TickerIndex)).all())
+
+def test_ensure_current_picks_up_a_sync_from_another_process(session):
+    index = TickerSearchIndex(recheck_interval=0)
+    index.ensure_current(session)
+    assert index.search("SOL") == []
+
+    # run_indexer.py writes ticker_index without touching this process's index
+    session.add(TickerIndex(symbol="BYBIT:SOLUSDT", exchange="BYBIT", name="SOLUSDT"))
+    session.commit()
+    assert index.stale()
+    index.ensure_current(session)
+    assert symbols(index.search("SOL")) == ["BYBIT:SOLUSDT"]
+
+    # Checks are rate limited once loaded
+    index.recheck_interval = 60
+    index.ensure_current(session)
+    assert not index.stale()
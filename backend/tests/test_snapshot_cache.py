@@ -0,0 +1,95 @@
+import threading
+import time
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from app.services.cache import SnapshotCache
+from app.services.screener import ScreenerService
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_cache_serves_until_ttl_expires():
+    clock = FakeClock()
+    cache = SnapshotCache(ttl=5.0, clock=clock)
+    calls = []
+    loader = lambda: calls.append(1) or len(calls)
+
+    assert cache.get_or_load("k", loader) == 1
+    clock.now = 4.9
+    assert cache.get_or_load("k", loader) == 1
+    clock.now = 5.1
+    assert cache.get_or_load("k", loader) == 2
+    assert len(calls) == 2
+
+
+def test_cache_coalesces_concurrent_misses():
+    cache = SnapshotCache(ttl=5.0)
+    calls = []
+    release = threading.Event()
+
+    def slow_loader():
+        calls.append(1)
+        release.wait(timeout=2)
+        return "snapshot"
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_load("k", slow_loader)))
+        for _ in range(20)
+    ]
+    for t in threads:
+        t.start()
+    time.sleep(0.05)
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert results == ["snapshot"] * 20
+
+
+def test_cache_does_not_store_errors():
+    cache = SnapshotCache(ttl=5.0)
+
+    def failing():
+        raise RuntimeError("upstream down")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_load("k", failing)
+    assert cache.get_or_load("k", lambda: "recovered") == "recovered"
+
+
+def test_top_movers_share_one_upstream_query():
+    service = ScreenerService()
+    with patch('app.services.screener.CryptoScreener') as MockScreener:
+        mock_instance = MockScreener.return_value
+        mock_instance.get.return_value = pd.DataFrame({
+            'Symbol': ['BTCUSD', 'ETHUSD'],
+            'Price': [50000.0, 3000.0],
+            'Change %': [2.5, 1.2]
+        })
+
+        first = service.get_top_movers(limit=50)
+        second = service.get_top_movers(limit=50)
+        assert first == second
+        assert mock_instance.get.call_count == 1
+
+        # A different (interval, direction) pair is a separate snapshot
+        service.get_top_movers(limit=50, interval="15")
+        assert mock_instance.get.call_count == 2
+
+        # Any limit is sliced from the same snapshot, fetched once at max_movers rows
+        assert service.get_top_movers(limit=1) == first[:1]
+        assert service.get_top_movers(limit=10_000, interval="bogus") == first
+        assert mock_instance.get.call_count == 2
+        mock_instance.set_range.assert_called_with(0, service.max_movers)
+        assert list(service.movers_cache._entries) == [("1D", True)]
@@ -0,0 +1,80 @@
+from sqlmodel import Session, create_engine, SQLModel
+from sqlalchemy import text
+from app.models import TickerIndex
+from app.database import migrate_ticker_fts
+from app.services.indexer import IndexerService
+from app.services.search_index import fts_search
+import pytest
+from datetime import datetime
+import pandas as pd
+
+CATALOG = [
+    {"Symbol": "BINANCE:BTCUSDT", "Exchange": "BINANCE", "Name": "BTCUSDT", "Description": "Bitcoin / TetherUS"},
+    {"Symbol": "BINANCE:BTCUSDT.P", "Exchange": "BINANCE", "Name": "BTCUSDT.P", "Description": "Bitcoin / TetherUS PERPETUAL CONTRACT"},
+    {"Symbol": "BYBIT:BTCUSDT.P", "Exchange": "BYBIT", "Name": "BTCUSDT.P", "Description": "BTCUSDT Perpetual Contract"},
+    {"Symbol": "OKX:ETHUSDT", "Exchange": "OKX", "Name": "ETHUSDT", "Description": "Ethereum / Tether"},
+    {"Symbol": "BINANCE:ETHUSDT", "Exchange": "BINANCE", "Name": "ETHUSDT", "Description": "Ethereum / TetherUS"},
+]
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        IndexerService(session).apply_catalog(pd.DataFrame(CATALOG))
+        yield session
+
+def symbols(results):
+    return [r["symbol"] for r in results]
+
+def test_token_and_prefix_queries(session):
+    assert sorted(symbols(fts_search(session, "btc perp"))) == ["BINANCE:BTCUSDT.P", "BYBIT:BTCUSDT.P"]
+    assert symbols(fts_search(session, "eth okx")) == ["OKX:ETHUSDT"]
+    assert fts_search(session, "sol") == []
+    assert fts_search(session, " :: ") == []
+
+def test_bm25_prefers_symbol_hits(session):
+    # "bitcoin" only appears in descriptions, "btcusdt" in symbol and name
+    results = fts_search(session, "btcusdt")
+    assert len(results) == 3
+    assert results[0]["symbol"] == "BINANCE:BTCUSDT"
+    assert set(results[0]) == {"id", "symbol", "exchange", "name", "description", "updated_at"}
+
+def test_rows_match_the_in_memory_index(session):
+    from app.services.search_index import TickerSearchIndex
+    index = TickerSearchIndex()
+    index.load(session)
+    from_fts = fts_search(session, "ethusdt")
+    from_memory = {row["symbol"]: row for row in index.search("ETHUSDT")}
+    assert from_fts and all(row == from_memory[row["symbol"]] for row in from_fts)
+    assert all(isinstance(row["updated_at"], datetime) for row in from_fts)
+
+def test_mirror_follows_updates_and_prune(session):
+    catalog = [dict(row) for row in CATALOG if row["Symbol"] != "OKX:ETHUSDT"]
+    catalog[0]["Description"] = "Bitcoin spot"
+    IndexerService(session).apply_catalog(pd.DataFrame(catalog))
+
+    assert fts_search(session, "eth okx") == []
+    assert symbols(fts_search(session, "bitcoin spot")) == ["BINANCE:BTCUSDT"]
+    assert fts_search(session, "tetherus")[0]["symbol"] != "BINANCE:BTCUSDT"
+    # Raises if the mirror diverged from ticker_index
+    session.exec(text("INSERT INTO ticker_index_fts(ticker_index_fts, rank) VALUES ('integrity-check', 1)"))
+
+def test_migration_builds_mirror_for_existing_table():
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(text("DROP TABLE ticker_index_fts"))
+        for name in ("ai", "ad", "au"):
+            connection.execute(text(f"DROP TRIGGER ticker_index_fts_{name}"))
+        connection.execute(text("INSERT INTO ticker_index (symbol, exchange, name, updated_at) VALUES ('OKX:ETHUSDT', 'OKX', 'ETHUSDT', '2026-01-01')"))
+
+    with engine.begin() as connection:
+        migrate_ticker_fts(connection)
+        migrate_ticker_fts(connection)
+
+    with Session(engine) as session:
+        assert symbols(fts_search(session, "eth okx")) == ["OKX:ETHUSDT"]
+        session.add(TickerIndex(symbol="OKX:ETHUSDC", exchange="OKX", name="ETHUSDC"))
+        session.commit()
+        assert len(fts_search(session, "eth okx")) == 2
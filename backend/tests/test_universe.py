@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from app.services.screener import ScreenerService
+from app.services.universe import UniverseSnapshot
+
+@pytest.fixture
+def screener_service():
+    return ScreenerService()
+
+def make_frame(n=200, seed=1):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "Symbol": [f"{['BINANCE', 'OKX', 'BYBIT'][i % 3]}:T{i}USDT" for i in range(n)],
+        "Exchange": [["BINANCE", "OKX", "BYBIT"][i % 3] for i in range(n)],
+        "Change %": rng.uniform(-20, 20, n),
+        "Volume": rng.uniform(0, 1e6, n),
+        "Volume 24h in USD": rng.uniform(0, 1e7, n),
+        "Relative Strength Index (14)": rng.uniform(0, 100, n),
+    })
+
+def reference(df, limit, descending, mask):
+    subset = df[mask & df["Change %"].notna()]
+    if not descending:
+        subset = subset[subset["Change %"] < 0]
+    subset = subset.sort_values("Change %", ascending=not descending)
+    return list(subset["Symbol"].head(limit))
+
+def test_top_k_matches_full_sort():
+    df = make_frame()
+    df.loc[5, "Change %"] = np.nan
+    universe = UniverseSnapshot(df, lambda frame, interval: frame)
+    everything = pd.Series(True, index=df.index)
+    for descending in (True, False):
+        for limit in (1, 10, 500):
+            rows = universe.top_movers("1D", limit, descending)
+            assert [r["Symbol"] for r in rows] == reference(df, limit, descending, everything)
+    assert universe.top_movers("1D", 0) == []
+
+def test_filters():
+    df = make_frame()
+    universe = UniverseSnapshot(df, lambda frame, interval: frame)
+    rsi = df["Relative Strength Index (14)"]
+    # min_volume is in USD over 24h, not the interval's base-unit volume
+    mask = (df["Volume 24h in USD"] >= 2_500_000) & rsi.between(30, 70) & df["Exchange"].isin(["OKX", "BYBIT"])
+    rows = universe.top_movers("1D", 20, False, min_volume=2_500_000, rsi_min=30, rsi_max=70, exchanges=["okx", "bybit"])
+    assert [r["Symbol"] for r in rows] == reference(df, 20, False, mask)
+    assert all(r["Exchange"] != "BINANCE" and r["Change %"] < 0 for r in rows)
+
+def test_query_movers_is_answered_locally(screener_service):
+    frame = make_frame().rename(columns={"Symbol": "name", "Exchange": "exchange"})
+    with patch("app.services.screener.CryptoScreener") as MockScreener:
+        MockScreener.return_value.get.return_value = frame
+        first = screener_service.query_movers(limit=5, min_volume=1_000_000)
+        screener_service.query_movers(limit=5, sort_descending=False, rsi_max=30, exchanges=["BINANCE"])
+        screener_service.get_movers_batch(["1D"], limit=5)
+    assert MockScreener.return_value.get.call_count == 1
+    assert len(first) == 5 and all(r["Volume 24h in USD"] >= 1_000_000 for r in first)
+
+def test_query_movers_falls_back_on_error(screener_service):
+    with patch("app.services.screener.CryptoScreener") as MockScreener:
+        MockScreener.return_value.get.side_effect = Exception("API Error")
+        assert screener_service.query_movers(sort_descending=False)[0]["Change %"] < 0
+
+def test_filtered_endpoint_uses_local_query():
+    from app.main import app
+    client = TestClient(app)
+    with patch("app.services.screener.ScreenerService.query_movers", return_value=[]) as mock_query, \
+         patch("app.services.screener.ScreenerService.get_top_movers") as mock_get:
+        response = client.get("/api/v1/screener/top-movers?interval=15&sort=asc&rsi_max=30&exchanges=OKX,BYBIT")
+        assert response.status_code == 200
+        mock_get.assert_not_called()
+        mock_query.assert_called_with(limit=50, interval="15", sort_descending=False, min_volume=None,
+                                      rsi_min=None, rsi_max=30.0, exchanges=["OKX", "BYBIT"])
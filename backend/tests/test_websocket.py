@@ -1,4 +1,5 @@
 from fastapi.testclient import TestClient
+from unittest.mock import patch
 import pytest
 from app.main import app
 
@@ -12,7 +13,6 @@ def test_websocket_connection():
 
 def test_websocket_broadcast():
     from app.main import manager
-    import asyncio
     client = TestClient(app)
     with client.websocket_connect("/ws") as websocket:
         # Ignore welcome message
@@ -20,9 +20,84 @@ def test_websocket_broadcast():
         # Ignore initial update
         websocket.receive_json()
         
-        # Manually trigger broadcast via manager for testing
-        asyncio.run(manager.broadcast({"type": "market_update", "data": "test_data"}))
+        # Manually trigger broadcast via manager, on the app's event loop
+        websocket.portal.call(manager.broadcast, {"type": "market_update", "data": "test_data"})
         
         data = websocket.receive_json()
         assert data["type"] == "market_update"
-        assert data["data"] == "test_data"
\ No newline at end of file
+        assert data["data"] == "test_data"
+def test_websocket_delta_protocol():
+    from app.main import manager
+    rows = [{"Symbol": "BINANCE:BTCUSDT", "Price": 98000.0, "Change %": 2.5}]
+    client = TestClient(app)
+    with patch("app.services.screener.ScreenerService.get_top_movers", return_value=rows):
+        with client.websocket_connect("/ws?protocol=2") as websocket:
+            websocket.receive_json()
+            snapshot = websocket.receive_json()
+            assert snapshot["type"] == "market_snapshot"
+            assert snapshot["data"] == rows
+
+            updated = [dict(rows[0], Price=98100.0)]
+            websocket.portal.call(manager.publish, "movers:1D:desc", updated)
+            delta = websocket.receive_json()
+            assert delta["type"] == "market_delta"
+            assert delta["base"] == snapshot["seq"]
+            assert delta["upsert"] == [{"Symbol": "BINANCE:BTCUSDT", "Price": 98100.0}]
+
+            # A client that lost track asks for a fresh snapshot
+            websocket.send_text('{"type": "resync"}')
+            resync = websocket.receive_json()
+            assert resync["type"] == "market_snapshot"
+            assert resync["seq"] == delta["seq"]
+            assert resync["data"] == updated
+
+def test_websocket_channel_subscriptions():
+    from app.main import manager, publish_active_channels
+    calls = []
+
+    def fake_top_movers(self, limit=50, interval="1D", sort_descending=True, strict=False):
+        calls.append((interval, sort_descending))
+        change = 1.0 if sort_descending else -1.0
+        return [{"Symbol": f"BINANCE:{interval}USDT", "Change %": change}]
+
+    client = TestClient(app)
+    with patch("app.services.screener.ScreenerService.get_top_movers", fake_top_movers):
+        with client.websocket_connect("/ws?protocol=2") as websocket:
+            websocket.receive_json()
+            assert websocket.receive_json()["channel"] == "movers:1D:desc"
+
+            websocket.send_text('{"type": "subscribe", "channel": "movers:15:asc"}')
+            snapshot = websocket.receive_json()
+            assert snapshot["type"] == "market_snapshot"
+            assert snapshot["channel"] == "movers:15:asc"
+            assert snapshot["data"] == [{"Symbol": "BINANCE:15USDT", "Change %": -1.0}]
+
+            websocket.send_text('{"type": "subscribe", "channel": "movers:7:up"}')
+            assert websocket.receive_json()["type"] == "error"
+
+            websocket.send_text('{"type": "unsubscribe", "channel": "movers:1D:desc"}')
+            websocket.send_text("ping")
+            assert websocket.receive_json()["type"] == "pong"
+            assert manager.active_channels() == ["movers:15:asc"]
+
+            # One tick fetches only the channel somebody listens to
+            calls.clear()
+            websocket.portal.call(publish_active_channels)
+            assert calls == [("15", False)]
+
+def test_broadcast_raises_instead_of_publishing_fallback_rows():
+    from app.main import publish_active_channels, screener_service
+    from app.services.cache import SnapshotCache
+    client = TestClient(app)
+    with client.websocket_connect("/ws?protocol=2") as websocket:
+        websocket.receive_json()
+        websocket.receive_json()
+        with patch.object(screener_service, "movers_cache", SnapshotCache(ttl=5.0)), \
+                patch("app.services.screener.ScreenerService._fetch_top_movers",
+                      side_effect=ConnectionError("upstream down")):
+            # The scheduler sees the failure and backs off
+            with pytest.raises(ConnectionError):
+                websocket.portal.call(publish_active_channels)
+        # Nothing was pushed in between
+        websocket.send_text("ping")
+        assert websocket.receive_json()["type"] == "pong"
@@ -4,12 +4,10 @@ import type { MarketUpdate } from './components/CryptoTable'
 import SystemConsole from './components/SystemConsole'
 import type { SystemConsoleHandle } from './components/SystemConsole'
 import UniversalSearch from './components/UniversalSearch'
+import { applyDelta, channelsFor, DEFAULT_CHANNEL } from './marketDelta'
+import type { MarketDelta, MarketSnapshot } from './marketDelta'
 
-interface WSMessage {
-  type: string;
-  data?: MarketUpdate[];
-  message?: string;
-}
+type WSMessage = MarketSnapshot | MarketDelta | { type: 'welcome' | 'pong' | 'error'; message?: string };
 
 interface Favorite {
   id: number;
@@ -29,9 +27,13 @@ const App: React.FC = () => {
   const [readyState, setReadyState] = useState<number>(3) // 3 = CLOSED
   const consoleRef = useRef<SystemConsoleHandle>(null)
   const wsRef = useRef<WebSocket | null>(null)
+  // Channels the tables want, and the last applied state of each subscribed
+  // delta stream (a channel missing from the map is awaiting its snapshot)
+  const wantedChannelsRef = useRef(channelsFor(liveInterval, activeInterval))
+  const streamsRef = useRef(new Map<string, { seq: number; rows: MarketUpdate[] }>())
   const terminalId = useRef(Math.random().toString(36).substring(7).toUpperCase());
 
-  const WS_URL = 'ws://localhost:8000/ws'
+  const WS_URL = 'ws://localhost:8000/ws?protocol=2'
 
   const fetchFavorites = async () => {
     try {
@@ -55,32 +57,21 @@ const App: React.FC = () => {
     }
   };
 
+  // Gainers and losers of the live interval come from one batched request
   const fetchLiveMovers = async () => {
     try {
-      const response = await fetch(`http://localhost:8000/api/v1/screener/top-movers?interval=${liveInterval}&limit=50&sort=desc`);
+      const response = await fetch(`http://localhost:8000/api/v1/screener/top-movers/batch?intervals=${liveInterval}&limit=50`);
       const data = await response.json();
-      setMoversData(data);
-      if (activeSort === 'desc') {
-        consoleRef.current?.writeLog(`FETCHED_LIVE_MOVERS: ${liveInterval}_TIMEFRAME`, 'info');
-      }
+      const movers = data[liveInterval] ?? { desc: [], asc: [] };
+      setMoversData(movers.desc);
+      setLosersData(movers.asc);
+      const label = activeSort === 'desc' ? 'MOVERS' : 'LOSERS';
+      consoleRef.current?.writeLog(`FETCHED_LIVE_${label}: ${liveInterval}_TIMEFRAME`, 'info');
     } catch (error) {
       console.error('Error fetching live movers:', error);
     }
   };
 
-  const fetchLiveLosers = async () => {
-    try {
-      const response = await fetch(`http://localhost:8000/api/v1/screener/top-movers?interval=${liveInterval}&limit=50&sort=asc`);
-      const data = await response.json();
-      setLosersData(data);
-      if (activeSort === 'asc') {
-        consoleRef.current?.writeLog(`FETCHED_LIVE_LOSERS: ${liveInterval}_TIMEFRAME`, 'info');
-      }
-    } catch (error) {
-      console.error('Error fetching live losers:', error);
-    }
-  };
-
   const fetchTrackedData = async () => {
     if (favorites.length === 0) {
       setTrackedData([]);
@@ -118,26 +109,52 @@ const App: React.FC = () => {
     fetchFavorites();
   }, []);
 
-  // Polling for Movers
+  // REST polling is only a fallback while the WebSocket channels are down
+  // Polling for Movers and Losers
   useEffect(() => {
+    if (readyState === 1) return;
     fetchLiveMovers();
     const poll = setInterval(fetchLiveMovers, 10000);
     return () => clearInterval(poll);
-  }, [liveInterval]);
-
-  // Polling for Losers
-  useEffect(() => {
-    fetchLiveLosers();
-    const poll = setInterval(fetchLiveLosers, 10000);
-    return () => clearInterval(poll);
-  }, [liveInterval]);
+  }, [liveInterval, readyState]);
 
   // Polling for Tracked
   useEffect(() => {
+    if (readyState === 1) return;
     fetchTrackedData();
     const poll = setInterval(fetchTrackedData, 10000);
     return () => clearInterval(poll);
-  }, [favorites, activeInterval, liveInterval, moversData, losersData]);
+  }, [favorites, activeInterval, liveInterval, moversData, losersData, readyState]);
+
+  // The favorites channel picks up an added/removed favorite on its next tick; show it now
+  useEffect(() => {
+    if (readyState === 1) fetchTrackedData();
+  }, [favorites]);
+
+  // Move subscriptions along with the selected intervals
+  useEffect(() => {
+    const previous = new Set(Object.values(wantedChannelsRef.current));
+    wantedChannelsRef.current = channelsFor(liveInterval, activeInterval);
+    const next = new Set(Object.values(wantedChannelsRef.current));
+    const ws = wsRef.current;
+    if (!ws || ws.readyState !== WebSocket.OPEN) return;
+
+    previous.forEach((channel) => {
+      if (next.has(channel)) return;
+      ws.send(JSON.stringify({ type: 'unsubscribe', channel }));
+      streamsRef.current.delete(channel);
+    });
+    next.forEach((channel) => {
+      if (!previous.has(channel)) ws.send(JSON.stringify({ type: 'subscribe', channel }));
+    });
+  }, [liveInterval, activeInterval]);
+
+  const showChannel = (channel: string, rows: MarketUpdate[]) => {
+    const wanted = wantedChannelsRef.current;
+    if (channel === wanted.movers) setMoversData(rows);
+    if (channel === wanted.losers) setLosersData(rows);
+    if (channel === wanted.tracked) setTrackedData(rows);
+  };
 
   useEffect(() => {
     const connect = () => {
@@ -149,18 +166,43 @@ const App: React.FC = () => {
       ws.onopen = () => {
         setReadyState(1); // OPEN
         consoleRef.current?.writeLog('WS_CONNECTION_ESTABLISHED', 'info');
+        // The server already streams DEFAULT_CHANNEL; add (or drop) the rest
+        const wanted = new Set(Object.values(wantedChannelsRef.current));
+        if (!wanted.has(DEFAULT_CHANNEL)) {
+          ws.send(JSON.stringify({ type: 'unsubscribe', channel: DEFAULT_CHANNEL }));
+        }
+        wanted.forEach((channel) => {
+          if (channel !== DEFAULT_CHANNEL) ws.send(JSON.stringify({ type: 'subscribe', channel }));
+        });
       };
 
       ws.onmessage = (event) => {
         const message: WSMessage = JSON.parse(event.data);
-        if (message.type === 'market_update' && message.data) {
-          // WebSocket is 1D Desc only. Only update moversData state.
-          setMoversData(message.data);
+        if (message.type === 'market_snapshot') {
+          streamsRef.current.set(message.channel, { seq: message.seq, rows: message.data });
+          showChannel(message.channel, message.data);
+        } else if (message.type === 'market_delta') {
+          const stream = streamsRef.current.get(message.channel);
+          // A snapshot is on its way; deltas until then do not apply
+          if (!stream) return;
+          if (message.base !== stream.seq) {
+            // Missed an update: drop the stream state and ask for a fresh snapshot
+            consoleRef.current?.writeLog(`WS_SEQUENCE_GAP: ${message.channel}. RESYNCING...`, 'warning');
+            streamsRef.current.delete(message.channel);
+            ws.send(JSON.stringify({ type: 'resync', channel: message.channel }));
+            return;
+          }
+          const rows = applyDelta(stream.rows, message);
+          streamsRef.current.set(message.channel, { seq: message.seq, rows });
+          showChannel(message.channel, rows);
+        } else if (message.type === 'error') {
+          consoleRef.current?.writeLog(`WS_ERROR: ${message.message}`, 'error');
         }
       };
 
       ws.onclose = () => {
         setReadyState(3); // CLOSED
+        streamsRef.current.clear();
         consoleRef.current?.writeLog('WS_CONNECTION_LOST. RECONNECTING...', 'warn');
         setTimeout(connect, 3000);
       };
@@ -173,7 +215,7 @@ const App: React.FC = () => {
 
     connect();
     return () => wsRef.current?.close();
-  }, []); // WS is persistent and updates moversData only
+  }, []); // WS is persistent; tables follow their subscribed channels
 
   useEffect(() => {
     const timer = setInterval(() => {
@@ -360,7 +402,7 @@ const App: React.FC = () => {
               data={currentMarketData} 
               interval={liveInterval}
               onIntervalChange={setLiveInterval}
-              title={activeSort === 'desc' ? "MARKET_TOP_MOVERS (LIVE_WS)" : "MARKET_TOP_LOSERS (POLLING)"}
+              title={activeSort === 'desc' ? "MARKET_TOP_MOVERS (LIVE_WS)" : "MARKET_TOP_LOSERS (LIVE_WS)"}
               defaultSortDir={activeSort}
             />
           </div>
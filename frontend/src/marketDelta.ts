@@ -0,0 +1,48 @@
+import type { MarketUpdate } from './components/CryptoTable'
+
+// Messages of the /ws?protocol=2 stream
+export interface MarketSnapshot {
+  type: 'market_snapshot';
+  channel: string;
+  seq: number;
+  data: MarketUpdate[];
+}
+
+export interface MarketDelta {
+  type: 'market_delta';
+  channel: string;
+  seq: number;
+  base: number;
+  upsert: MarketUpdate[];
+  remove: string[];
+  ranks: Record<string, number>;
+}
+
+// Channel the server pushes to every protocol 2 client on connect
+export const DEFAULT_CHANNEL = 'movers:1D:desc';
+
+// Subscription channels backing the three dashboard tables
+export const channelsFor = (liveInterval: string, trackedInterval: string) => ({
+  movers: `movers:${liveInterval}:desc`,
+  losers: `movers:${liveInterval}:asc`,
+  tracked: `favorites:${trackedInterval}`,
+});
+
+// Mirrors app.services.market_delta.apply_delta on the backend
+export const applyDelta = (rows: MarketUpdate[], delta: MarketDelta): MarketUpdate[] => {
+  const removed = new Set(delta.remove);
+  const bySymbol = new Map<string, MarketUpdate>();
+  const ranks = new Map<string, number>();
+
+  rows.forEach((row, i) => {
+    ranks.set(row.Symbol, i);
+    if (!removed.has(row.Symbol)) bySymbol.set(row.Symbol, { ...row });
+  });
+  Object.entries(delta.ranks).forEach(([symbol, rank]) => ranks.set(symbol, rank));
+
+  delta.upsert.forEach((change) => {
+    bySymbol.set(change.Symbol, { ...(bySymbol.get(change.Symbol) ?? {}), ...change } as MarketUpdate);
+  });
+
+  return [...bySymbol.values()].sort((a, b) => (ranks.get(a.Symbol) ?? 0) - (ranks.get(b.Symbol) ?? 0));
+};